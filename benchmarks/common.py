@@ -0,0 +1,43 @@
+"""Helpers shared by the benchmark scripts.
+
+Benchmarks run against a throwaway test database and are started from
+the project root, e.g. ``python -m benchmarks.show_session_filters``.
+"""
+import contextlib
+import os
+import time
+
+import django
+
+
+def setup():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "planetarium_service.settings")
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database():
+    """Create the test database for the duration of the block."""
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def best_of(func, repeat=5, number=20):
+    """Best average time of ``func`` in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - started) / number)
+    return min(timings) * 1000
+
+
+def report(name, milliseconds):
+    print(f"{name:<48} {milliseconds:10.3f} ms")
@@ -0,0 +1,95 @@
+"""Compare list serializers on model instances and on projected rows."""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from benchmarks.common import setup, test_database, best_of, report
+
+setup()
+
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from planetarium.models import (  # noqa: E402
+    AstronomyShow,
+    ShowTheme,
+    PlanetariumDome,
+    ShowSession,
+)
+from planetarium.serializers import (  # noqa: E402
+    AstronomyShowListSerializer,
+    ShowSessionListSerializer,
+)
+
+SHOWS = 100
+SESSIONS = 500
+
+
+def populate():
+    themes = ShowTheme.objects.bulk_create(
+        ShowTheme(name=f"Theme {i}") for i in range(10)
+    )
+    shows = AstronomyShow.objects.bulk_create(
+        AstronomyShow(
+            title=f"Show {i}",
+            description="Bench " * 50,
+            image=f"uploads/shows/show-{i}.jpg",
+        )
+        for i in range(SHOWS)
+    )
+    AstronomyShow.themes.through.objects.bulk_create(
+        AstronomyShow.themes.through(astronomyshow=show, showtheme=theme)
+        for i, show in enumerate(shows)
+        for theme in themes[i % 4: i % 4 + 3]
+    )
+    dome = PlanetariumDome.objects.create(name="Bench", rows=20, seats_in_row=30)
+    start = datetime(2030, 1, 1, 9, tzinfo=dt_timezone.utc)
+    ShowSession.objects.bulk_create(
+        ShowSession(
+            astronomy_show=shows[i % SHOWS],
+            planetarium_dome=dome,
+            show_time=start + timedelta(hours=i),
+        )
+        for i in range(SESSIONS)
+    )
+
+
+def serialize(serializer_class, queryset, context):
+    return serializer_class(queryset, many=True, context=context).data
+
+
+def main():
+    with test_database():
+        populate()
+        context = {"request": APIRequestFactory().get("/", SERVER_NAME="127.0.0.1")}
+
+        cases = {
+            "show sessions": (
+                ShowSessionListSerializer,
+                ShowSession.objects.with_tickets_available().select_related(
+                    "astronomy_show", "planetarium_dome"
+                ),
+            ),
+            "astronomy shows": (
+                AstronomyShowListSerializer,
+                AstronomyShow.objects.prefetch_related("themes"),
+            ),
+        }
+        for name, (serializer_class, queryset) in cases.items():
+            report(
+                f"{name}: instances",
+                best_of(
+                    lambda: serialize(serializer_class, queryset.all(), context),
+                    number=5,
+                ),
+            )
+            report(
+                f"{name}: projection",
+                best_of(
+                    lambda: serialize(
+                        serializer_class, serializer_class.project(queryset), context
+                    ),
+                    number=5,
+                ),
+            )
+
+
+if __name__ == "__main__":
+    main()
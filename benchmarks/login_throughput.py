@@ -0,0 +1,88 @@
+"""Logins per second of one worker, and what is left for other requests.
+
+Runs a single worker process with the synchronous simplejwt login view
+under a gunicorn sync worker (before) and ``user.views.TokenObtainPairView``,
+which hashes in the ``user.hashing`` thread pool, under a uvicorn worker
+(after). ``LOGIN_CLIENTS`` clients log in, first alone and then while
+``READ_CLIENTS`` others read the show themes, e.g.::
+
+    python -m benchmarks.login_throughput
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.server_throughput import (
+    DURATION,
+    measure,
+    populate,
+    running,
+)
+
+LOGIN_CLIENTS = 8
+READ_CLIENTS = 8
+
+CASES = {
+    "before: gunicorn sync, sync login": (
+        ["planetarium_service.wsgi", "--worker-class", "sync"],
+        "/sync-token/",
+    ),
+    "after: gunicorn uvicorn, async login": (
+        [
+            "planetarium_service.asgi",
+            "--worker-class",
+            "uvicorn.workers.UvicornWorker",
+        ],
+        "/api/user/token/",
+    ),
+}
+
+
+def main():
+    _, token = populate()
+    credentials = json.dumps(
+        {"email": "bench@bench.com", "password": "benchpass"}
+    )
+    login_headers = {"Content-Type": "application/json"}
+    read_headers = {"Authorization": f"Bearer {token}"}
+
+    for name, (arguments, login_path) in CASES.items():
+        with running(arguments, workers=1):
+            login_rate, login_failed = measure(
+                login_path,
+                login_headers,
+                concurrency=LOGIN_CLIENTS,
+                method="POST",
+                body=credentials,
+            )
+            print(
+                f"{name + ', logins only':<56}"
+                f" logins {login_rate:6.1f} req/s ({login_failed} failed)"
+            )
+
+            with ThreadPoolExecutor(2) as executor:
+                logins = executor.submit(
+                    measure,
+                    login_path,
+                    login_headers,
+                    concurrency=LOGIN_CLIENTS,
+                    method="POST",
+                    body=credentials,
+                )
+                reads = executor.submit(
+                    measure,
+                    "/api/planetarium/show_themes/",
+                    read_headers,
+                    concurrency=READ_CLIENTS,
+                )
+                login_rate, login_failed = logins.result()
+                read_rate, read_failed = reads.result()
+            print(
+                f"{name + ', logins and reads':<56}"
+                f" logins {login_rate:6.1f} req/s ({login_failed} failed)"
+                f"  reads {read_rate:7.1f} req/s ({read_failed} failed)"
+            )
+    print(f"(1 worker, {DURATION} s per case)")
+
+
+if __name__ == "__main__":
+    main()
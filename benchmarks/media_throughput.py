@@ -0,0 +1,67 @@
+"""Requests per second of media served by gunicorn sync workers.
+
+Compares ``django.views.static.serve``, which ``static(MEDIA_URL, ...)``
+routed to, with ``planetarium.media.serve_media`` on a poster and a
+thumbnail: full bodies, byte ranges and revalidations, e.g.::
+
+    python -m benchmarks.media_throughput
+"""
+import os
+import tempfile
+
+os.environ["BENCHMARK_MEDIA_ROOT"] = tempfile.mkdtemp()
+
+from benchmarks.server_throughput import DURATION, measure, running  # noqa: E402
+
+from django.core.files.base import ContentFile  # noqa: E402
+from django.core.files.storage import default_storage  # noqa: E402
+
+POSTER_SIZE = 4 * 1024 * 1024
+THUMBNAIL_SIZE = 16 * 1024
+
+
+def store(size):
+    return default_storage.save(
+        "uploads/shows/benchmark.jpg", ContentFile(os.urandom(size))
+    )
+
+
+def main():
+    files = {"poster": (store(POSTER_SIZE), POSTER_SIZE)}
+    files["thumbnail"] = (store(THUMBNAIL_SIZE), THUMBNAIL_SIZE)
+
+    cases = []
+    for label, (name, size) in files.items():
+        etag = f'"{os.path.splitext(os.path.basename(name))[0]}"'
+        cases += [
+            (f"static serve: {label}", f"/static-media/{name}", {}, 200, size),
+            (f"serve_media: {label}", f"/media/{name}", {}, 200, size),
+            (
+                f"serve_media: {label}, 64 KiB range",
+                f"/media/{name}",
+                {"Range": "bytes=0-65535"},
+                206,
+                min(size, 65536),
+            ),
+            (
+                f"serve_media: {label}, If-None-Match",
+                f"/media/{name}",
+                {"If-None-Match": etag},
+                304,
+                0,
+            ),
+        ]
+
+    with running(["planetarium_service.wsgi", "--worker-class", "sync"]):
+        for name, path, headers, expected_status, size in cases:
+            rate, failed = measure(path, headers, expected_status)
+            megabytes = rate * size / 1024 / 1024
+            print(
+                f"{name:<44} {rate:10.1f} req/s {megabytes:9.1f} MiB/s"
+                f"  {failed} failed"
+            )
+    print(f"({DURATION} s per case)")
+
+
+if __name__ == "__main__":
+    main()
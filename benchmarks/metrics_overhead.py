@@ -0,0 +1,53 @@
+"""Per-request cost of ``MetricsMiddleware``.
+
+Times a trivial view called directly and through the middleware, which
+records six metrics for it; and the cost the serializer timing adds to
+rendering a list of show themes.
+"""
+from benchmarks.common import setup, best_of, report
+
+setup()
+
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+from django.urls import resolve  # noqa: E402
+
+from planetarium.models import ShowTheme  # noqa: E402
+from planetarium.serializers import ShowThemeSerializer  # noqa: E402
+from planetarium_service.metrics import (  # noqa: E402
+    MetricsMiddleware,
+    SerializerTimer,
+    serializer_timer,
+)
+
+THEMES = 100
+
+
+def view(request):
+    return HttpResponse(b"{}", content_type="application/json")
+
+
+@override_settings(METRICS_DIRECTORY=None)
+def main():
+    request = RequestFactory().get("/api/planetarium/show_themes/")
+    request.resolver_match = resolve(request.path)
+    middleware = MetricsMiddleware(view)
+
+    report("view alone (ms/request)", best_of(lambda: view(request), number=1000))
+    report(
+        "view with metrics (ms/request)",
+        best_of(lambda: middleware(request), number=1000),
+    )
+
+    themes = [ShowTheme(id=index, name=f"Theme {index}") for index in range(THEMES)]
+
+    def render():
+        return ShowThemeSerializer(themes, many=True).data
+
+    report(f"{THEMES} themes, untimed (ms)", best_of(render, number=100))
+    serializer_timer.set(SerializerTimer())
+    report(f"{THEMES} themes, timed (ms)", best_of(render, number=100))
+
+
+if __name__ == "__main__":
+    main()
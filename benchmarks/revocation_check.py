@@ -0,0 +1,52 @@
+"""Cost of the revocation check on each authenticated request.
+
+Revokes ``REVOKED`` sessions, then times ``revocations.is_revoked`` for a
+valid token against looking its ``jti`` up in the table, the query each
+request would otherwise make.
+"""
+from benchmarks.common import setup, test_database, best_of, report
+
+setup()
+
+from datetime import timedelta  # noqa: E402
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from user.models import TokenRevocation  # noqa: E402
+from user.revocation import revocations  # noqa: E402
+from user.tokens import RefreshToken  # noqa: E402
+
+REVOKED = 20000
+
+
+def main():
+    with test_database():
+        user = get_user_model().objects.create_user(
+            "bench@bench.com", "benchpass"
+        )
+        expires_at = timezone.now() + timedelta(days=1)
+        TokenRevocation.objects.bulk_create(
+            TokenRevocation(user=user, jti=f"revoked{index}", expires_at=expires_at)
+            for index in range(REVOKED)
+        )
+        revocations.rebuild()
+        access = RefreshToken.for_user(user).access_token
+        jti = access["jti"]
+
+        report(
+            "revocation list (ms/request)",
+            best_of(lambda: revocations.is_revoked(access), number=1000),
+        )
+        report(
+            "table lookup (ms/request)",
+            best_of(
+                lambda: TokenRevocation.objects.filter(jti=jti).exists(),
+                number=1000,
+            ),
+        )
+        print(f"({REVOKED} revoked tokens)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Settings of the servers started by ``benchmarks.server_throughput``.
+
+Production-like: no debug toolbar, no throttling, and a scratch SQLite
+database named by ``BENCHMARK_DATABASE``. ``BENCHMARK_MEDIA_ROOT`` names
+a scratch media directory, and ``benchmarks.urls`` adds baseline routes.
+"""
+import os
+from datetime import timedelta
+
+from planetarium_service.settings import *  # noqa: F401,F403
+from planetarium_service.settings import (
+    DATABASES,
+    MEDIA_ROOT,
+    MIDDLEWARE,
+    REST_FRAMEWORK,
+    SIMPLE_JWT,
+)
+
+DEBUG = False
+ALLOWED_HOSTS = ["127.0.0.1"]
+ROOT_URLCONF = "benchmarks.urls"
+MEDIA_ROOT = os.environ.get("BENCHMARK_MEDIA_ROOT", MEDIA_ROOT)
+
+DATABASES = {
+    **DATABASES,
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ["BENCHMARK_DATABASE"],
+    },
+}
+
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if not middleware.startswith("debug_toolbar.")
+]
+
+REST_FRAMEWORK = {**REST_FRAMEWORK, "DEFAULT_THROTTLE_CLASSES": []}
+SIMPLE_JWT = {**SIMPLE_JWT, "ACCESS_TOKEN_LIFETIME": timedelta(hours=1)}
+
+QUERY_COUNT_HEADERS = False
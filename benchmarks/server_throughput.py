@@ -0,0 +1,210 @@
+"""Requests per second of the read endpoints under WSGI and ASGI servers.
+
+Starts gunicorn with sync workers (``planetarium_service.wsgi``) and with
+uvicorn workers (``planetarium_service.asgi``) on a scratch database and
+hammers each endpoint from ``CONCURRENCY`` client threads, e.g.::
+
+    python -m benchmarks.server_throughput
+
+Servers whose package is not installed are skipped.
+"""
+import http.client
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+DATABASE = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+os.environ["BENCHMARK_DATABASE"] = DATABASE
+os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.server_settings"
+os.environ.setdefault("DJANGO_SECRET_KEY", "benchmark")
+
+from benchmarks.common import setup  # noqa: E402
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from planetarium.models import (  # noqa: E402
+    AstronomyShow,
+    ShowTheme,
+    PlanetariumDome,
+    ShowSession,
+    Reservation,
+)
+
+HOST = "127.0.0.1"
+PORT = 8765
+WORKERS = 4
+CONCURRENCY = 32
+DURATION = 10
+
+SERVERS = {
+    "gunicorn sync": (
+        ("gunicorn",),
+        ["planetarium_service.wsgi", "--worker-class", "sync"],
+    ),
+    "gunicorn uvicorn": (
+        ("gunicorn", "uvicorn"),
+        [
+            "planetarium_service.asgi",
+            "--worker-class",
+            "uvicorn.workers.UvicornWorker",
+        ],
+    ),
+}
+
+
+def populate():
+    """A few shows and domes, 200 sessions and a user with reservations."""
+    call_command("migrate", verbosity=0)
+    themes = [ShowTheme.objects.create(name=f"Theme {i}") for i in range(5)]
+    domes = [
+        PlanetariumDome.objects.create(name=f"Dome {i}", rows=20, seats_in_row=30)
+        for i in range(3)
+    ]
+    shows = []
+    for i in range(10):
+        show = AstronomyShow.objects.create(
+            title=f"Show {i}", description="Benchmark show"
+        )
+        show.themes.set(themes[: i % 5 + 1])
+        shows.append(show)
+
+    start = datetime(2030, 1, 1, 9, tzinfo=dt_timezone.utc)
+    sessions = [
+        ShowSession.objects.create(
+            astronomy_show=shows[i % len(shows)],
+            planetarium_dome=domes[i % len(domes)],
+            show_time=start + timedelta(hours=i),
+        )
+        for i in range(200)
+    ]
+
+    user = get_user_model().objects.create_user("bench@bench.com", "benchpass")
+    for row in range(1, 6):
+        Reservation.create_with_tickets(
+            [
+                {"show_session": sessions[0], "row": row, "seat": seat}
+                for seat in range(1, 11)
+            ],
+            user=user,
+        )
+    return sessions[0], AccessToken.for_user(user)
+
+
+def wait_until_up(process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup.")
+        try:
+            socket.create_connection((HOST, PORT), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start in time.")
+
+
+@contextmanager
+def running(arguments, workers=WORKERS):
+    """Run ``python -m gunicorn *arguments`` on ``HOST:PORT`` meanwhile."""
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn", *arguments,
+            "--bind", f"{HOST}:{PORT}",
+            "--workers", str(workers),
+            "--log-level", "warning",
+        ],
+        env=os.environ,
+    )
+    try:
+        wait_until_up(process)
+        yield
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def hammer(path, headers, expected_status=200, method="GET", body=None):
+    """Send requests until ``DURATION`` is over; return ``(ok, failed)``."""
+    deadline = time.monotonic() + DURATION
+    ok = failed = 0
+    connection = http.client.HTTPConnection(HOST, PORT, timeout=10)
+    while time.monotonic() < deadline:
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            connection.close()
+            connection = http.client.HTTPConnection(HOST, PORT, timeout=10)
+            continue
+
+        if response.status == expected_status:
+            ok += 1
+        else:
+            failed += 1
+        if response.getheader("Connection", "").lower() == "close":
+            connection.close()
+            connection = http.client.HTTPConnection(HOST, PORT, timeout=10)
+    connection.close()
+    return ok, failed
+
+
+def measure(path, headers, expected_status=200, concurrency=CONCURRENCY, **kwargs):
+    """Requests per second and failed requests of ``concurrency`` clients.
+
+    ``kwargs`` (``method``, ``body``) are passed on to ``hammer``.
+    """
+    with ThreadPoolExecutor(concurrency) as executor:
+        futures = [
+            executor.submit(hammer, path, headers, expected_status, **kwargs)
+            for _ in range(concurrency)
+        ]
+        results = [future.result() for future in futures]
+    ok = sum(result[0] for result in results)
+    failed = sum(result[1] for result in results)
+    return ok / DURATION, failed
+
+
+def main():
+    show_session, token = populate()
+    headers = {"Authorization": f"Bearer {token}"}
+    paths = {
+        "show sessions list": "/api/planetarium/show_sessions/",
+        "show session detail": f"/api/planetarium/show_sessions/{show_session.id}/",
+        "astronomy shows list": "/api/planetarium/astronomy_shows/",
+        "reservations list": "/api/planetarium/reservations/",
+    }
+
+    for server, (packages, arguments) in SERVERS.items():
+        missing = [
+            package
+            for package in packages
+            if importlib.util.find_spec(package) is None
+        ]
+        if missing:
+            print(f"{server}: skipped, {', '.join(missing)} not installed")
+            continue
+
+        with running(arguments):
+            for name, path in paths.items():
+                rate, failed = measure(path, headers)
+                print(
+                    f"{server + ': ' + name:<48} {rate:10.1f} req/s"
+                    f"  {failed} failed"
+                )
+
+
+if __name__ == "__main__":
+    main()
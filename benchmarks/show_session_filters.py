@@ -0,0 +1,64 @@
+"""Compare date filtering of show sessions with and without index ranges."""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from benchmarks.common import setup, test_database, best_of, report
+
+setup()
+
+from django.http import QueryDict  # noqa: E402
+
+from planetarium.filters import filter_schedule  # noqa: E402
+from planetarium.models import (  # noqa: E402
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+)
+
+SESSIONS = 50_000
+
+
+def populate():
+    show = AstronomyShow.objects.create(title="Bench", description="Bench")
+    domes = PlanetariumDome.objects.bulk_create(
+        PlanetariumDome(name=f"Dome {i}", rows=10, seats_in_row=20)
+        for i in range(5)
+    )
+    start = datetime(2020, 1, 1, 9, tzinfo=dt_timezone.utc)
+    ShowSession.objects.bulk_create(
+        (
+            ShowSession(
+                astronomy_show=show,
+                planetarium_dome=domes[i % len(domes)],
+                show_time=start + timedelta(minutes=45 * i),
+            )
+            for i in range(SESSIONS)
+        ),
+        batch_size=5000,
+    )
+
+
+def main():
+    with test_database() as connection:
+        populate()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        day = "2021-06-15"
+        querysets = {
+            "show_time__date": ShowSession.objects.filter(show_time__date=day),
+            "half-open range": filter_schedule(
+                ShowSession.objects.all(), QueryDict(f"date={day}")
+            ),
+            "half-open range + dome": filter_schedule(
+                ShowSession.objects.all(), QueryDict(f"date={day}&dome=1")
+            ),
+        }
+
+        for name, queryset in querysets.items():
+            print(f"{name}: {queryset.explain()}")
+        for name, queryset in querysets.items():
+            report(name, best_of(lambda: list(queryset.all())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Per-request cost and cross-process accuracy of the throttles.
+
+Times ``allow_request`` of DRF's ``UserRateThrottle`` (timestamp history
+in the local-memory cache) against the sliding window throttle on its
+in-process and SQLite stores, then lets several processes hammer one
+client through each to see how many requests get past a limit.
+"""
+import os
+import tempfile
+from multiprocessing import get_context
+
+from benchmarks.common import setup, best_of, report
+
+setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+from rest_framework import throttling  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+
+from planetarium_service import throttling as sliding  # noqa: E402
+
+PROCESSES = 4
+HITS_PER_PROCESS = 500
+LIMIT = 1000
+RATE = f"{LIMIT}/day"
+
+
+class User:
+    pk = 1
+    is_authenticated = True
+
+
+def make_request():
+    request = Request(RequestFactory().get("/"))
+    request.user = User()
+    return request
+
+
+def throttle_of(throttle_class):
+    throttle = throttle_class()
+    throttle.rate = RATE
+    throttle.num_requests, throttle.duration = throttle.parse_rate(RATE)
+    return throttle
+
+
+def hammer(throttle_class, database, hits):
+    """Requests of one client let through by a fresh worker process."""
+    with override_settings(THROTTLE_DATABASE=database):
+        throttle = throttle_of(throttle_class)
+        request = make_request()
+        return sum(throttle.allow_request(request, None) for _ in range(hits))
+
+
+def timings(database):
+    request = make_request()
+    for name, throttle_class, location in (
+        ("DRF UserRateThrottle, locmem", throttling.UserRateThrottle, database),
+        ("sliding window, in process", sliding.UserRateThrottle, ":memory:"),
+        ("sliding window, SQLite", sliding.UserRateThrottle, database),
+    ):
+        cache.clear()
+        sliding.get_store(location).clear()
+        with override_settings(THROTTLE_DATABASE=location):
+            # Half the limit used up: DRF reads and writes that many
+            # timestamps on every request.
+            throttle = throttle_of(throttle_class)
+            for _ in range(LIMIT // 2):
+                throttle.allow_request(request, None)
+            report(
+                f"{name} (ms/request)",
+                best_of(lambda: throttle.allow_request(request, None), number=100),
+            )
+
+
+def accuracy(database):
+    context = get_context("fork")
+    for name, throttle_class, location in (
+        ("DRF UserRateThrottle, locmem", throttling.UserRateThrottle, database),
+        ("sliding window, SQLite", sliding.UserRateThrottle, database),
+    ):
+        cache.clear()
+        sliding.get_store(database).clear()
+        with context.Pool(PROCESSES) as pool:
+            allowed = pool.starmap(
+                hammer,
+                [(throttle_class, location, HITS_PER_PROCESS)] * PROCESSES,
+            )
+        print(
+            f"{name:<32} {sum(allowed):5} of {PROCESSES * HITS_PER_PROCESS}"
+            f" requests allowed by {PROCESSES} processes, limit {LIMIT}"
+        )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "throttle.sqlite3")
+        timings(database)
+        accuracy(database)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""The project URLs plus the baselines the benchmarks compare against."""
+from django.conf import settings
+from django.urls import re_path
+from django.views.static import serve
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from planetarium_service.urls import urlpatterns as project_urlpatterns
+
+urlpatterns = [
+    # What ``static(MEDIA_URL, ...)`` served before planetarium.media.
+    re_path(
+        r"^static-media/(?P<path>.*)$",
+        serve,
+        {"document_root": settings.MEDIA_ROOT},
+    ),
+    # The synchronous login view user.views.TokenObtainPairView replaced.
+    re_path(r"^sync-token/$", TokenObtainPairView.as_view()),
+    *project_urlpatterns,
+]
@@ -0,0 +1,17 @@
+"""
+gunicorn config, read from the working directory by default.
+
+Serve with ``gunicorn planetarium_service.wsgi`` or, for the async views,
+``gunicorn -k uvicorn.workers.UvicornWorker planetarium_service.asgi``.
+"""
+
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'planetarium_service.settings')
+
+
+def child_exit(server, worker):
+    """Keep the metrics of an exited worker, but not its file."""
+    from planetarium_service.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
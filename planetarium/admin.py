@@ -6,13 +6,22 @@ from planetarium.models import (
     PlanetariumDome,
     ShowSession,
     Reservation,
-    Ticket
+    Ticket,
+    SeatHold,
 )
 
 
+@admin.register(AstronomyShow)
+class AstronomyShowAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if "image" in form.changed_data:
+            obj.generate_image_variants()
+
+
 admin.site.register(ShowTheme)
-admin.site.register(AstronomyShow)
 admin.site.register(PlanetariumDome)
 admin.site.register(ShowSession)
 admin.site.register(Reservation)
 admin.site.register(Ticket)
+admin.site.register(SeatHold)
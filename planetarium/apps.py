@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class PlanetariumConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'planetarium'
+
+    def ready(self):
+        import planetarium.signals  # noqa: F401
+        from planetarium_service.throttling import check_throttle_database
+
+        checks.register(check_throttle_database)
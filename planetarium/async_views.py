@@ -0,0 +1,136 @@
+"""Async read actions for DRF viewsets and async DRF views.
+
+DRF 3.14 dispatches synchronously, so under ASGI every request holds a
+thread of the sync adapter for its whole duration. ``AsyncViewSetMixin``
+dispatches routes with ``async def`` actions on the event loop instead;
+sync actions of the same route (e.g. ``create`` next to ``list``) still
+run in a thread. ``AsyncAPIViewMixin`` does the same for plain views
+with ``async def`` method handlers. Authentication, permissions and
+throttles stay synchronous, and DRF paginators run in a thread because
+they evaluate the page themselves.
+"""
+import asyncio
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.http import Http404
+from django.utils.decorators import classonlymethod
+from rest_framework.response import Response
+
+
+async def fetch(queryset):
+    """Evaluate ``queryset`` with the async ORM and return it, cached."""
+    async for _ in queryset:
+        pass
+    return queryset
+
+
+def set_prefetched(instance, name, queryset) -> None:
+    """Hand ``queryset`` to ``instance`` as if ``prefetch_related(name)``."""
+    if not hasattr(instance, "_prefetched_objects_cache"):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[name] = queryset
+
+
+class AsyncDispatchMixin:
+    async_dispatch = False
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.async_dispatch:
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """``APIView.dispatch`` awaiting async handlers."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            handler = self.http_method_not_allowed
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), handler)
+
+            if asyncio.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncAPIViewMixin(AsyncDispatchMixin):
+    # No docstring: drf-spectacular would describe the views with it.
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        if any(
+            asyncio.iscoroutinefunction(getattr(cls, method, None))
+            for method in cls.http_method_names
+        ):
+            view = super().as_view(async_dispatch=True, **initkwargs)
+            markcoroutinefunction(view)
+            return view
+        return super().as_view(**initkwargs)
+
+
+class AsyncViewSetMixin(AsyncDispatchMixin):
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        if any(
+            asyncio.iscoroutinefunction(getattr(cls, action, None))
+            for action in (actions or {}).values()
+        ):
+            view = super().as_view(actions, async_dispatch=True, **initkwargs)
+            markcoroutinefunction(view)
+            return view
+        return super().as_view(actions, **initkwargs)
+
+    async def aget_object(self):
+        """``GenericAPIView.get_object`` with the async ORM."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (queryset.model.DoesNotExist, TypeError, ValueError):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await sync_to_async(self.paginate_queryset)(queryset)
+
+
+class AsyncListModelMixin:
+    async def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        project = getattr(self.get_serializer_class(), "project", None)
+        if project is not None:
+            # See planetarium.projections: rows instead of instances.
+            queryset = project(queryset)
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(await fetch(queryset), many=True)
+        return Response(serializer.data)
+
+
+class AsyncRetrieveModelMixin:
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
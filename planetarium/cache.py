@@ -0,0 +1,136 @@
+"""Read-through response cache for catalog endpoints.
+
+Responses are cached per group (one per catalog model). Each group has a
+generation number stored in the cache and baked into every key, so a
+signal bumping the generation invalidates the whole group at once.
+The ``ETag`` of a cached response is kept with it, so a cache hit can
+also answer ``If-None-Match`` without touching the database.
+"""
+import asyncio
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from planetarium.etags import etag_matches, not_modified
+from planetarium.metrics import CATALOG_CACHE_REQUESTS
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def generation_key(group):
+    return f"catalog:{group}:generation"
+
+
+def get_generation(group):
+    return get_cache().get_or_set(generation_key(group), 1, timeout=None)
+
+
+def bump_generation(*groups):
+    cache = get_cache()
+    for group in groups:
+        try:
+            cache.incr(generation_key(group))
+        except ValueError:
+            cache.set(generation_key(group), 2, timeout=None)
+
+
+def invalidate(*groups):
+    """Invalidate cached responses now and again when the transaction ends.
+
+    The second bump drops responses cached from data read by concurrent
+    requests before this transaction was committed.
+    """
+    bump_generation(*groups)
+    transaction.on_commit(lambda: bump_generation(*groups))
+
+
+def response_cache_key(group, view, request, generation):
+    serializer_class = view.get_serializer_class()
+    version = getattr(serializer_class, "cache_version", 1)
+    query = "&".join(sorted(request.GET.urlencode().split("&")))
+    url = f"{request.build_absolute_uri(request.path)}?{query}"
+    digest = hashlib.sha256(url.encode()).hexdigest()
+    return (
+        f"catalog:{group}:{generation}:"
+        f"{serializer_class.__name__}:{version}:{digest}"
+    )
+
+
+def cached_response(group, request, cached):
+    CATALOG_CACHE_REQUESTS.inc(group=group, result="hit")
+    data, etag = cached
+    if etag and etag_matches(request, etag):
+        response = not_modified(etag)
+    else:
+        response = Response(data)
+        if etag:
+            response["ETag"] = etag
+    response["X-Cache"] = "HIT"
+    return response
+
+
+def cache_entry(response):
+    """What to cache of ``response``, or ``None`` if it is not cacheable."""
+    if response.status_code != status.HTTP_200_OK:
+        return None
+    return response.data, response.get("ETag")
+
+
+def cache_response(group):
+    """Cache successful responses of a read action in ``group``.
+
+    Works for sync and ``async def`` actions alike.
+    """
+
+    def decorator(handler):
+        if asyncio.iscoroutinefunction(handler):
+
+            @wraps(handler)
+            async def async_wrapper(self, request, *args, **kwargs):
+                cache = get_cache()
+                generation = await cache.aget_or_set(
+                    generation_key(group), 1, timeout=None
+                )
+                key = response_cache_key(group, self, request, generation)
+
+                cached = await cache.aget(key)
+                if cached is not None:
+                    return cached_response(group, request, cached)
+
+                CATALOG_CACHE_REQUESTS.inc(group=group, result="miss")
+                response = await handler(self, request, *args, **kwargs)
+                entry = cache_entry(response)
+                if entry is not None:
+                    await cache.aset(key, entry, settings.CATALOG_CACHE_TIMEOUT)
+                response["X-Cache"] = "MISS"
+                return response
+
+            return async_wrapper
+
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            cache = get_cache()
+            key = response_cache_key(group, self, request, get_generation(group))
+
+            cached = cache.get(key)
+            if cached is not None:
+                return cached_response(group, request, cached)
+
+            CATALOG_CACHE_REQUESTS.inc(group=group, result="miss")
+            response = handler(self, request, *args, **kwargs)
+            entry = cache_entry(response)
+            if entry is not None:
+                cache.set(key, entry, settings.CATALOG_CACHE_TIMEOUT)
+            response["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
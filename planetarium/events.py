@@ -0,0 +1,229 @@
+"""Live seat availability of show sessions as server-sent events.
+
+Seat changes are published once per committed change to a broker, which
+fans them out to every open stream of the show session in the process.
+The broker class is set by ``SEAT_EVENTS_BROKER``. ``LocalBroker`` only
+reaches streams served by the same process; deployments running several
+workers need a broker on a shared pub/sub (e.g. Redis) with the same
+``publish``/``subscribe`` interface.
+"""
+import asyncio
+import json
+import math
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+CLOSED = object()
+
+
+class LocalBroker:
+    """In-process pub/sub delivering messages to asyncio subscribers.
+
+    ``publish`` may be called from any thread; messages are handed to the
+    event loop of each subscriber. A subscriber that falls more than
+    ``queue_size`` messages behind is closed, and its client reconnects
+    for a fresh snapshot.
+    """
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or settings.SEAT_EVENTS_QUEUE_SIZE
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def publish(self, channel, message) -> None:
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self.deliver, queue, message)
+            except RuntimeError:
+                # The loop of a dead subscriber is closed already.
+                self.unsubscribe(channel, (loop, queue))
+
+    @staticmethod
+    def deliver(queue, message) -> None:
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(CLOSED)
+
+    def unsubscribe(self, channel, subscriber) -> None:
+        with self.lock:
+            self.subscribers[channel].discard(subscriber)
+            if not self.subscribers[channel]:
+                del self.subscribers[channel]
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        """Yield a queue receiving messages of ``channel``.
+
+        The queue gets ``CLOSED`` when the subscriber is dropped.
+        """
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        with self.lock:
+            self.subscribers[channel].add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            self.unsubscribe(channel, subscriber)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.SEAT_EVENTS_BROKER)()
+
+
+def show_session_channel(show_session_id) -> str:
+    return f"show_session:{show_session_id}"
+
+
+def publish_seat_changes(show_session_id, taken=(), released=()) -> None:
+    """Publish ``(row, seat)`` pairs taken or released once committed."""
+    message = {
+        "show_session": show_session_id,
+        "taken": sorted(taken),
+        "released": sorted(released),
+    }
+    transaction.on_commit(
+        lambda: get_broker().publish(show_session_channel(show_session_id), message)
+    )
+
+
+class ReleaseTimers:
+    """One task per show session and event loop releasing expired holds.
+
+    Nothing is written when a hold runs out, so while any stream of a
+    session is open, a task of this process calls
+    ``release_expired_holds`` whenever the next hold expires. That
+    deletes the expired holds, which publishes their seats as released,
+    and returns the expiry after that. Streams of the session share the
+    task, so an expiry costs one sweep per process however many clients
+    watch.
+    """
+
+    def __init__(self):
+        self.tasks = {}
+
+    @asynccontextmanager
+    async def watch(self, show_session_id, release_expired_holds):
+        key = (asyncio.get_running_loop(), show_session_id)
+        if key not in self.tasks:
+            task = asyncio.create_task(
+                self.run(show_session_id, release_expired_holds)
+            )
+            self.tasks[key] = [task, 0]
+        entry = self.tasks[key]
+        entry[1] += 1
+        try:
+            yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.tasks[key]
+                entry[0].cancel()
+                # Let it leave its subscription before the stream ends.
+                await asyncio.wait((entry[0],))
+
+    @staticmethod
+    async def run(show_session_id, release_expired_holds):
+        loop = asyncio.get_running_loop()
+
+        def loop_time(expires_at):
+            if expires_at is None:
+                return math.inf
+            seconds = (expires_at - timezone.now()).total_seconds()
+            return loop.time() + max(seconds, 0)
+
+        channel = show_session_channel(show_session_id)
+        while True:
+            async with get_broker().subscribe(channel) as queue:
+                release_at = loop_time(await release_expired_holds())
+                while True:
+                    timeout = release_at - loop.time()
+                    try:
+                        message = await asyncio.wait_for(
+                            queue.get(),
+                            None if timeout == math.inf else max(timeout, 0),
+                        )
+                    except asyncio.TimeoutError:
+                        release_at = loop_time(await release_expired_holds())
+                        continue
+
+                    if message is CLOSED:
+                        # Dropped by the broker; subscribe and sweep again.
+                        break
+                    if message["taken"]:
+                        # The seats may be held, until SEAT_HOLD_TTL from
+                        # now at most.
+                        release_at = min(
+                            release_at,
+                            loop_time(timezone.now() + settings.SEAT_HOLD_TTL),
+                        )
+
+
+release_timers = ReleaseTimers()
+
+
+def sse_event(event, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def snapshot_event(show_session, taken) -> str:
+    return sse_event(
+        "snapshot", {"show_session": show_session.id, "taken": sorted(taken)}
+    )
+
+
+async def seat_event_stream(show_session, get_taken_seats, release_expired_holds):
+    """Stream a snapshot of taken seats, then seat changes as they commit.
+
+    The subscription starts before the snapshot is read, so no change
+    falls between the two. A comment is sent every
+    ``SEAT_EVENTS_KEEPALIVE`` seconds to keep idle connections open, and
+    the stream ends after ``SEAT_EVENTS_MAX_AGE`` seconds so that streams
+    of vanished clients do not pile up; live clients just reconnect.
+    Seats of expiring holds are released by ``release_timers``.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.SEAT_EVENTS_MAX_AGE
+    broker = get_broker()
+
+    async with (
+        broker.subscribe(show_session_channel(show_session.id)) as queue,
+        release_timers.watch(show_session.id, release_expired_holds),
+    ):
+        yield f"retry: {settings.SEAT_EVENTS_RETRY_MS}\n"
+        yield snapshot_event(show_session, await get_taken_seats())
+
+        while True:
+            timeout = min(settings.SEAT_EVENTS_KEEPALIVE, deadline - loop.time())
+            if timeout <= 0:
+                return
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            if message is CLOSED:
+                return
+            yield sse_event("seats", message)
+
+
+def seat_snapshot_stream(show_session, taken):
+    """A one-off snapshot for servers that cannot hold streams open (WSGI).
+
+    ``retry`` makes ``EventSource`` clients reconnect, i.e. poll.
+    """
+    yield f"retry: {settings.SEAT_EVENTS_RETRY_MS}\n"
+    yield snapshot_event(show_session, taken)
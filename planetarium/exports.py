@@ -0,0 +1,112 @@
+"""Stream tickets for reconciliation as NDJSON or CSV.
+
+Rows are read with ``values_list().iterator(chunk_size=...)`` and
+rendered a chunk at a time, so memory use does not depend on how many
+tickets are exported. Under ASGI the chunks have to come from an async
+iterator, see ``async_chunks``. Both ``TicketExportView`` and the
+``export_tickets`` command are built on ``export_queryset`` and
+``EXPORT_FORMATS``.
+"""
+import csv
+import json
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from planetarium.filters import filter_schedule
+from planetarium.models import Ticket
+
+# ``(column name, Ticket lookup)`` per exported column.
+EXPORT_COLUMNS = (
+    ("ticket_id", "id"),
+    ("row", "row"),
+    ("seat", "seat"),
+    ("reservation_id", "reservation_id"),
+    ("reserved_at", "reservation__created_at"),
+    ("user_email", "reservation__user__email"),
+    ("show_session_id", "show_session_id"),
+    ("show_time", "show_session__show_time"),
+    ("astronomy_show", "show_session__astronomy_show__title"),
+    ("planetarium_dome", "show_session__planetarium_dome__name"),
+)
+EXPORT_HEADER = tuple(name for name, _ in EXPORT_COLUMNS)
+
+
+def export_queryset(query_params):
+    """Tickets filtered by ``date``, ``date_from``/``date_to`` and ``dome``.
+
+    The filters apply to the show session, see ``filter_schedule``.
+    """
+    queryset = filter_schedule(
+        Ticket.objects.all(), query_params, prefix="show_session__"
+    )
+    return queryset.order_by("id").values_list(
+        *(lookup for _, lookup in EXPORT_COLUMNS)
+    )
+
+
+def export_chunks(queryset, chunk_size=None):
+    """Lists of rows, ``chunk_size`` at a time, with ISO 8601 datetimes."""
+    chunk_size = chunk_size or settings.TICKET_EXPORT_CHUNK_SIZE
+    chunk = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(tuple(
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in row
+        ))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Echo:
+    """File-like object handing back what ``csv.writer`` writes."""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(chunks):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for chunk in chunks:
+        yield "".join(writer.writerow(row) for row in chunk)
+
+
+def ndjson_stream(chunks):
+    for chunk in chunks:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_HEADER, row))) + "\n" for row in chunk
+        )
+
+
+# Export format -> (content type, renderer of row chunks to text chunks).
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", ndjson_stream),
+    "csv": ("text/csv", csv_stream),
+}
+
+
+def stream_export(queryset, export_format, chunk_size=None):
+    """Text chunks of ``queryset`` rendered as ``export_format``."""
+    _, render = EXPORT_FORMATS[export_format]
+    return render(export_chunks(queryset, chunk_size))
+
+
+async def async_chunks(chunks):
+    """Pull ``chunks`` one at a time through ``sync_to_async``.
+
+    ``StreamingHttpResponse`` reads a sync iterator to the end before
+    sending anything under ASGI. Every ``next()`` runs in the same
+    thread, so the database cursor stays on its connection.
+    """
+    done = object()
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, done)) is not done:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
@@ -0,0 +1,65 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+
+def parse_date(query_params, name):
+    """Read an optional ``YYYY-MM-DD`` query parameter."""
+    value = query_params.get(name)
+    if not value:
+        return None
+
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValidationError({name: "Date has wrong format. Use YYYY-MM-DD."})
+
+
+def parse_id(query_params, name):
+    """Read an optional integer id query parameter."""
+    value = query_params.get(name)
+    if not value:
+        return None
+
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "A valid integer is required."})
+
+
+def start_of_day(day):
+    """Aware datetime of midnight of ``day`` in the current time zone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_schedule(queryset, query_params, prefix=""):
+    """Filter by ``date``, ``date_from``/``date_to`` and ``dome``.
+
+    Dates become half-open ``[start, end)`` ranges on the raw
+    ``show_time`` column, so an index on it can be used, unlike
+    ``show_time__date`` which casts every row. ``prefix`` is the lookup
+    path to the show session, e.g. ``"show_session__"`` for tickets.
+    """
+    date_from = parse_date(query_params, "date_from")
+    date_to = parse_date(query_params, "date_to")
+    date = parse_date(query_params, "date")
+    dome = parse_id(query_params, "dome")
+
+    if date:
+        date_from = date_to = date
+
+    if date_from:
+        queryset = queryset.filter(
+            **{f"{prefix}show_time__gte": start_of_day(date_from)}
+        )
+
+    if date_to:
+        queryset = queryset.filter(
+            **{f"{prefix}show_time__lt": start_of_day(date_to + timedelta(days=1))}
+        )
+
+    if dome:
+        queryset = queryset.filter(**{f"{prefix}planetarium_dome_id": dome})
+
+    return queryset
@@ -0,0 +1,62 @@
+"""Resized WebP and JPEG variants of show images.
+
+``render_variants`` needs nothing but Pillow, so it runs in the worker
+processes of ``get_executor()``, which are spawned without Django. The
+request only reads the upload and submits it; see
+``AstronomyShow.generate_image_variants``.
+"""
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import get_context
+
+from PIL import Image, ImageOps
+
+# Variant format -> (Pillow format, file extension).
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+}
+
+
+def image_variant_path(name, variant_format, width):
+    """``uploads/shows/x.jpg`` -> ``uploads/shows/variants/x-320w.webp``."""
+    directory, filename = os.path.split(name)
+    root, _ = os.path.splitext(filename)
+    _, extension = VARIANT_FORMATS[variant_format]
+    return os.path.join(directory, "variants", f"{root}-{width}w.{extension}")
+
+
+def render_variants(data, widths, formats, quality):
+    """Encode the image ``data`` at each of ``widths`` in each of ``formats``.
+
+    Images are not upscaled: widths above the original one collapse into
+    a single variant of the original width. Returns
+    ``[(format, width, encoded bytes)]``.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            transparent = "A" in image.getbands() or "transparency" in image.info
+            image = image.convert("RGBA" if transparent else "RGB")
+
+        variants = []
+        for width in sorted({min(width, image.width) for width in widths}):
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            for variant_format in formats:
+                pil_format, _ = VARIANT_FORMATS[variant_format]
+                frame = resized
+                if pil_format == "JPEG" and frame.mode != "RGB":
+                    frame = frame.convert("RGB")
+                encoded = io.BytesIO()
+                frame.save(encoded, pil_format, quality=quality)
+                variants.append((variant_format, width, encoded.getvalue()))
+    return variants
+
+
+@lru_cache
+def get_executor(workers):
+    """Process pool of ``workers`` processes, shared by the whole process."""
+    return ProcessPoolExecutor(workers, mp_context=get_context("spawn"))
@@ -0,0 +1,49 @@
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from planetarium.models import AstronomyShow, SHOW_IMAGE_DIRECTORY
+
+
+class Command(BaseCommand):
+    help = "Delete show images and variants that no show references."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=60,
+            help="Keep files modified in the last minutes (uploads in flight).",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        storage = AstronomyShow._meta.get_field("image").storage
+        referenced = set()
+        for show in AstronomyShow.objects.only("image", "image_variants").iterator():
+            referenced |= show.file_names()
+
+        cutoff = timezone.now() - timedelta(minutes=options["min_age"])
+        deleted = 0
+        for name in self.stored_files(storage, SHOW_IMAGE_DIRECTORY):
+            if name in referenced or storage.get_modified_time(name) > cutoff:
+                continue
+            if not options["dry_run"]:
+                storage.delete(name)
+            deleted += 1
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} orphaned files."))
+
+    def stored_files(self, storage, directory):
+        if not storage.exists(directory):
+            return
+        directories, files = storage.listdir(directory)
+        for name in files:
+            yield os.path.join(directory, name).replace("\\", "/")
+        for subdirectory in directories:
+            yield from self.stored_files(
+                storage, os.path.join(directory, subdirectory)
+            )
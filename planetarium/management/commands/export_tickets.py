@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from planetarium.exports import EXPORT_FORMATS, export_queryset, stream_export
+
+
+class Command(BaseCommand):
+    help = "Export tickets with their reservation, user and session."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=tuple(EXPORT_FORMATS), default="ndjson"
+        )
+        parser.add_argument("--date-from", help="YYYY-MM-DD, sessions on or after.")
+        parser.add_argument("--date-to", help="YYYY-MM-DD, sessions on or before.")
+        parser.add_argument("--dome", help="Planetarium dome id.")
+        parser.add_argument(
+            "--output", help="File to write to instead of standard output."
+        )
+        parser.add_argument("--chunk-size", type=int)
+
+    def handle(self, *args, **options):
+        filters = {
+            "date_from": options["date_from"],
+            "date_to": options["date_to"],
+            "dome": options["dome"],
+        }
+        try:
+            queryset = export_queryset(filters)
+        except ValidationError as error:
+            raise CommandError(error.detail)
+
+        chunks = stream_export(queryset, options["format"], options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
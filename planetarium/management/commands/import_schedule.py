@@ -0,0 +1,74 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from planetarium.schedule import read_schedule_csv
+from planetarium.serializers import (
+    ScheduleRowSerializer,
+    ScheduleRecurrenceSerializer,
+)
+
+
+class Command(BaseCommand):
+    help = "Create show sessions from a CSV/JSON file or a recurrence rule."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            help="CSV or JSON file of sessions; omit to use a recurrence rule.",
+        )
+        parser.add_argument("--show", help="Astronomy show id of the rule.")
+        parser.add_argument("--dome", help="Planetarium dome id of the rule.")
+        parser.add_argument(
+            "--weekdays", help="Comma separated, e.g. mon,wed,sat."
+        )
+        parser.add_argument("--times", help="Comma separated, e.g. 18:00,20:30.")
+        parser.add_argument("--date-from", help="YYYY-MM-DD, first day.")
+        parser.add_argument("--date-to", help="YYYY-MM-DD, last day.")
+        parser.add_argument("--batch-size", type=int)
+
+    def handle(self, *args, **options):
+        if options["path"]:
+            rows = self.read_rows(options["path"])
+        else:
+            rows = self.recurrence_rows(options)
+
+        result = ScheduleRowSerializer.import_rows(rows, options["batch_size"])
+        for error in result["errors"]:
+            self.stderr.write(f"Row {error['index']}: {dict(error['errors'])}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(result['created'])} show sessions, "
+                f"{len(result['errors'])} rows rejected."
+            )
+        )
+
+    @staticmethod
+    def read_rows(path):
+        try:
+            with open(path, newline="") as schedule:
+                if path.endswith(".json"):
+                    rows = json.load(schedule)
+                else:
+                    rows = read_schedule_csv(schedule)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Cannot read {path}: {error}")
+
+        if not isinstance(rows, list):
+            raise CommandError("A JSON schedule must be a list of sessions.")
+        return rows
+
+    @staticmethod
+    def recurrence_rows(options):
+        rule = ScheduleRecurrenceSerializer(data={
+            "astronomy_show": options["show"],
+            "planetarium_dome": options["dome"],
+            "weekdays": (options["weekdays"] or "").split(","),
+            "times": (options["times"] or "").split(","),
+            "date_from": options["date_from"],
+            "date_to": options["date_to"],
+        })
+        if not rule.is_valid():
+            raise CommandError(json.dumps(rule.errors))
+        return rule.sessions()
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from planetarium.models import ShowSession
+
+
+class Command(BaseCommand):
+    help = "Recount ShowSession.tickets_sold from the tickets table."
+
+    def handle(self, *args, **options):
+        fixed = ShowSession.objects.reconcile_tickets_sold()
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled {fixed} show sessions.")
+        )
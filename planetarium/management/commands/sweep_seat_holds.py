@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from planetarium.models import SeatHold
+
+
+class Command(BaseCommand):
+    help = "Delete expired seat holds in bulk."
+
+    def handle(self, *args, **options):
+        deleted = SeatHold.sweep_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired rows."))
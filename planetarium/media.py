@@ -0,0 +1,169 @@
+"""Serve uploaded media files.
+
+``serve_media`` is meant to serve ``MEDIA_ROOT`` in production when no
+web server or CDN sits in front of it:
+
+* bodies are ``FileResponse`` objects backed by the open file, which
+  WSGI servers with ``wsgi.file_wrapper`` (gunicorn) send with
+  ``sendfile()``, byte ranges included;
+* ``ETag``/``Last-Modified`` validators answer conditional requests with
+  304 (or 412), and a single ``Range`` is answered with 206;
+* content-hashed names (planetarium/storage.py) are cached for a year,
+  others for ``MEDIA_CACHE_MAX_AGE`` seconds.
+"""
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FileRange:
+    """``length`` bytes of an open file from ``start``.
+
+    It keeps ``fileno()``, so a server can still ``sendfile()`` the range:
+    gunicorn sends ``Content-Length`` bytes from the current position.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def is_hashed(name):
+    storage_is_hashed = getattr(default_storage, "is_hashed", None)
+    return storage_is_hashed is not None and storage_is_hashed(name)
+
+
+def media_etag(name, stat_result):
+    """Strong ETag: the content hash of hashed names, else mtime and size."""
+    if is_hashed(name):
+        root, _ = os.path.splitext(os.path.basename(name))
+        return f'"{root}"'
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def cache_control(name):
+    storage_cache_control = getattr(default_storage, "cache_control", None)
+    if storage_cache_control is not None:
+        value = storage_cache_control(name)
+        if value:
+            return value
+    return f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+
+
+def requested_range(request, size, etag, last_modified):
+    """``(start, end)`` of the requested single byte range, or ``None``.
+
+    ``None`` means the whole file: there is no valid single range, or
+    ``If-Range`` does not match. Raises ``ValueError`` when the range is
+    not satisfiable.
+    """
+    match = RANGE.match(request.headers.get("Range", "").replace(" ", ""))
+    if match is None:
+        return None
+
+    if_range = request.headers.get("If-Range")
+    if if_range is not None and if_range != etag:
+        if parse_http_date_safe(if_range) != int(last_modified):
+            return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= size:
+            raise ValueError("Range not satisfiable.")
+        return start, min(int(last), size - 1) if last else size - 1
+    if last:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("Range not satisfiable.")
+        return max(size - suffix, 0), size - 1
+    return None
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve the stored file ``path`` of the default storage."""
+    name = path.replace("\\", "/")
+    if any(part.startswith(".") for part in name.split("/")):
+        # Dot files include the temporary files of uploads in progress.
+        raise Http404
+    try:
+        full_path = default_storage.path(name)
+        stat_result = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404
+
+    size = stat_result.st_size
+    last_modified = stat_result.st_mtime
+    etag = media_etag(name, stat_result)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": cache_control(name),
+        "Accept-Ranges": "bytes",
+    }
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified)
+    )
+    if response is not None:
+        for header, value in headers.items():
+            response.headers.setdefault(header, value)
+        return response
+
+    try:
+        byte_range = requested_range(request, size, etag, last_modified)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    content_type, encoding = mimetypes.guess_type(name)
+    content_type = content_type or "application/octet-stream"
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type)
+    else:
+        file = open(full_path, "rb")
+        body = file if byte_range is None else FileRange(file, start, length)
+        response = FileResponse(body, content_type=content_type)
+    if byte_range is not None:
+        response.status_code = 206
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(length)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    for header, value in headers.items():
+        response[header] = value
+    return response
@@ -0,0 +1,19 @@
+"""Booking and cache counters, served with the request metrics on /metrics."""
+from planetarium_service.metrics import Counter
+
+RESERVATIONS_CREATED = Counter(
+    "planetarium_reservations_created_total",
+    "Reservations committed.",
+)
+SEAT_CONFLICTS = Counter(
+    "planetarium_seat_conflicts_total",
+    "Seats refused to a booking: sold, held, repeated in the request, or"
+    " taken by a concurrent booking (race).",
+    ("reason",),
+)
+CATALOG_CACHE_REQUESTS = Counter(
+    "planetarium_catalog_cache_requests_total",
+    "Catalog responses looked up in the response cache, by group and"
+    " result (hit or miss).",
+    ("group", "result"),
+)
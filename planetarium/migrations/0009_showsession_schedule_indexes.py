@@ -0,0 +1,26 @@
+# Generated by Django 4.2.4 on 2026-10-18 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0008_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="showsession",
+            index=models.Index(
+                fields=["show_time", "planetarium_dome"],
+                name="planetarium_show_ti_c373a8_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="showsession",
+            index=models.Index(
+                fields=["astronomy_show", "show_time"],
+                name="planetarium_astrono_7e5570_idx",
+            ),
+        ),
+    ]
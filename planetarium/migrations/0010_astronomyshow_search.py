@@ -0,0 +1,90 @@
+# Generated by Django 4.2.4 on 2026-10-18 03:52
+
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE planetarium_astronomyshow_fts USING fts5(
+        title,
+        description,
+        content='planetarium_astronomyshow',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER planetarium_astronomyshow_fts_insert
+    AFTER INSERT ON planetarium_astronomyshow BEGIN
+        INSERT INTO planetarium_astronomyshow_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER planetarium_astronomyshow_fts_delete
+    AFTER DELETE ON planetarium_astronomyshow BEGIN
+        INSERT INTO planetarium_astronomyshow_fts(
+            planetarium_astronomyshow_fts, rowid, title, description
+        )
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER planetarium_astronomyshow_fts_update
+    AFTER UPDATE OF title, description ON planetarium_astronomyshow BEGIN
+        INSERT INTO planetarium_astronomyshow_fts(
+            planetarium_astronomyshow_fts, rowid, title, description
+        )
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO planetarium_astronomyshow_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    INSERT INTO planetarium_astronomyshow_fts(planetarium_astronomyshow_fts)
+    VALUES ('rebuild')
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS planetarium_astronomyshow_fts_update",
+    "DROP TRIGGER IF EXISTS planetarium_astronomyshow_fts_delete",
+    "DROP TRIGGER IF EXISTS planetarium_astronomyshow_fts_insert",
+    "DROP TABLE IF EXISTS planetarium_astronomyshow_fts",
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX planetarium_astronomyshow_fts
+    ON planetarium_astronomyshow
+    USING GIN (to_tsvector('english', "title" || ' ' || "description"))
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS planetarium_astronomyshow_fts",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0009_showsession_schedule_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(
+                {"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}
+            ),
+            run_for_vendor(
+                {"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRES_BACKWARD}
+            ),
+        ),
+    ]
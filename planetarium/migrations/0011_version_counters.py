@@ -0,0 +1,48 @@
+# Generated by Django 4.2.4 on 2026-10-18 03:58
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_migration = import_module("planetarium.migrations.0010_astronomyshow_search")
+
+# SQLite adds columns by rebuilding the table, which drops the FTS triggers
+# of 0010, so they are recreated after the rebuild in both directions.
+SQLITE_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS planetarium_astronomyshow_fts_update",
+    "DROP TRIGGER IF EXISTS planetarium_astronomyshow_fts_delete",
+    "DROP TRIGGER IF EXISTS planetarium_astronomyshow_fts_insert",
+    *search_migration.SQLITE_FORWARD[1:],
+]
+recreate_search_triggers = search_migration.run_for_vendor({"sqlite": SQLITE_TRIGGERS})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0010_astronomyshow_search"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, recreate_search_triggers),
+        migrations.AddField(
+            model_name="astronomyshow",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name="planetariumdome",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name="showsession",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name="showtheme",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(recreate_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.4 on 2026-10-18 05:02
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+version_migration = import_module("planetarium.migrations.0011_version_counters")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0011_version_counters"),
+    ]
+
+    # Adding the column rebuilds the table on SQLite, see 0011.
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop, version_migration.recreate_search_triggers
+        ),
+        migrations.AddField(
+            model_name="astronomyshow",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(
+            version_migration.recreate_search_triggers, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.4 on 2026-10-18 05:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0012_astronomyshow_image_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="astronomyshow",
+            name="themes",
+            field=models.ManyToManyField(
+                related_name="astronomy_show", to="planetarium.showtheme"
+            ),
+        ),
+    ]
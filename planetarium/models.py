@@ -1,37 +1,201 @@
+import logging
 import os
+import threading
 import uuid
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from functools import partial
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.files.base import ContentFile
+from django.db import (
+    IntegrityError,
+    close_old_connections,
+    connections,
+    models,
+    transaction,
+)
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.expressions import CombinedExpression
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.utils import timezone
 from django.utils.text import slugify
 
+from planetarium.events import publish_seat_changes
+from planetarium.images import (
+    get_executor as get_image_executor,
+    image_variant_path,
+    render_variants,
+)
 
-class ShowTheme(models.Model):
+logger = logging.getLogger(__name__)
+
+
+class VersionedModel(models.Model):
+    """Model with a ``version`` bumped on every edit, used for ETags."""
+
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version = F("version") + 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "version"}
+
+        super().save(*args, **kwargs)
+
+        if isinstance(self.version, CombinedExpression):
+            self.refresh_from_db(fields=["version"])
+
+    @classmethod
+    def bump_versions(cls, **filters) -> None:
+        cls.objects.filter(**filters).update(version=F("version") + 1)
+
+
+class ShowTheme(VersionedModel):
     name = models.CharField(max_length=63)
 
     def __str__(self):
         return self.name
 
 
+SHOW_IMAGE_DIRECTORY = os.path.join("uploads", "shows")
+
+
 def movie_image_file_path(instance, filename):
     _, extension = os.path.splitext(filename)
     filename = f"{slugify(instance.title)}-{uuid.uuid4()}{extension}"
 
-    return os.path.join("uploads", "shows", filename)
+    return os.path.join(SHOW_IMAGE_DIRECTORY, filename)
 
 
-class AstronomyShow(models.Model):
+class AstronomyShow(VersionedModel):
     title = models.CharField(max_length=63)
     themes = models.ManyToManyField(ShowTheme, related_name="astronomy_show")
     description = models.TextField()
     image = models.ImageField(null=True, upload_to=movie_image_file_path)
+    # {format: {width: stored file name}}, see generate_image_variants().
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.title
 
+    def generate_image_variants(self) -> None:
+        """Render resized variants of ``image`` outside of the request.
+
+        Once the transaction commits, the image is handed to the
+        ``SHOW_IMAGE_WORKERS`` process pool, or rendered right away when
+        that is 0. The variants replace ``image_variants`` when ready.
+        """
+        pk, name = self.pk, self.image.name
+        if not name:
+            return
+
+        def submit():
+            with self.image.open("rb") as image:
+                data = image.read()
+            render = partial(
+                render_variants,
+                data,
+                settings.SHOW_IMAGE_VARIANT_WIDTHS,
+                settings.SHOW_IMAGE_VARIANT_FORMATS,
+                settings.SHOW_IMAGE_VARIANT_QUALITY,
+            )
+            if not settings.SHOW_IMAGE_WORKERS:
+                AstronomyShow.save_image_variants(pk, name, render())
+                return
+
+            def done(future):
+                try:
+                    AstronomyShow.save_image_variants(pk, name, future.result())
+                except Exception:
+                    logger.exception("Rendering variants of %s failed.", name)
+                finally:
+                    close_old_connections()
+
+            get_image_executor(settings.SHOW_IMAGE_WORKERS).submit(
+                render
+            ).add_done_callback(done)
+
+        transaction.on_commit(submit)
+
+    @classmethod
+    def save_image_variants(cls, pk, image_name, variants) -> None:
+        """Store rendered ``variants`` of ``image_name`` for show ``pk``.
+
+        Variants of an image that was replaced in the meantime are
+        dropped, and the files of the variants being replaced deleted.
+        """
+        storage = cls._meta.get_field("image").storage
+        stored = defaultdict(dict)
+        for variant_format, width, data in variants:
+            stored[variant_format][str(width)] = storage.save(
+                image_variant_path(image_name, variant_format, width),
+                ContentFile(data),
+            )
+
+        show = cls.objects.filter(pk=pk, image=image_name).first()
+        if show is None:
+            cls.release_files(cls.variant_names(stored))
+        else:
+            # The replaced variants are released by the post_save signal.
+            show.image_variants = dict(stored)
+            show.save(update_fields=["image_variants"])
+
+    @staticmethod
+    def variant_names(image_variants) -> set:
+        return {
+            name for names in image_variants.values() for name in names.values()
+        }
+
+    def file_names(self) -> set:
+        """Stored files the show references: its image and the variants."""
+        names = self.variant_names(self.image_variants)
+        if self.image:
+            names.add(self.image.name)
+        return names
+
+    @classmethod
+    def release_files(cls, names) -> None:
+        """Delete the files of ``names`` no show references any more.
+
+        Files are shared by content (see planetarium/storage.py), so the
+        references are counted in the database once the transaction
+        commits, and a file is deleted only when none is left.
+        """
+        names = set(names)
+        if not names:
+            return
+
+        def delete_unreferenced():
+            storage = cls._meta.get_field("image").storage
+            variants = Cast("image_variants", models.TextField())
+            for name in names:
+                referenced = cls.objects.alias(variants_text=variants).filter(
+                    Q(image=name) | Q(variants_text__contains=f'"{name}"')
+                )
+                if not referenced.exists():
+                    storage.delete(name)
+
+        transaction.on_commit(delete_unreferenced)
+
 
-class PlanetariumDome(models.Model):
+class PlanetariumDome(VersionedModel):
     name = models.CharField(max_length=63)
     rows = models.IntegerField()
     seats_in_row = models.IntegerField()
@@ -45,7 +209,66 @@ class PlanetariumDome(models.Model):
         return self.name
 
 
-class ShowSession(models.Model):
+class ShowSessionQuerySet(models.QuerySet):
+    def with_tickets_available(self):
+        """Annotate free seats, counting actively held seats as taken."""
+        held_seats = (
+            HeldSeat.objects.active()
+            .filter(show_session=OuterRef("pk"))
+            .order_by()
+            .values("show_session")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return self.annotate(
+            tickets_available=(
+                F("planetarium_dome__rows") * F("planetarium_dome__seats_in_row")
+                - F("tickets_sold")
+                - Coalesce(Subquery(held_seats), 0)
+            )
+        )
+
+    def reconcile_tickets_sold(self) -> int:
+        """Reset ``tickets_sold`` from the tickets table where it drifted."""
+        tickets_count = Coalesce(
+            Subquery(
+                Ticket.objects.filter(show_session=OuterRef("pk"))
+                .order_by()
+                .values("show_session")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            0,
+        )
+        drifted = self.annotate(
+            tickets_count=tickets_count
+        ).exclude(tickets_sold=F("tickets_count"))
+        return self.filter(
+            pk__in=drifted.values("pk")
+        ).update(tickets_sold=tickets_count)
+
+    def add_tickets_sold(self, counts) -> None:
+        """Atomically add ``{show_session_id: tickets}`` to ``tickets_sold``.
+
+        All sessions are updated by one UPDATE, picking each count with
+        ``CASE``. Their versions are bumped too, so that ETags change with
+        the sold seats, even when a drifted counter would go below zero
+        and stays at zero instead.
+        """
+        counts = {pk: count for pk, count in counts.items() if count}
+        if not counts:
+            return
+        added = Case(
+            *(When(pk=pk, then=Value(count)) for pk, count in sorted(counts.items())),
+            default=Value(0),
+        )
+        self.filter(pk__in=counts).update(
+            tickets_sold=Greatest(F("tickets_sold") + added, 0),
+            version=F("version") + 1,
+        )
+
+
+class ShowSession(VersionedModel):
     astronomy_show = models.ForeignKey(
         AstronomyShow, on_delete=models.CASCADE, related_name="shows"
     )
@@ -53,12 +276,81 @@ class ShowSession(models.Model):
         PlanetariumDome, on_delete=models.CASCADE, related_name="shows"
     )
     show_time = models.DateTimeField()
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ShowSessionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["show_time", "id"]),
+            models.Index(fields=["show_time", "planetarium_dome"]),
+            models.Index(fields=["astronomy_show", "show_time"]),
+        ]
 
     def __str__(self):
         return (
             f"Astronomy Show: {self.astronomy_show} | " f"Show time: {self.show_time}"
         )
 
+    @staticmethod
+    def find_slot_conflicts(slots):
+        """Return which ``(planetarium_dome_id, show_time)`` overlap a session.
+
+        A session occupies its dome for ``SHOW_SESSION_SLOT``. Sessions
+        around the slots are read in a single query bounded per dome and
+        compared in Python.
+        """
+        slots = set(slots)
+        if not slots:
+            return set()
+
+        length = settings.SHOW_SESSION_SLOT
+        bounds = {}
+        for dome_id, show_time in slots:
+            low, high = bounds.get(dome_id, (show_time, show_time))
+            bounds[dome_id] = (min(low, show_time), max(high, show_time))
+
+        around = Q()
+        for dome_id, (low, high) in bounds.items():
+            around |= Q(
+                planetarium_dome_id=dome_id,
+                show_time__gt=low - length,
+                show_time__lt=high + length,
+            )
+        booked = defaultdict(list)
+        for dome_id, show_time in ShowSession.objects.filter(around).order_by(
+            "show_time"
+        ).values_list("planetarium_dome_id", "show_time"):
+            booked[dome_id].append(show_time)
+
+        conflicts = set()
+        for dome_id, show_time in slots:
+            times = booked[dome_id]
+            index = bisect_left(times, show_time)
+            if (
+                index < len(times) and times[index] - show_time < length
+            ) or (index > 0 and show_time - times[index - 1] < length):
+                conflicts.add((dome_id, show_time))
+        return conflicts
+
+    def taken_seats(self) -> list:
+        """Sold and actively held ``(row, seat)`` pairs of the session."""
+        return [
+            *self.tickets.order_by().values_list("row", "seat"),
+            *HeldSeat.objects.active()
+            .filter(show_session=self)
+            .order_by()
+            .values_list("row", "seat"),
+        ]
+
+    def release_expired_holds(self):
+        """Delete expired holds of the session; return the next expiry.
+
+        The sweep publishes the seats of the deleted holds as released.
+        """
+        SeatHold.sweep_expired(show_session=self)
+        return self.holds.aggregate(next_expiry=Min("expires_at"))["next_expiry"]
+
 
 class Reservation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -69,6 +361,89 @@ class Reservation(models.Model):
 
     class Meta:
         ordering = ("created_at",)
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"]),
+        ]
+
+    @classmethod
+    def create_with_tickets(cls, tickets_data, **fields):
+        """Create a reservation and insert all its tickets in one batch.
+
+        Tickets are expected to be validated already (see
+        ``TicketBatchSerializer``), so ``Ticket.save`` and its per-row
+        ``full_clean`` are bypassed. Seats held since then are checked
+        again once the counter update has locked the sessions, which a new
+        hold locks too, and raise ``IntegrityError`` like seats sold since.
+        """
+        with transaction.atomic():
+            reservation = cls.objects.create(**fields)
+            tickets = Ticket.objects.bulk_create(
+                Ticket(reservation=reservation, **ticket_data)
+                for ticket_data in tickets_data
+            )
+            ShowSession.objects.add_tickets_sold(
+                Counter(ticket.show_session_id for ticket in tickets)
+            )
+            held = HeldSeat.find_held_seats(
+                (ticket.show_session_id, ticket.row, ticket.seat)
+                for ticket in tickets
+            )
+            if held:
+                raise IntegrityError(f"Seats held by another customer: {held}")
+
+            taken = defaultdict(list)
+            for ticket in tickets:
+                taken[ticket.show_session_id].append((ticket.row, ticket.seat))
+            for show_session_id, seats in taken.items():
+                publish_seat_changes(show_session_id, taken=seats)
+        return reservation
+
+
+class DeletedTickets(threading.local):
+    """Tickets deleted by one ``delete()`` call, summed by show session.
+
+    ``post_delete`` is sent for each ticket of a deleted reservation, user
+    or queryset; the counters are updated in one UPDATE and the released
+    seats published once per session when the call is done: when it
+    deletes what the tickets cascade from, which comes after them, or when
+    ``Ticket.delete()`` or ``TicketQuerySet.delete()`` returns.
+    """
+
+    def __init__(self):
+        self.origin = None
+        self.released = defaultdict(list)
+
+    def add(self, origin, ticket) -> None:
+        if origin is not self.origin:
+            # Left by a delete() that failed, and was rolled back.
+            self.__init__()
+            self.origin = origin
+        self.released[ticket.show_session_id].append((ticket.row, ticket.seat))
+
+    def flush(self, origin) -> None:
+        if origin is not self.origin:
+            return
+        released = self.released
+        self.__init__()
+        ShowSession.objects.add_tickets_sold(
+            {pk: -len(seats) for pk, seats in released.items()}
+        )
+        for show_session_id, seats in released.items():
+            publish_seat_changes(show_session_id, released=seats)
+
+
+deleted_tickets = DeletedTickets()
+
+
+class TicketQuerySet(models.QuerySet):
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            result = super().delete()
+            deleted_tickets.flush(self)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
 
 
 class Ticket(models.Model):
@@ -81,6 +456,8 @@ class Ticket(models.Model):
         Reservation, on_delete=models.CASCADE, related_name="tickets"
     )
 
+    objects = TicketQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.show_session} | Row: {self.row} | Seat: {self.seat}"
 
@@ -105,6 +482,25 @@ class Ticket(models.Model):
                     }
                 )
 
+    @staticmethod
+    def find_taken_seats(seats):
+        """Return which of the ``(show_session_id, row, seat)`` are sold.
+
+        Runs a single query narrowed by the unique index columns and
+        intersects the result in Python.
+        """
+        seats = set(seats)
+        if not seats:
+            return set()
+
+        session_ids, rows, seat_numbers = zip(*seats)
+        taken = Ticket.objects.filter(
+            show_session_id__in=set(session_ids),
+            row__in=set(rows),
+            seat__in=set(seat_numbers),
+        ).order_by().values_list("show_session_id", "row", "seat")
+        return seats.intersection(taken)
+
     def clean(self):
         Ticket.validate_ticket(
             self.row,
@@ -127,3 +523,121 @@ class Ticket(models.Model):
             using=None,
             update_fields=None,
         )
+
+    def delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=using, savepoint=False):
+            result = super().delete(using=using, keep_parents=keep_parents)
+            deleted_tickets.flush(self)
+        return result
+
+
+class SeatHold(models.Model):
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    show_session = models.ForeignKey(
+        ShowSession, on_delete=models.CASCADE, related_name="holds"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.show_session} | Hold: {self.token} | {self.expires_at}"
+
+    class Meta:
+        ordering = ("created_at",)
+
+    @staticmethod
+    def sweep_expired(**filters) -> int:
+        """Delete expired holds and their seats in bulk; return the rows.
+
+        Seats are deleted with ``RETURNING``, so only the rows this sweep
+        removed are published as released, and versions bumped, once per
+        show session, even when sweeps of several processes overlap.
+        """
+        holds = SeatHold.objects.filter(
+            expires_at__lte=timezone.now(), **filters
+        ).order_by()
+        holds_sql, params = holds.values("pk").query.sql_with_params()
+        connection = connections[holds.db]
+        quote = connection.ops.quote_name
+
+        released = defaultdict(list)
+        with transaction.atomic(using=holds.db), connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {quote(HeldSeat._meta.db_table)}"
+                f" WHERE {quote('hold_id')} IN ({holds_sql})"
+                f" RETURNING {quote('show_session_id')}, {quote('row')},"
+                f" {quote('seat')}",
+                params,
+            )
+            for show_session_id, row, seat in cursor.fetchall():
+                released[show_session_id].append((row, seat))
+            cursor.execute(
+                f"DELETE FROM {quote(SeatHold._meta.db_table)}"
+                f" WHERE {quote('id')} IN ({holds_sql})",
+                params,
+            )
+            deleted = cursor.rowcount
+
+            if released:
+                ShowSession.bump_versions(pk__in=released)
+            for show_session_id, seats in released.items():
+                publish_seat_changes(show_session_id, released=seats)
+        return deleted + sum(len(seats) for seats in released.values())
+
+    def confirm(self) -> Reservation:
+        """Turn the held seats into tickets of a new reservation."""
+        with transaction.atomic():
+            tickets_data = [
+                {"show_session_id": self.show_session_id, "row": row, "seat": seat}
+                for row, seat in self.seats.values_list("row", "seat")
+            ]
+            self.delete()
+            return Reservation.create_with_tickets(tickets_data, user=self.user)
+
+
+class HeldSeatQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(hold__expires_at__gt=timezone.now())
+
+
+class HeldSeat(models.Model):
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    show_session = models.ForeignKey(
+        ShowSession, on_delete=models.CASCADE, related_name="held_seats"
+    )
+    hold = models.ForeignKey(
+        SeatHold, on_delete=models.CASCADE, related_name="seats"
+    )
+
+    objects = HeldSeatQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.show_session} | Row: {self.row} | Seat: {self.seat}"
+
+    class Meta:
+        unique_together = ("show_session", "row", "seat")
+        ordering = ("row", "seat")
+
+    @staticmethod
+    def find_held_seats(seats, exclude_hold=None):
+        """Return which of the ``(show_session_id, row, seat)`` are held.
+
+        Only active holds count; seats of ``exclude_hold`` are ignored.
+        """
+        seats = set(seats)
+        if not seats:
+            return set()
+
+        session_ids, rows, seat_numbers = zip(*seats)
+        held = HeldSeat.objects.active().filter(
+            show_session_id__in=set(session_ids),
+            row__in=set(rows),
+            seat__in=set(seat_numbers),
+        ).order_by()
+        if exclude_hold is not None:
+            held = held.exclude(hold=exclude_hold)
+        return seats.intersection(
+            held.values_list("show_session_id", "row", "seat")
+        )
@@ -1,5 +1,21 @@
+from django.conf import settings
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from user.tokens import staff_claim
+
+
+def is_staff(request):
+    """``is_staff`` claim of the access token when trusted, else of the user.
+
+    Trusting the claim lets a demoted user keep staff rights until the
+    access token expires.
+    """
+    if settings.TRUST_STAFF_CLAIM:
+        claim = staff_claim(request.auth)
+        if claim is not None:
+            return claim
+    return bool(request.user and request.user.is_staff)
+
 
 class IsAdminOrAuthenticatedOrReadOnly(BasePermission):
 
@@ -10,5 +26,5 @@ class IsAdminOrAuthenticatedOrReadOnly(BasePermission):
                 request.user and
                 request.user.is_authenticated
             )
-            or (request.user and request.user.is_staff)
+            or is_staff(request)
         )
@@ -0,0 +1,182 @@
+"""Build list responses straight from ``.values()`` rows.
+
+A serializer with ``ProjectionMixin`` and ``ProjectionListSerializer``
+keeps its declared fields, and so its output and its schema, but a list
+view can hand it rows of ``Serializer.project(queryset)`` instead of
+model instances. Each field then becomes a column: related attributes
+are joined, ``many`` slug fields are aggregated into a JSON array by a
+subquery, and only values that need formatting (dates, file URLs) go
+through a converter.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.db.models import Aggregate, JSONField, OuterRef, Subquery
+from rest_framework import serializers
+
+from planetarium_service.metrics import TimedSerializerMixin
+
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.SlugRelatedField,
+)
+UNPROJECTABLE_FIELDS = (
+    serializers.BaseSerializer,
+    serializers.ListField,
+    serializers.SerializerMethodField,
+)
+
+
+class JSONArrayAgg(Aggregate):
+    """Aggregate values into a JSON array."""
+
+    function = "JSON_ARRAYAGG"
+    output_field = JSONField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, function="JSON_GROUP_ARRAY", **extra_context
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, function="JSONB_AGG", **extra_context)
+
+
+def lookup_path(source):
+    return source.replace(".", "__")
+
+
+def model_field(model, path):
+    """The model field at the end of a ``__`` lookup path."""
+    *relations, name = path.split("__")
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+def many_slugs_subquery(model, field):
+    """JSON array of ``slug_field`` of the objects in a to-many relation."""
+    relation = model._meta.get_field(field.source)
+    related_model = relation.related_model
+    if relation.many_to_many and not relation.auto_created:
+        back = relation.related_query_name()
+    else:
+        back = relation.field.name
+
+    return Subquery(
+        related_model.objects.filter(**{back: OuterRef("pk")})
+        .order_by()
+        .values(back)
+        .annotate(slugs=JSONArrayAgg(field.child_relation.slug_field))
+        .values("slugs")
+    )
+
+
+def empty_list_for_none(value):
+    return [] if value is None else value
+
+
+def none_or(convert):
+    return lambda value: None if value is None else convert(value)
+
+
+def file_converter(field, storage):
+    """``FileField.to_representation`` for a stored file name."""
+    request = field.context.get("request")
+    use_url = getattr(field, "use_url", True)
+
+    def convert(name):
+        if not name:
+            return None
+        if not use_url:
+            return name
+        url = storage.url(name)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+    return convert
+
+
+class ProjectionMixin:
+    """Serializer whose fields can be read from ``project()`` rows."""
+
+    @classmethod
+    def projected_columns(cls, model):
+        """``(field name, values() key, expression or None)`` per field."""
+        columns = []
+        for name, field in cls().fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ManyRelatedField) and isinstance(
+                field.child_relation, serializers.SlugRelatedField
+            ):
+                key = f"projected_{name}"
+                columns.append((name, key, many_slugs_subquery(model, field)))
+            elif isinstance(field, serializers.SlugRelatedField):
+                key = f"{lookup_path(field.source)}__{field.slug_field}"
+                columns.append((name, key, None))
+            elif isinstance(field, UNPROJECTABLE_FIELDS) or field.source == "*":
+                raise ImproperlyConfigured(
+                    f"{cls.__name__}.{name} cannot be projected from values()."
+                )
+            else:
+                columns.append((name, lookup_path(field.source), None))
+        return columns
+
+    @classmethod
+    def project(cls, queryset, *extra):
+        """Rows of ``queryset`` with the columns the serializer reads.
+
+        ``extra`` lookups are selected as well, e.g. the columns of a
+        joined to-many relation.
+        """
+        columns = cls.projected_columns(queryset.model)
+        return queryset.prefetch_related(None).values(
+            *(key for _, key, expression in columns if expression is None),
+            *extra,
+            **{
+                key: expression
+                for _, key, expression in columns
+                if expression is not None
+            },
+        )
+
+
+class ProjectionListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """List serializer taking ``project()`` rows as well as instances."""
+
+    def converters(self):
+        """``(field name, values() key, converter or None)`` per field."""
+        model = self.child.Meta.model
+        converters = []
+        for name, key, expression in self.child.projected_columns(model):
+            field = self.child.fields[name]
+            if expression is not None:
+                convert = empty_list_for_none
+            elif isinstance(field, serializers.FileField):
+                convert = file_converter(field, model_field(model, key).storage)
+            elif isinstance(field, PASSTHROUGH_FIELDS):
+                convert = None
+            else:
+                convert = none_or(field.to_representation)
+            converters.append((name, key, convert))
+        return converters
+
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        rows = list(data)
+        if not rows or not isinstance(rows[0], dict):
+            return super().to_representation(rows)
+
+        converters = self.converters()
+        return [
+            {
+                name: row[key] if convert is None else convert(row[key])
+                for name, key, convert in converters
+            }
+            for row in rows
+        ]
@@ -0,0 +1,63 @@
+"""Read show session schedules from CSV and recurrence rules.
+
+Rows are ``{"astronomy_show", "planetarium_dome", "show_time"}`` dicts,
+imported by ``ScheduleRowSerializer.import_rows``.
+"""
+import codecs
+import csv
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+SCHEDULE_COLUMNS = ("astronomy_show", "planetarium_dome", "show_time")
+
+
+def expand_recurrence(
+    astronomy_show, planetarium_dome, weekdays, times, date_from, date_to
+):
+    """Schedule rows at ``times`` on ``weekdays`` from ``date_from`` to ``date_to``.
+
+    Times are in the current time zone; both dates are included.
+    """
+    weekday_numbers = {WEEKDAYS.index(weekday) for weekday in weekdays}
+    rows = []
+    day = date_from
+    while day <= date_to:
+        if day.weekday() in weekday_numbers:
+            for time in sorted(set(times)):
+                rows.append({
+                    "astronomy_show": astronomy_show,
+                    "planetarium_dome": planetarium_dome,
+                    "show_time": timezone.make_aware(datetime.combine(day, time)),
+                })
+        day += timedelta(days=1)
+    return rows
+
+
+def read_schedule_csv(lines):
+    """Schedule rows of CSV ``lines`` with a header naming the columns."""
+    reader = csv.DictReader(lines)
+    missing = set(SCHEDULE_COLUMNS) - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(sorted(missing))}.")
+    return [
+        {column: row[column] for column in SCHEDULE_COLUMNS} for row in reader
+    ]
+
+
+class ScheduleCSVParser(BaseParser):
+    """Parse a ``text/csv`` request body into schedule rows."""
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            return read_schedule_csv(codecs.iterdecode(stream, encoding))
+        except (ValueError, csv.Error) as error:
+            raise ParseError(f"CSV parse error - {error}")
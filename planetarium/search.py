@@ -0,0 +1,135 @@
+"""Full-text search over astronomy show titles and descriptions.
+
+SQLite uses the FTS5 table ``planetarium_astronomyshow_fts`` kept in sync
+with ``planetarium_astronomyshow`` by triggers. PostgreSQL uses GIN
+indexes on the ``to_tsvector`` expressions below, which need no syncing.
+Other backends fall back to ``icontains``. See migration 0010.
+"""
+import re
+from importlib import import_module
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+SQLITE_FTS_TABLE = "planetarium_astronomyshow_fts"
+SQLITE_FTS_TRIGGERS = (
+    "planetarium_astronomyshow_fts_insert",
+    "planetarium_astronomyshow_fts_delete",
+    "planetarium_astronomyshow_fts_update",
+)
+SEARCH_CONFIG = "english"
+SEARCH_FIELDS = ("title", "description")
+
+
+def search_terms(text: str) -> list:
+    """Split user input into plain word terms, dropping query syntax."""
+    return re.findall(r"\w+", text)
+
+
+def restore_sqlite_triggers(connection):
+    """Recreate the FTS sync triggers if a table rebuild dropped them.
+
+    SQLite alters most columns by copying the table, which drops its
+    triggers. The index is rebuilt too, since rows written without the
+    triggers are missing from it. Returns whether anything was restored.
+    """
+    if connection.vendor != "sqlite":
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            (SQLITE_FTS_TABLE, *SQLITE_FTS_TRIGGERS),
+        )
+        names = {name for name, in cursor.fetchall()}
+        if SQLITE_FTS_TABLE not in names or names.issuperset(SQLITE_FTS_TRIGGERS):
+            return False
+
+        migration = import_module("planetarium.migrations.0011_version_counters")
+        for statement in migration.SQLITE_TRIGGERS:
+            cursor.execute(statement)
+    return True
+
+
+def _sqlite_search(queryset, terms, fields, ranked):
+    table = queryset.model._meta.db_table
+    phrases = " ".join(f'"{term}"*' for term in terms)
+    match = f"{{{' '.join(fields)}}} : ({phrases})"
+
+    # Joining the FTS table once both filters and ranks the rows. bm25 is
+    # lower for better matches; titles weigh more than descriptions.
+    return queryset.extra(
+        select=(
+            {"search_rank": f"-bm25({SQLITE_FTS_TABLE}, 10.0, 1.0)"}
+            if ranked else None
+        ),
+        tables=[SQLITE_FTS_TABLE],
+        where=[
+            f"{SQLITE_FTS_TABLE}.rowid = \"{table}\".\"id\"",
+            f"{SQLITE_FTS_TABLE} MATCH %s",
+        ],
+        params=[match],
+    )
+
+
+def postgres_document(fields, table=None):
+    """The ``to_tsvector`` expression matching the GIN index on ``fields``."""
+    prefix = f'"{table}".' if table else ""
+    columns = " || ' ' || ".join(f'{prefix}"{field}"' for field in fields)
+    return f"to_tsvector('{SEARCH_CONFIG}', {columns})"
+
+
+def _postgres_search(queryset, terms, fields, ranked):
+    document = postgres_document(fields, queryset.model._meta.db_table)
+    query = " & ".join(f"{term}:*" for term in terms)
+
+    queryset = queryset.filter(
+        id__in=RawSQL(
+            f"SELECT id FROM \"{queryset.model._meta.db_table}\" "
+            f"WHERE {document} @@ to_tsquery('{SEARCH_CONFIG}', %s)",
+            (query,),
+        )
+    )
+    if ranked:
+        queryset = queryset.annotate(
+            search_rank=RawSQL(
+                f"ts_rank({document}, to_tsquery('{SEARCH_CONFIG}', %s))",
+                (query,),
+            )
+        )
+    return queryset
+
+
+def _fallback_search(queryset, terms, fields, ranked):
+    for term in terms:
+        term_filter = Q()
+        for field in fields:
+            term_filter |= Q(**{f"{field}__icontains": term})
+        queryset = queryset.filter(term_filter)
+    return queryset
+
+
+SEARCH_BACKENDS = {
+    "sqlite": _sqlite_search,
+    "postgresql": _postgres_search,
+}
+
+
+def search_shows(queryset, text, fields=SEARCH_FIELDS, ranked=True):
+    """Filter an ``AstronomyShow`` queryset to shows matching ``text``.
+
+    Every word has to match the start of a word in one of ``fields``.
+    With ``ranked`` the result is ordered by relevance, best first.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    search = SEARCH_BACKENDS.get(vendor, _fallback_search)
+    queryset = search(queryset, terms, fields, ranked)
+
+    if ranked and vendor in SEARCH_BACKENDS:
+        queryset = queryset.order_by("-search_rank", "id")
+    return queryset
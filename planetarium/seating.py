@@ -0,0 +1,140 @@
+import base64
+
+
+def seat_index(row: int, seat: int, seats_in_row: int) -> int:
+    """Position of a seat in the row-major seat map (rows and seats from 1)."""
+    return (row - 1) * seats_in_row + (seat - 1)
+
+
+def pack_seats(rows: int, seats_in_row: int, taken) -> bytes:
+    """Pack taken ``(row, seat)`` pairs into a row-major bitmap.
+
+    Bit ``seat_index`` is set for every taken seat, most significant bit
+    of each byte first, and the last byte is zero padded.
+    """
+    bitmap = bytearray((rows * seats_in_row + 7) // 8)
+    for row, seat in taken:
+        index = seat_index(row, seat, seats_in_row)
+        bitmap[index // 8] |= 0x80 >> (index % 8)
+    return bytes(bitmap)
+
+
+def encode_base64(rows: int, seats_in_row: int, taken) -> str:
+    return base64.b64encode(pack_seats(rows, seats_in_row, taken)).decode()
+
+
+def encode_runs(rows: int, seats_in_row: int, taken) -> list[int]:
+    """Run-length encode the seat map.
+
+    Runs alternate between free and taken seats and always start with
+    a (possibly empty) run of free seats.
+    """
+    taken_indexes = sorted(
+        seat_index(row, seat, seats_in_row) for row, seat in taken
+    )
+    runs = []
+    position = 0
+    for index in taken_indexes:
+        if runs and index == position:
+            runs[-1] += 1
+        else:
+            runs.extend([index - position, 1])
+        position = index + 1
+
+    total = rows * seats_in_row
+    if position < total:
+        runs.append(total - position)
+    return runs
+
+
+SEAT_MAP_ENCODERS = {
+    "base64": encode_base64,
+    "rle": encode_runs,
+}
+
+
+def free_intervals(rows: int, seats_in_row: int, taken) -> dict:
+    """Map every row to its sorted ``(first, last)`` ranges of free seats."""
+    taken_by_row = {}
+    for row, seat in taken:
+        taken_by_row.setdefault(row, set()).add(seat)
+
+    intervals = {}
+    for row in range(1, rows + 1):
+        row_taken = taken_by_row.get(row, set())
+        row_intervals = []
+        start = None
+        for seat in range(1, seats_in_row + 2):
+            if seat <= seats_in_row and seat not in row_taken:
+                if start is None:
+                    start = seat
+            elif start is not None:
+                row_intervals.append((start, seat - 1))
+                start = None
+        intervals[row] = row_intervals
+    return intervals
+
+
+SEAT_PREFERENCES = ("center", "rear")
+
+
+def _row_score(row: int, rows: int, prefer: str) -> float:
+    if prefer == "rear":
+        return rows - row
+    return abs(row - (rows + 1) / 2)
+
+
+def best_available(
+    rows: int,
+    seats_in_row: int,
+    taken,
+    party_size: int,
+    prefer: str = "center",
+    same_row: bool = True,
+):
+    """Pick the best free ``(row, seat)`` pairs for a party.
+
+    Rows are ranked by ``prefer`` and, within a row, the block closest to
+    the middle of the row wins. Without ``same_row`` the party may be
+    split over the best single seats when no row can seat it together.
+    Return ``None`` when there are not enough free seats.
+    """
+    middle_seat = (seats_in_row + 1) / 2
+    best = None
+
+    intervals = free_intervals(rows, seats_in_row, taken)
+    for row, row_intervals in intervals.items():
+        for first, last in row_intervals:
+            if last - first + 1 < party_size:
+                continue
+            ideal_start = round(middle_seat - (party_size - 1) / 2)
+            start = min(max(ideal_start, first), last - party_size + 1)
+            score = (
+                _row_score(row, rows, prefer),
+                abs(start + (party_size - 1) / 2 - middle_seat),
+            )
+            if best is None or score < best[0]:
+                best = (score, row, start)
+
+    if best is not None:
+        _, row, start = best
+        return [(row, seat) for seat in range(start, start + party_size)]
+
+    if same_row:
+        return None
+
+    free_seats = sorted(
+        (
+            (row, seat)
+            for row, row_intervals in intervals.items()
+            for first, last in row_intervals
+            for seat in range(first, last + 1)
+        ),
+        key=lambda place: (
+            _row_score(place[0], rows, prefer),
+            abs(place[1] - middle_seat),
+        ),
+    )
+    if len(free_seats) < party_size:
+        return None
+    return sorted(free_seats[:party_size])
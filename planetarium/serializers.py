@@ -1,7 +1,17 @@
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema_field, extend_schema_serializer
 from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueTogetherValidator
 
+from planetarium.events import publish_seat_changes
 from planetarium.models import (
     ShowTheme,
     AstronomyShow,
@@ -9,33 +19,126 @@ from planetarium.models import (
     ShowSession,
     Reservation,
     Ticket,
+    SeatHold,
+    HeldSeat,
 )
-
-
-class ShowThemeSerializer(serializers.ModelSerializer):
+from planetarium.metrics import SEAT_CONFLICTS
+from planetarium.projections import ProjectionMixin, ProjectionListSerializer
+from planetarium.schedule import WEEKDAYS, expand_recurrence
+from planetarium.seating import SEAT_PREFERENCES
+from planetarium_service.metrics import TimedSerializerMixin
+
+
+def seat_conflicts(seats, exclude_hold=None):
+    """Return the conflict of each ``(show_session_id, row, seat)`` tuple.
+
+    A seat conflicts when it is ``"sold"``, actively ``"held"`` by another
+    hold, or ``"repeated"`` earlier in ``seats``; otherwise its entry is
+    ``None``.
+    """
+    taken = Ticket.find_taken_seats(seats)
+    held = HeldSeat.find_held_seats(seats, exclude_hold=exclude_hold)
+
+    conflicts = []
+    seen = set()
+    for seat in seats:
+        if seat in taken:
+            conflicts.append("sold")
+        elif seat in seen:
+            conflicts.append("repeated")
+        elif seat in held:
+            conflicts.append("held")
+        else:
+            conflicts.append(None)
+        seen.add(seat)
+
+    return conflicts
+
+
+def refuse_seats(conflicts, race=False):
+    """Count the seats of a refused request by conflict.
+
+    With ``race`` the seats were taken by a concurrent booking after
+    validation.
+    """
+    for conflict in filter(None, conflicts):
+        SEAT_CONFLICTS.inc(reason="race" if race else conflict)
+
+
+def seat_conflict_errors(conflicts):
+    """Per-seat validation errors for ``conflicts``."""
+    errors = []
+    for conflict in conflicts:
+        if conflict is None:
+            errors.append({})
+            continue
+
+        if conflict == "held":
+            detail = ErrorDetail(TicketBatchSerializer.held_message, code="held")
+        else:
+            detail = ErrorDetail(TicketBatchSerializer.unique_message, code="unique")
+        errors.append({api_settings.NON_FIELD_ERRORS_KEY: [detail]})
+
+    return errors
+
+
+@extend_schema_field({
+    "type": "object",
+    "description": "URLs of resized variants, by format and width.",
+    "additionalProperties": {
+        "type": "object",
+        "additionalProperties": {"type": "string", "format": "uri"},
+    },
+})
+class ImageVariantsField(serializers.Field):
+    """``AstronomyShow.image_variants`` with file names turned into URLs."""
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        storage = AstronomyShow._meta.get_field("image").storage
+        request = self.context.get("request")
+
+        def url(name):
+            url = storage.url(name)
+            if request is not None:
+                return request.build_absolute_uri(url)
+            return url
+
+        return {
+            variant_format: {width: url(name) for width, name in names.items()}
+            for variant_format, names in value.items()
+        }
+
+
+class ShowThemeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ShowTheme
-        fields = "__all__"
+        fields = ("id", "name")
         read_only_fields = ("id",)
 
 
-class AstronomyShowSerializer(serializers.ModelSerializer):
+class AstronomyShowSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = AstronomyShow
         fields = ("id", "title", "themes", "description")
         read_only_fields = ("id",)
 
 
-class AstronomyShowListSerializer(AstronomyShowSerializer):
+class AstronomyShowListSerializer(ProjectionMixin, AstronomyShowSerializer):
     themes = serializers.SlugRelatedField(many=True, slug_field="name", read_only=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = AstronomyShow
-        fields = ("id", "title", "themes", "description", "image")
+        fields = ("id", "title", "themes", "description", "image", "image_variants")
         read_only_fields = ("id",)
+        list_serializer_class = ProjectionListSerializer
 
 
-class ShowImageSerializer(serializers.ModelSerializer):
+class ShowImageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = AstronomyShow
         fields = ("id", "image")
@@ -45,27 +148,30 @@ class AstronomyShowDetailSerializer(AstronomyShowListSerializer):
     themes = ShowThemeSerializer(many=True, read_only=True)
 
 
-class PlanetariumDomeSerializer(serializers.ModelSerializer):
+class PlanetariumDomeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = PlanetariumDome
         fields = ("id", "name", "rows", "seats_in_row", "capacity")
         read_only_fields = ("id",)
 
 
-class ShowSessionSerializer(serializers.ModelSerializer):
+class ShowSessionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ShowSession
         fields = ("id", "astronomy_show", "planetarium_dome", "show_time")
         read_only_fields = ("id",)
 
 
-class ShowSessionListSerializer(ShowSessionSerializer):
+class ShowSessionListSerializer(ProjectionMixin, ShowSessionSerializer):
     astronomy_show_title = serializers.CharField(
         source="astronomy_show.title", read_only=True
     )
     astronomy_show_image = serializers.ImageField(
         source="astronomy_show.image", read_only=True
     )
+    astronomy_show_image_variants = ImageVariantsField(
+        source="astronomy_show.image_variants"
+    )
     planetarium_dome_name = serializers.CharField(
         source="planetarium_dome.name", read_only=True
     )
@@ -77,14 +183,84 @@ class ShowSessionListSerializer(ShowSessionSerializer):
             "id",
             "astronomy_show_title",
             "astronomy_show_image",
+            "astronomy_show_image_variants",
             "planetarium_dome_name",
             "show_time",
             "tickets_available",
         )
         read_only_fields = ("id",)
+        list_serializer_class = ProjectionListSerializer
+
+
+class TicketShowSessionField(serializers.PrimaryKeyRelatedField):
+    """Show session field that resolves sessions preloaded by the batch."""
+
+    def to_internal_value(self, data):
+        batch = getattr(self.parent, "parent", None)
+        show_sessions = getattr(batch, "show_sessions", None)
+
+        if show_sessions is not None and not isinstance(data, bool):
+            try:
+                return show_sessions[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+
+        return super().to_internal_value(data)
+
 
+class TicketBatchSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """Validate a list of tickets with a fixed number of queries.
+
+    Show sessions and their domes are loaded in one query, and seats are
+    checked for uniqueness in one set-based query instead of per ticket.
+    """
+
+    unique_message = UniqueTogetherValidator.message.format(
+        field_names="show_session, row, seat"
+    )
+    held_message = "This seat is held by another customer."
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.show_sessions = self._load_show_sessions(data)
+
+        tickets = super().to_internal_value(data)
+        conflicts = self.seat_conflicts(tickets)
+        if any(conflicts):
+            refuse_seats(conflicts)
+            raise serializers.ValidationError(seat_conflict_errors(conflicts))
+
+        return tickets
+
+    @staticmethod
+    def _load_show_sessions(data):
+        show_session_ids = set()
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            try:
+                show_session_ids.add(int(item.get("show_session")))
+            except (TypeError, ValueError):
+                continue
+
+        return ShowSession.objects.select_related(
+            "planetarium_dome"
+        ).in_bulk(show_session_ids)
+
+    @staticmethod
+    def seat_conflicts(tickets):
+        """Return per-ticket conflicts: seats sold, held or repeated."""
+        return seat_conflicts([
+            (ticket["show_session"].id, ticket["row"], ticket["seat"])
+            for ticket in tickets
+        ])
+
+
+class TicketSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    show_session = TicketShowSessionField(
+        queryset=ShowSession.objects.select_related("planetarium_dome")
+    )
 
-class TicketSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -99,10 +275,9 @@ class TicketSerializer(serializers.ModelSerializer):
         model = Ticket
         fields = ("id", "row", "seat", "show_session")
         read_only_fields = ("id",)
-
-
-class TicketListSerializer(TicketSerializer):
-    show_session = ShowSessionListSerializer(many=False, read_only=True)
+        list_serializer_class = TicketBatchSerializer
+        # Uniqueness is checked for the whole batch by TicketBatchSerializer.
+        validators = []
 
 
 class TicketSeatSerializer(TicketSerializer):
@@ -127,7 +302,205 @@ class ShowSessionDetailSerializer(ShowSessionSerializer):
         )
 
 
-class ReservationSerializer(serializers.ModelSerializer):
+class ScheduleRowSerializer(TimedSerializerMixin, serializers.Serializer):
+    """A show session to import.
+
+    Shows and domes are checked against the ids in the ``astronomy_shows``
+    and ``planetarium_domes`` context sets, loaded once per import.
+    """
+
+    slot_taken_message = "The dome has another session at this time."
+
+    astronomy_show = serializers.IntegerField()
+    planetarium_dome = serializers.IntegerField()
+    show_time = serializers.DateTimeField()
+
+    def validate_astronomy_show(self, value):
+        if value not in self.context["astronomy_shows"]:
+            raise serializers.ValidationError(
+                f'Invalid pk "{value}" - object does not exist.'
+            )
+        return value
+
+    def validate_planetarium_dome(self, value):
+        if value not in self.context["planetarium_domes"]:
+            raise serializers.ValidationError(
+                f'Invalid pk "{value}" - object does not exist.'
+            )
+        return value
+
+    @classmethod
+    def import_rows(cls, rows, batch_size=None, context=None):
+        """Create the valid sessions of ``rows`` and report the others.
+
+        Rows are validated one by one, so an invalid row does not stop
+        the import. Shows and domes are loaded in one query each, unless
+        a ``context`` already has their id sets, dome slot overlaps are
+        checked in one query, and the sessions are inserted with
+        ``bulk_create`` in batches of ``batch_size``.
+        Returns ``{"created": [ids], "errors": [{"index", "errors"}]}``.
+        """
+        if context is None:
+            context = {
+                "astronomy_shows": cls.existing_ids(
+                    AstronomyShow, rows, "astronomy_show"
+                ),
+                "planetarium_domes": cls.existing_ids(
+                    PlanetariumDome, rows, "planetarium_dome"
+                ),
+            }
+        errors = []
+        valid = []
+        for index, row in enumerate(rows):
+            serializer = cls(data=row, context=context)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({"index": index, "errors": serializer.errors})
+
+        conflicts = ShowSession.find_slot_conflicts(
+            (attrs["planetarium_dome"], attrs["show_time"]) for _, attrs in valid
+        )
+        # Rows also conflict with earlier rows of the same import.
+        accepted = defaultdict(list)
+        sessions = []
+        for index, attrs in valid:
+            dome_id, show_time = attrs["planetarium_dome"], attrs["show_time"]
+            times = accepted[dome_id]
+            position = bisect_left(times, show_time)
+            if (dome_id, show_time) in conflicts or any(
+                abs(show_time - other) < settings.SHOW_SESSION_SLOT
+                for other in times[max(position - 1, 0):position + 1]
+            ):
+                errors.append({
+                    "index": index,
+                    "errors": {"show_time": [cls.slot_taken_message]},
+                })
+                continue
+            times.insert(position, show_time)
+            sessions.append(
+                ShowSession(
+                    astronomy_show_id=attrs["astronomy_show"],
+                    planetarium_dome_id=dome_id,
+                    show_time=show_time,
+                )
+            )
+
+        with transaction.atomic():
+            created = ShowSession.objects.bulk_create(
+                sessions,
+                batch_size=batch_size or settings.SCHEDULE_IMPORT_BATCH_SIZE,
+            )
+        errors.sort(key=lambda error: error["index"])
+        return {"created": [session.id for session in created], "errors": errors}
+
+    @staticmethod
+    def existing_ids(model, rows, field):
+        ids = set()
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            try:
+                ids.add(int(row.get(field)))
+            except (TypeError, ValueError):
+                continue
+        return set(
+            model.objects.filter(id__in=ids).values_list("id", flat=True)
+        )
+
+
+class ScheduleRecurrenceSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Sessions of a show at ``times`` on ``weekdays`` between two dates."""
+
+    max_days = 366
+
+    astronomy_show = serializers.PrimaryKeyRelatedField(
+        queryset=AstronomyShow.objects.all()
+    )
+    planetarium_dome = serializers.PrimaryKeyRelatedField(
+        queryset=PlanetariumDome.objects.all()
+    )
+    weekdays = serializers.ListField(
+        child=serializers.ChoiceField(choices=WEEKDAYS), allow_empty=False
+    )
+    times = serializers.ListField(
+        child=serializers.TimeField(), allow_empty=False
+    )
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+
+    def validate(self, attrs):
+        span = (attrs["date_to"] - attrs["date_from"]).days
+        if span < 0:
+            raise serializers.ValidationError(
+                {"date_to": "Must not be before date_from."}
+            )
+        if span >= self.max_days:
+            raise serializers.ValidationError(
+                {"date_to": f"A rule can span at most {self.max_days} days."}
+            )
+        return attrs
+
+    def sessions(self):
+        """Schedule rows of the validated rule."""
+        return expand_recurrence(
+            astronomy_show=self.validated_data["astronomy_show"].id,
+            planetarium_dome=self.validated_data["planetarium_dome"].id,
+            weekdays=self.validated_data["weekdays"],
+            times=self.validated_data["times"],
+            date_from=self.validated_data["date_from"],
+            date_to=self.validated_data["date_to"],
+        )
+
+    def import_context(self):
+        """``ScheduleRowSerializer`` context of the already loaded show and dome."""
+        return {
+            "astronomy_shows": {self.validated_data["astronomy_show"].id},
+            "planetarium_domes": {self.validated_data["planetarium_dome"].id},
+        }
+
+
+class ScheduleRowErrorSerializer(TimedSerializerMixin, serializers.Serializer):
+    index = serializers.IntegerField(help_text="Position of the row in the input.")
+    errors = serializers.DictField(
+        child=serializers.ListField(child=serializers.CharField())
+    )
+
+
+class ScheduleImportSerializer(TimedSerializerMixin, serializers.Serializer):
+    created = serializers.ListField(
+        child=serializers.IntegerField(), help_text="Ids of the created sessions."
+    )
+    errors = ScheduleRowErrorSerializer(many=True)
+
+
+class SeatMapSerializer(TimedSerializerMixin, serializers.Serializer):
+    rows = serializers.IntegerField()
+    seats_in_row = serializers.IntegerField()
+    encoding = serializers.ChoiceField(choices=("base64", "rle"))
+    taken = serializers.JSONField(
+        help_text=(
+            "Row-major bitmap of taken seats: a base64 string "
+            "or alternating free/taken run lengths."
+        )
+    )
+
+
+class BestAvailableSerializer(TimedSerializerMixin, serializers.Serializer):
+    party_size = serializers.IntegerField(min_value=1)
+    prefer = serializers.ChoiceField(choices=SEAT_PREFERENCES, default="center")
+    same_row = serializers.BooleanField(default=True)
+
+    def validate_party_size(self, value):
+        limit = settings.BEST_AVAILABLE_MAX_PARTY_SIZE
+        if value > limit:
+            raise serializers.ValidationError(
+                f"Ensure this value is less than or equal to {limit}."
+            )
+        return value
+
+
+class ReservationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=True)
 
     class Meta:
@@ -136,13 +509,190 @@ class ReservationSerializer(serializers.ModelSerializer):
         read_only_fields = ("id",)
 
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            reservation = Reservation.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(reservation=reservation, **ticket_data)
-            return reservation
+        tickets_data = validated_data.pop("tickets")
+        try:
+            return Reservation.create_with_tickets(tickets_data, **validated_data)
+        except IntegrityError:
+            # A concurrent reservation took one of the seats after validation.
+            conflicts = self.fields["tickets"].seat_conflicts(tickets_data)
+            if not any(conflicts):
+                raise
+            refuse_seats(conflicts, race=True)
+            raise serializers.ValidationError(
+                {"tickets": seat_conflict_errors(conflicts)}
+            )
+
+
+class ReservationHistoryTicketSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
+    show_session = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = Ticket
+        fields = ("id", "row", "seat", "show_session")
+
+
+class ReservationHistorySerializer(ReservationSerializer):
+    """Reservation whose tickets reference their show session by id.
+
+    A page of the history is read with one joined query, see
+    ``ticket_rows``, and ``group`` builds the reservations from its rows
+    with each show session listed once in a side table.
+    """
 
+    tickets = ReservationHistoryTicketSerializer(many=True, read_only=True)
 
-class ReservationListSerializer(ReservationSerializer):
-    tickets = TicketListSerializer(many=True, read_only=True)
+    @staticmethod
+    def ticket_rows(reservation_ids):
+        """A row per ticket with the ``ShowSessionListSerializer`` columns."""
+        return ShowSessionListSerializer.project(
+            ShowSession.objects.with_tickets_available()
+            .filter(tickets__reservation__in=reservation_ids)
+            .order_by("tickets__row", "tickets__seat"),
+            "tickets__id",
+            "tickets__row",
+            "tickets__seat",
+            "tickets__reservation",
+        )
+
+    @classmethod
+    def group(cls, reservations, ticket_rows, context=None):
+        """Return the representations of ``reservations`` and their sessions.
+
+        ``reservations`` are ``id``/``created_at`` rows and ``ticket_rows``
+        the rows of ``ticket_rows()`` for them.
+        """
+        tickets = defaultdict(list)
+        show_sessions = {}
+        for row in ticket_rows:
+            tickets[row["tickets__reservation"]].append({
+                "id": row["tickets__id"],
+                "row": row["tickets__row"],
+                "seat": row["tickets__seat"],
+                "show_session": row["id"],
+            })
+            show_sessions.setdefault(row["id"], row)
+
+        created_at = cls().fields["created_at"]
+        results = [
+            {
+                "id": reservation["id"],
+                "tickets": tickets[reservation["id"]],
+                "created_at": created_at.to_representation(
+                    reservation["created_at"]
+                ),
+            }
+            for reservation in reservations
+        ]
+        sessions = ShowSessionListSerializer(
+            list(show_sessions.values()), many=True, context=context
+        ).data
+        return results, sessions
+
+
+@extend_schema_serializer(many=False)
+class ReservationHistoryPageSerializer(TimedSerializerMixin, serializers.Serializer):
+    count = serializers.IntegerField(
+        required=False, help_text="Only on ``?page=`` pages."
+    )
+    next = serializers.URLField(allow_null=True)
+    previous = serializers.URLField(allow_null=True)
+    results = ReservationHistorySerializer(many=True)
+    show_sessions = ShowSessionListSerializer(
+        many=True, help_text="The show sessions referenced by the tickets."
+    )
+
+
+class HeldSeatSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = HeldSeat
+        fields = ("row", "seat")
+
+
+class SeatHoldSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    show_session = serializers.PrimaryKeyRelatedField(
+        queryset=ShowSession.objects.select_related("planetarium_dome")
+    )
+    seats = HeldSeatSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = SeatHold
+        fields = ("token", "show_session", "seats", "expires_at")
+        read_only_fields = ("token", "expires_at")
+
+    def validate(self, attrs):
+        show_session = attrs["show_session"]
+        seats = attrs["seats"]
+
+        errors = []
+        for seat in seats:
+            try:
+                Ticket.validate_ticket(
+                    seat["row"],
+                    seat["seat"],
+                    show_session.planetarium_dome,
+                    serializers.ValidationError,
+                )
+            except serializers.ValidationError as exc:
+                errors.append(exc.detail)
+            else:
+                errors.append({})
+        if not any(errors):
+            conflicts = self.seat_conflicts(show_session, seats)
+            if any(conflicts):
+                refuse_seats(conflicts)
+                errors = seat_conflict_errors(conflicts)
+        if any(errors):
+            raise serializers.ValidationError({"seats": errors})
+
+        return attrs
+
+    @staticmethod
+    def seat_conflicts(show_session, seats):
+        return seat_conflicts(
+            [(show_session.id, seat["row"], seat["seat"]) for seat in seats]
+        )
+
+    def create(self, validated_data):
+        seats = validated_data.pop("seats")
+        show_session = validated_data["show_session"]
+        try:
+            with transaction.atomic():
+                # Expired holds still own their rows in the unique index.
+                SeatHold.sweep_expired(show_session=show_session)
+                hold = SeatHold.objects.create(
+                    expires_at=timezone.now() + settings.SEAT_HOLD_TTL,
+                    **validated_data,
+                )
+                HeldSeat.objects.bulk_create(
+                    HeldSeat(hold=hold, show_session=show_session, **seat)
+                    for seat in seats
+                )
+                # Saving the hold locked the session, as a reservation does,
+                # so seats sold since validate() are visible now.
+                requested = [
+                    (show_session.id, seat["row"], seat["seat"]) for seat in seats
+                ]
+                taken = Ticket.find_taken_seats(requested)
+                if taken:
+                    conflicts = [
+                        "sold" if seat in taken else None for seat in requested
+                    ]
+                    refuse_seats(conflicts, race=True)
+                    raise serializers.ValidationError(
+                        {"seats": seat_conflict_errors(conflicts)}
+                    )
+                publish_seat_changes(
+                    show_session.id,
+                    taken=[(seat["row"], seat["seat"]) for seat in seats],
+                )
+        except IntegrityError:
+            conflicts = self.seat_conflicts(show_session, seats)
+            if not any(conflicts):
+                raise
+            refuse_seats(conflicts, race=True)
+            raise serializers.ValidationError(
+                {"seats": seat_conflict_errors(conflicts)}
+            )
+        return hold
@@ -0,0 +1,156 @@
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    post_delete,
+    pre_delete,
+    m2m_changed,
+    post_migrate,
+)
+from django.conf import settings
+from django.db import connections, transaction
+from django.dispatch import receiver
+
+from planetarium.cache import invalidate
+from planetarium.events import publish_seat_changes
+from planetarium.metrics import RESERVATIONS_CREATED
+from planetarium.models import (
+    ShowTheme,
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    Reservation,
+    Ticket,
+    SeatHold,
+    HeldSeat,
+    deleted_tickets,
+)
+from planetarium.search import restore_sqlite_triggers
+
+# Cached response groups to drop when an object of the model changes.
+CACHE_GROUPS = {
+    ShowTheme: ("show_theme", "astronomy_show"),
+    AstronomyShow: ("astronomy_show",),
+    AstronomyShow.themes.through: ("astronomy_show",),
+    PlanetariumDome: ("planetarium_dome",),
+}
+
+
+@receiver(post_save, sender=Ticket)
+def count_created_ticket(sender, instance, created, raw=False, **kwargs):
+    """Keep ``tickets_sold`` and the version in step with saved tickets."""
+    if created and not raw:
+        ShowSession.objects.add_tickets_sold({instance.show_session_id: 1})
+        publish_seat_changes(
+            instance.show_session_id, taken=[(instance.row, instance.seat)]
+        )
+
+
+@receiver(post_delete, sender=Ticket)
+def count_deleted_ticket(sender, instance, origin=None, **kwargs):
+    deleted_tickets.add(origin, instance)
+
+
+# Only models that tickets cascade from: a receiver for every sender would
+# stop all other models from being deleted without loading their rows.
+@receiver(post_delete, sender=Reservation)
+@receiver(post_delete, sender=ShowSession)
+@receiver(post_delete, sender=AstronomyShow)
+@receiver(post_delete, sender=PlanetariumDome)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def count_cascaded_ticket_deletes(sender, origin=None, **kwargs):
+    """Apply the tickets deleted before what they cascade from."""
+    deleted_tickets.flush(origin)
+
+
+@receiver(post_save, sender=Reservation)
+def count_created_reservation(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(RESERVATIONS_CREATED.inc)
+
+
+@receiver(post_delete, sender=HeldSeat)
+def release_held_seat(sender, instance, **kwargs):
+    """Seats of expired, cancelled and confirmed holds are released."""
+    publish_seat_changes(
+        instance.show_session_id, released=[(instance.row, instance.seat)]
+    )
+
+
+def invalidate_catalog_cache(sender, **kwargs):
+    if not kwargs.get("raw"):
+        invalidate(*CACHE_GROUPS[sender])
+
+
+# One receiver per cached model, so that other models can still be
+# deleted without loading their rows.
+for cached_model in CACHE_GROUPS:
+    for signal in (post_save, post_delete, m2m_changed):
+        signal.connect(invalidate_catalog_cache, sender=cached_model)
+
+
+@receiver(post_save, sender=SeatHold)
+@receiver(post_delete, sender=SeatHold)
+def bump_held_show_session_version(sender, instance, raw=False, **kwargs):
+    """Holds change tickets_available of their show session."""
+    if not raw:
+        ShowSession.bump_versions(pk=instance.show_session_id)
+
+
+@receiver(m2m_changed, sender=AstronomyShow.themes.through)
+def bump_show_version_on_themes_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if not reverse:
+        AstronomyShow.bump_versions(pk=instance.pk)
+    elif pk_set:
+        AstronomyShow.bump_versions(pk__in=pk_set)
+    else:
+        AstronomyShow.bump_versions(themes=instance)
+
+
+@receiver(post_save, sender=ShowTheme)
+@receiver(pre_delete, sender=ShowTheme)
+def bump_show_version_on_theme_change(sender, instance, raw=False, **kwargs):
+    """Shows embed their theme names, so a theme edit changes them too."""
+    if not raw and not kwargs.get("created"):
+        AstronomyShow.bump_versions(themes=instance)
+
+
+@receiver(pre_save, sender=AstronomyShow)
+def remember_show_files(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the files the show referenced before the save."""
+    instance._previous_file_names = set()
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not {"image", "image_variants"} & set(
+        update_fields
+    ):
+        return
+
+    previous = AstronomyShow.objects.filter(pk=instance.pk).only(
+        "image", "image_variants"
+    ).first()
+    if previous is not None:
+        instance._previous_file_names = previous.file_names()
+
+
+@receiver(post_save, sender=AstronomyShow)
+def release_replaced_show_files(sender, instance, raw=False, **kwargs):
+    replaced = getattr(instance, "_previous_file_names", set())
+    if not raw and replaced:
+        AstronomyShow.release_files(replaced - instance.file_names())
+
+
+@receiver(post_delete, sender=AstronomyShow)
+def release_deleted_show_files(sender, instance, **kwargs):
+    AstronomyShow.release_files(instance.file_names())
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    """Recreate the FTS triggers a rebuild of the show table dropped."""
+    if sender.name == "planetarium":
+        restore_sqlite_triggers(connections[using])
@@ -0,0 +1,65 @@
+"""Media storage naming files by the SHA-256 of their content.
+
+``ContentHashStorage`` hashes an upload while streaming it to a
+temporary file and then moves it to ``<upload_to dir>/<sha256><ext>``.
+Saving the same content again reuses the name, so a poster shared by
+several shows is stored once, and since a name never changes content it
+can be cached forever (``cache_control``).
+
+Files are shared, so they must only be deleted once nothing references
+them any more, see ``AstronomyShow.release_files``. That check can run
+before a show reusing the name commits, so the upload is always moved
+into place, even over an existing file: a name released in the meantime
+is written again instead of being left pointing at nothing.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+HASHED_NAME = re.compile(r"(^|/)[0-9a-f]{64}(\.\w+)?$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class ContentHashStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # The name is chosen by ``_save`` from the content.
+        return name
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        _, extension = os.path.splitext(filename)
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        descriptor, temporary_path = tempfile.mkstemp(
+            dir=full_directory, prefix=".upload-"
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as temporary:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temporary.write(chunk)
+
+            name = os.path.join(directory, digest.hexdigest() + extension.lower())
+            os.chmod(temporary_path, self.file_permissions_mode or 0o644)
+            os.replace(temporary_path, self.path(name))
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+        return name.replace("\\", "/")
+
+    @staticmethod
+    def is_hashed(name) -> bool:
+        return HASHED_NAME.search(name) is not None
+
+    def cache_control(self, name):
+        """``Cache-Control`` of ``name``: content-hashed names never change."""
+        if self.is_hashed(name):
+            return IMMUTABLE_CACHE_CONTROL
+        return None
@@ -0,0 +1,29 @@
+from planetarium_service.instrumentation import (
+    QueryRecorder,
+    get_query_budget,
+)
+
+
+class QueryBudgetMixin:
+    """Test case helpers for checking requests against ``query_budget``."""
+
+    def assertWithinQueryBudget(self, method, url, **extra):
+        """Run a request and fail when its view action exceeds the budget."""
+        with QueryRecorder().record() as recorder:
+            response = getattr(self.client, method)(url, **extra)
+
+        match = response.resolver_match
+        view_class = match.func.cls
+        action = match.func.actions[method]
+        budget = get_query_budget(view_class, action)
+
+        self.assertIsNotNone(
+            budget, f"{view_class.__name__}.{action} declares no query budget"
+        )
+        self.assertLessEqual(
+            recorder.count,
+            budget,
+            f"{view_class.__name__}.{action} ran {recorder.count} queries "
+            f"for {url}, over its budget of {budget}",
+        )
+        return response
@@ -3,12 +3,15 @@ import tempfile
 
 from PIL import Image
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from planetarium.models import AstronomyShow, ShowTheme, PlanetariumDome, ShowSession
+from planetarium.search import SQLITE_FTS_TRIGGERS, restore_sqlite_triggers
 from planetarium.serializers import AstronomyShowListSerializer, AstronomyShowDetailSerializer
 
 SHOW_URL = reverse("planetarium:astronomyshow-list")
@@ -296,3 +299,89 @@ class AdminMovieApiTest(TestCase):
 
         self.assertEquals(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+
+class AstronomyShowSearchApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.sunrise = sample_show(
+            title="Sunrise on Mars", description="The red planet"
+        )
+        self.moon = sample_show(
+            title="Moon", description="Watch the sun set behind the Moon"
+        )
+        self.stars = sample_show(title="Stars", description="Deep sky")
+
+    def test_search_ranks_title_matches_first(self):
+        response = self.client.get(SHOW_URL, {"search": "sun"})
+
+        self.assertEqual(
+            [show["title"] for show in response.data],
+            ["Sunrise on Mars", "Moon"],
+        )
+
+    def test_search_reads_the_index_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(SHOW_URL, {"search": "sun"})
+
+        for query in queries:
+            self.assertLessEqual(query["sql"].count(" MATCH "), 1)
+
+    def test_search_matches_all_words(self):
+        response = self.client.get(SHOW_URL, {"search": "red MARS"})
+
+        self.assertEqual([show["id"] for show in response.data], [self.sunrise.id])
+
+    def test_search_ignores_query_syntax(self):
+        response = self.client.get(SHOW_URL, {"search": '"sun* OR'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_search_sees_updated_title(self):
+        self.stars.title = "Supernova"
+        self.stars.save()
+
+        response = self.client.get(SHOW_URL, {"search": "supernova"})
+
+        self.assertEqual([show["id"] for show in response.data], [self.stars.id])
+
+    def test_dropped_triggers_are_restored(self):
+        with connection.cursor() as cursor:
+            for trigger in SQLITE_FTS_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER {trigger}")
+        self.stars.title = "Supernova"
+        self.stars.save()
+
+        self.assertTrue(restore_sqlite_triggers(connection))
+        self.assertFalse(restore_sqlite_triggers(connection))
+        response = self.client.get(SHOW_URL, {"search": "supernova"})
+
+        self.assertEqual([show["id"] for show in response.data], [self.stars.id])
+
+    def test_filter_show_sessions_by_title_substring(self):
+        galaxy = sample_show(title="Galaxy")
+        sample_show_session(astronomy_show=galaxy)
+        sample_show_session(astronomy_show=self.moon)
+
+        response = self.client.get(SHOW_SESSION_URL, {"title": "alax"})
+
+        self.assertEqual(
+            [session["astronomy_show_title"] for session in response.data],
+            ["Galaxy"],
+        )
+
+    def test_search_show_sessions(self):
+        sample_show_session(astronomy_show=self.sunrise)
+        sample_show_session(astronomy_show=self.moon)
+        sample_show_session(astronomy_show=self.stars)
+
+        response = self.client.get(SHOW_SESSION_URL, {"search": "sun"})
+
+        self.assertEqual(
+            sorted(session["astronomy_show_title"] for session in response.data),
+            ["Moon", "Sunrise on Mars"],
+        )
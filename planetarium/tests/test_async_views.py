@@ -0,0 +1,128 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import resolve, reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.models import ShowTheme, Reservation, Ticket
+from planetarium.tests.test_reservation_api import (
+    RESERVATION_URL,
+    sample_show_session,
+)
+from user.cache import local_users
+
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+
+
+def show_session_detail_url(show_session_id):
+    return reverse("planetarium:showsession-detail", args=[show_session_id])
+
+
+class AsyncReadViewsTest(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.show_session = sample_show_session()
+        self.show_session.astronomy_show.themes.add(
+            ShowTheme.objects.create(name="Planets")
+        )
+        reservation = Reservation.objects.create(user=self.user)
+        for seat in (1, 2):
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                show_session=self.show_session,
+                reservation=reservation,
+            )
+
+    def test_read_routes_are_async(self):
+        async_urls = [
+            SHOW_SESSION_URL,
+            show_session_detail_url(self.show_session.id),
+            reverse("planetarium:astronomyshow-list"),
+            RESERVATION_URL,
+        ]
+        for url in async_urls:
+            with self.subTest(url):
+                self.assertTrue(asyncio.iscoroutinefunction(resolve(url).func))
+
+        self.assertFalse(
+            asyncio.iscoroutinefunction(
+                resolve(reverse("planetarium:showtheme-list")).func
+            )
+        )
+
+    async def test_retrieve_show_session(self):
+        response = await self.async_client.get(
+            show_session_detail_url(self.show_session.id), headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["astronomy_show"]["themes"][0]["name"], "Planets")
+        self.assertEqual(response.data["planetarium_dome"]["name"], "TestDome")
+        self.assertEqual(
+            [(place["row"], place["seat"]) for place in response.data["taken_places"]],
+            [(1, 1), (1, 2)],
+        )
+        self.assertIn("ETag", response)
+
+    async def test_retrieve_missing_show_session(self):
+        response = await self.async_client.get(
+            show_session_detail_url(0), headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_list_show_sessions(self):
+        response = await self.async_client.get(SHOW_SESSION_URL, headers=self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["tickets_available"], 98)
+
+    async def test_list_reservations(self):
+        response = await self.async_client.get(RESERVATION_URL, headers=self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"][0]["tickets"]), 2)
+        self.assertEqual(
+            response.data["show_sessions"][0]["id"], self.show_session.id
+        )
+
+    @override_settings(QUERY_COUNT_HEADERS=True)
+    async def test_queries_are_counted(self):
+        local_users.clear()
+        response = await self.async_client.get(SHOW_SESSION_URL, headers=self.headers)
+        local_users.clear()
+        sync_response = await sync_to_async(self.client.get)(
+            SHOW_SESSION_URL, headers=self.headers
+        )
+
+        self.assertGreater(int(response["X-DB-Query-Count"]), 0)
+        self.assertEqual(
+            response["X-DB-Query-Count"], sync_response["X-DB-Query-Count"]
+        )
+
+    async def test_list_requires_authentication(self):
+        response = await self.async_client.get(SHOW_SESSION_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_sync_action_on_async_route(self):
+        response = await self.async_client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": 2, "seat": 1, "show_session": self.show_session.id}
+                ]
+            },
+            content_type="application/json",
+            headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.deletion import Collector
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from planetarium.metrics import CATALOG_CACHE_REQUESTS
+from planetarium.models import AstronomyShow, ShowTheme, PlanetariumDome
+from planetarium.tests.test_metrics import sample
+from user.models import TokenRevocation
+
+SHOW_URL = reverse("planetarium:astronomyshow-list")
+DOME_URL = reverse("planetarium:planetariumdome-list")
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.theme = ShowTheme.objects.create(name="Planets")
+        self.show = AstronomyShow.objects.create(
+            title="Mars", description="Red planet"
+        )
+        self.show.themes.add(self.theme)
+
+    def test_second_request_is_served_from_cache(self):
+        hits, misses = (
+            sample(CATALOG_CACHE_REQUESTS, group="astronomy_show", result=result)[0]
+            for result in ("hit", "miss")
+        )
+        first = self.client.get(SHOW_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(SHOW_URL)
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(
+            sample(CATALOG_CACHE_REQUESTS, group="astronomy_show", result="hit"),
+            [hits + 1],
+        )
+        self.assertEqual(
+            sample(CATALOG_CACHE_REQUESTS, group="astronomy_show", result="miss"),
+            [misses + 1],
+        )
+
+    def test_other_models_are_still_fast_deleted(self):
+        collector = Collector(using="default")
+
+        self.assertTrue(collector.can_fast_delete(TokenRevocation.objects.all()))
+
+    def test_query_params_are_part_of_key(self):
+        self.client.get(SHOW_URL)
+
+        response = self.client.get(SHOW_URL, {"themes": str(self.theme.id)})
+
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_show_change_invalidates(self):
+        self.client.get(SHOW_URL)
+
+        self.show.title = "Venus"
+        self.show.save()
+        response = self.client.get(SHOW_URL)
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data[0]["title"], "Venus")
+
+    def test_theme_change_invalidates_shows(self):
+        self.client.get(SHOW_URL)
+
+        self.theme.name = "Red planets"
+        self.theme.save()
+        response = self.client.get(SHOW_URL)
+
+        self.assertEqual(response.data[0]["themes"], ["Red planets"])
+
+    def test_themes_relation_change_invalidates_shows(self):
+        self.client.get(reverse("planetarium:astronomyshow-detail", args=[self.show.id]))
+
+        self.show.themes.clear()
+        response = self.client.get(
+            reverse("planetarium:astronomyshow-detail", args=[self.show.id])
+        )
+
+        self.assertEqual(response.data["themes"], [])
+
+    def test_dome_creation_invalidates_domes(self):
+        self.client.get(DOME_URL)
+
+        PlanetariumDome.objects.create(name="Big", rows=5, seats_in_row=5)
+        response = self.client.get(DOME_URL)
+
+        self.assertEqual(response.data["count"], 1)
@@ -0,0 +1,158 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    ShowTheme,
+    Reservation,
+    SeatHold,
+    Ticket,
+)
+from planetarium.tests.test_reservation_api import sample_show_session
+
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+
+
+def show_detail_url(show_id):
+    return reverse("planetarium:astronomyshow-detail", args=[show_id])
+
+
+def show_session_detail_url(show_session_id):
+    return reverse("planetarium:showsession-detail", args=[show_session_id])
+
+
+class ETagTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+        self.show = self.show_session.astronomy_show
+
+    def get(self, url, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(url, **headers)
+
+    def test_matching_etag_returns_not_modified(self):
+        first = self.get(show_detail_url(self.show.id))
+        cache.clear()
+
+        second = self.get(show_detail_url(self.show.id), first["ETag"])
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertFalse(second.content)
+
+    def test_cache_hit_answers_etag_without_queries(self):
+        first = self.get(show_detail_url(self.show.id))
+
+        with self.assertNumQueries(0):
+            second = self.get(show_detail_url(self.show.id), first["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_show_edit_changes_etag(self):
+        first = self.get(show_detail_url(self.show.id))
+
+        self.show.title = "Venus"
+        self.show.save()
+        second = self.get(show_detail_url(self.show.id), first["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+
+    def test_theme_rename_changes_show_etag(self):
+        theme = ShowTheme.objects.create(name="Planets")
+        self.show.themes.add(theme)
+        first = self.get(show_detail_url(self.show.id))
+
+        theme.name = "Red planets"
+        theme.save()
+        second = self.get(show_detail_url(self.show.id), first["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data["themes"][0]["name"], "Red planets")
+
+    def test_ticket_changes_show_session_etags(self):
+        first_list = self.get(SHOW_SESSION_URL)
+        first_detail = self.get(show_session_detail_url(self.show_session.id))
+
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+        second_list = self.get(SHOW_SESSION_URL, first_list["ETag"])
+        second_detail = self.get(
+            show_session_detail_url(self.show_session.id), first_detail["ETag"]
+        )
+
+        self.assertEqual(second_list.status_code, status.HTTP_200_OK)
+        self.assertEqual(second_list.data[0]["tickets_available"], 99)
+        self.assertEqual(second_detail.status_code, status.HTTP_200_OK)
+
+    def test_ticket_delete_changes_show_session_etags(self):
+        ticket = Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+        first_list = self.get(SHOW_SESSION_URL)
+        first_detail = self.get(show_session_detail_url(self.show_session.id))
+
+        ticket.delete()
+        second_list = self.get(SHOW_SESSION_URL, first_list["ETag"])
+        second_detail = self.get(
+            show_session_detail_url(self.show_session.id), first_detail["ETag"]
+        )
+
+        self.assertEqual(second_list.status_code, status.HTTP_200_OK)
+        self.assertEqual(second_list.data[0]["tickets_available"], 100)
+        self.assertEqual(second_detail.status_code, status.HTTP_200_OK)
+        self.assertEqual(second_detail.data["taken_places"], [])
+
+    def test_pages_have_their_own_etags(self):
+        first = self.get(f"{SHOW_SESSION_URL}?page=1")
+
+        second = self.get(f"{SHOW_SESSION_URL}?cursor=", first["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+
+    def test_seat_hold_changes_show_session_etag(self):
+        first = self.get(show_session_detail_url(self.show_session.id))
+
+        SeatHold.objects.create(
+            user=self.user,
+            show_session=self.show_session,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        second = self.get(show_session_detail_url(self.show_session.id), first["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+
+    def test_unchanged_show_session_list_is_not_modified(self):
+        first = self.get(SHOW_SESSION_URL)
+
+        second = self.get(SHOW_SESSION_URL, first["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_object_has_no_etag(self):
+        response = self.get(show_session_detail_url(0), '"anything"')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("ETag", response)
@@ -0,0 +1,147 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from functools import partial
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.images import get_executor, image_variant_path, render_variants
+from planetarium.models import AstronomyShow
+from planetarium.tests.test_reservation_api import sample_show_session
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_file(width, height, mode="RGB", color=0):
+    file = io.BytesIO()
+    Image.new(mode, (width, height), color).save(file, format="PNG")
+    file.name = "poster.png"
+    file.seek(0)
+    return file
+
+
+class RenderVariantsTest(TestCase):
+    def test_variants_are_resized_and_not_upscaled(self):
+        data = image_file(800, 400, mode="P").getvalue()
+
+        variants = render_variants(data, (320, 640, 1280), ("webp", "jpeg"), 80)
+
+        self.assertEqual(
+            [(variant_format, width) for variant_format, width, _ in variants],
+            [
+                ("webp", 320), ("jpeg", 320),
+                ("webp", 640), ("jpeg", 640),
+                ("webp", 800), ("jpeg", 800),
+            ],
+        )
+        with Image.open(io.BytesIO(variants[0][2])) as image:
+            self.assertEqual((image.format, image.size), ("WEBP", (320, 160)))
+
+    def test_render_in_process_pool(self):
+        data = image_file(100, 50).getvalue()
+
+        future = get_executor(1).submit(
+            partial(render_variants, data, (40,), ("jpeg",), 80)
+        )
+
+        [(variant_format, width, encoded)] = future.result(timeout=60)
+        self.assertEqual((variant_format, width), ("jpeg", 40))
+        with Image.open(io.BytesIO(encoded)) as image:
+            self.assertEqual(image.size, (40, 20))
+
+    def test_variant_path(self):
+        self.assertEqual(
+            image_variant_path("uploads/shows/sun-1.png", "webp", 320),
+            "uploads/shows/variants/sun-1-320w.webp",
+        )
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    SHOW_IMAGE_WORKERS=0,
+    SHOW_IMAGE_VARIANT_WIDTHS=(160, 320),
+)
+class ImageVariantsApiTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_superuser("admin@test.com", "testpass")
+        )
+        self.show_session = sample_show_session()
+        self.show = self.show_session.astronomy_show
+
+    def upload(self, width=600, height=300, color=0):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("planetarium:astronomyshow-upload-image", args=[self.show.id]),
+                {"image": image_file(width, height, color=color)},
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.show.refresh_from_db()
+
+    def test_upload_generates_variants(self):
+        self.upload()
+
+        self.assertEqual(set(self.show.image_variants), {"webp", "jpeg"})
+        for names in self.show.image_variants.values():
+            self.assertEqual(set(names), {"160", "320"})
+            for name in names.values():
+                self.assertTrue(os.path.exists(os.path.join(MEDIA_ROOT, name)))
+
+    def test_variant_urls_in_list_responses(self):
+        self.upload()
+
+        response = self.client.get(reverse("planetarium:astronomyshow-list"))
+        variants = response.data[0]["image_variants"]
+        self.assertTrue(variants["webp"]["160"].startswith("http://testserver/media/"))
+        self.assertTrue(variants["webp"]["160"].endswith(".webp"))
+
+        response = self.client.get(reverse("planetarium:showsession-list"))
+        self.assertEqual(
+            response.data[0]["astronomy_show_image_variants"], variants
+        )
+
+    def test_new_upload_replaces_variants(self):
+        self.upload()
+        old_names = list(self.show.image_variants["jpeg"].values())
+
+        self.upload(width=200, height=100, color="white")
+
+        self.assertEqual(set(self.show.image_variants["jpeg"]), {"160", "200"})
+        for name in old_names:
+            self.assertFalse(os.path.exists(os.path.join(MEDIA_ROOT, name)))
+
+    def test_variants_of_replaced_image_are_dropped(self):
+        self.upload()
+        variants = self.show.image_variants
+        AstronomyShow.objects.filter(pk=self.show.pk).update(image="other.png")
+        [stale] = render_variants(
+            image_file(50, 50, color="red").getvalue(), (20,), ("jpeg",), 80
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AstronomyShow.save_image_variants(
+                self.show.pk, "uploads/shows/stale.png", [stale]
+            )
+
+        self.show.refresh_from_db()
+        self.assertEqual(self.show.image_variants, variants)
+        stale_name = f"{hashlib.sha256(stale[2]).hexdigest()}.jpg"
+        self.assertFalse(
+            os.path.exists(
+                os.path.join(MEDIA_ROOT, "uploads/shows/variants", stale_name)
+            )
+        )
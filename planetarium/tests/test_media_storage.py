@@ -0,0 +1,104 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from planetarium.models import AstronomyShow
+from planetarium.storage import ContentHashStorage, IMMUTABLE_CACHE_CONTROL
+
+POSTER = b"poster bytes" * 1000
+POSTER_NAME = f"uploads/shows/{hashlib.sha256(POSTER).hexdigest()}.jpg"
+
+
+class ContentHashStorageTest(TestCase):
+    def setUp(self) -> None:
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_root = override_settings(MEDIA_ROOT=self.media_root)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.storage = ContentHashStorage()
+
+    def path(self, name):
+        return os.path.join(self.media_root, name)
+
+    def test_same_content_is_stored_once(self):
+        first = self.storage.save("uploads/shows/a.JPG", ContentFile(POSTER))
+        second = self.storage.save("uploads/shows/b.jpg", ContentFile(POSTER))
+
+        self.assertEqual(first, POSTER_NAME)
+        self.assertEqual(second, POSTER_NAME)
+        self.assertEqual(
+            os.listdir(self.path("uploads/shows")), [os.path.basename(first)]
+        )
+
+    def test_reused_name_is_written_again(self):
+        first = self.show_with_poster("First")
+        # Released by another transaction before the second show commits.
+        os.remove(self.path(first.image.name))
+
+        second = self.show_with_poster("Second")
+
+        self.assertEqual(second.image.name, POSTER_NAME)
+        with open(self.path(POSTER_NAME), "rb") as poster:
+            self.assertEqual(poster.read(), POSTER)
+
+    def test_hashed_names_are_cached_forever(self):
+        self.assertEqual(
+            self.storage.cache_control(POSTER_NAME), IMMUTABLE_CACHE_CONTROL
+        )
+        self.assertIsNone(self.storage.cache_control("uploads/shows/sun-1.jpg"))
+
+    def show_with_poster(self, title):
+        show = AstronomyShow.objects.create(title=title, description="")
+        show.image.save("poster.jpg", ContentFile(POSTER))
+        return show
+
+    def test_shared_file_deleted_with_last_reference(self):
+        first = self.show_with_poster("First")
+        second = self.show_with_poster("Second")
+        self.assertEqual(first.image.name, second.image.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(os.path.exists(self.path(POSTER_NAME)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.image = "uploads/shows/other.jpg"
+            second.save()
+        self.assertFalse(os.path.exists(self.path(POSTER_NAME)))
+
+    def test_variant_references_keep_files(self):
+        show = self.show_with_poster("Show")
+        AstronomyShow.objects.create(
+            title="Variant",
+            description="",
+            image_variants={"jpeg": {"9": POSTER_NAME}},
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            show.delete()
+
+        self.assertTrue(os.path.exists(self.path(POSTER_NAME)))
+
+    def test_cleanup_media_deletes_orphans(self):
+        self.show_with_poster("Show")
+        orphan = self.storage.save("uploads/shows/variants/x.jpg", ContentFile(b"x"))
+        out = StringIO()
+
+        call_command("cleanup_media", "--dry-run", "--min-age", "0", stdout=out)
+        self.assertIn("Would delete 1 orphaned files.", out.getvalue())
+        self.assertTrue(os.path.exists(self.path(orphan)))
+
+        call_command("cleanup_media", "--min-age", "0", stdout=StringIO())
+        self.assertFalse(os.path.exists(self.path(orphan)))
+        self.assertTrue(os.path.exists(self.path(POSTER_NAME)))
+
+        self.storage.save("uploads/shows/variants/y.jpg", ContentFile(b"y"))
+        call_command("cleanup_media", stdout=out)
+        self.assertIn("Deleted 0 orphaned files.", out.getvalue())
@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+
+from planetarium.storage import IMMUTABLE_CACHE_CONTROL
+
+CONTENT = bytes(range(256)) * 40
+
+
+@override_settings(MEDIA_CACHE_MAX_AGE=600)
+class MediaViewTest(TestCase):
+    def setUp(self) -> None:
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_root = override_settings(MEDIA_ROOT=self.media_root)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.name = default_storage.save("uploads/shows/a.jpg", ContentFile(CONTENT))
+        self.url = f"/media/{self.name}"
+
+    def get(self, url=None, **headers):
+        return self.client.get(url or self.url, headers=headers)
+
+    def test_full_response_with_validators(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response["Content-Length"], str(len(CONTENT)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response["ETag"], f'"{self.name[14:-4]}"')
+        self.assertIn("Last-Modified", response)
+
+    def test_head(self):
+        response = self.client.head(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Length"], str(len(CONTENT)))
+        self.assertEqual(response.content, b"")
+
+    def test_not_modified(self):
+        etag = self.get()["ETag"]
+
+        response = self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+
+        modified = os.path.getmtime(os.path.join(self.media_root, self.name))
+        response = self.get(If_Modified_Since=http_date(modified))
+        self.assertEqual(response.status_code, 304)
+
+    def test_ranges(self):
+        cases = {
+            "bytes=10-19": (10, 19),
+            "bytes=10200-": (10200, len(CONTENT) - 1),
+            "bytes=-5": (len(CONTENT) - 5, len(CONTENT) - 1),
+            "bytes=10230-99999": (10230, len(CONTENT) - 1),
+        }
+        for header, (start, end) in cases.items():
+            with self.subTest(header):
+                response = self.get(Range=header)
+
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    response["Content-Range"], f"bytes {start}-{end}/{len(CONTENT)}"
+                )
+                self.assertEqual(response["Content-Length"], str(end - start + 1))
+                self.assertEqual(
+                    b"".join(response.streaming_content), CONTENT[start:end + 1]
+                )
+
+    def test_unsatisfiable_range(self):
+        response = self.get(Range=f"bytes={len(CONTENT)}-")
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(CONTENT)}")
+
+    def test_ignored_ranges(self):
+        for headers in (
+            {"Range": "bytes=0-1,5-6"},
+            {"Range": "bytes=9-1"},
+            {"Range": "bytes=0-1", "If-Range": '"stale"'},
+        ):
+            with self.subTest(headers):
+                response = self.get(**headers)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Length"], str(len(CONTENT)))
+
+        response = self.get(Range="bytes=0-1", If_Range=self.get()["ETag"])
+        self.assertEqual(response.status_code, 206)
+
+    def test_names_not_hashed_are_cached_briefly(self):
+        path = os.path.join(self.media_root, "uploads", "legacy.jpg")
+        with open(path, "wb") as legacy:
+            legacy.write(CONTENT)
+
+        response = self.get("/media/uploads/legacy.jpg")
+
+        self.assertEqual(response["Cache-Control"], "public, max-age=600")
+
+    def test_missing_hidden_and_outside_files(self):
+        open(os.path.join(self.media_root, "uploads", ".upload-x"), "w").close()
+        for url in (
+            "/media/uploads/missing.jpg",
+            "/media/uploads/.upload-x",
+            "/media/uploads/",
+            "/media/../manage.py",
+        ):
+            with self.subTest(url):
+                self.assertEqual(self.get(url).status_code, 404)
+
+    def test_only_safe_methods(self):
+        self.assertEqual(self.client.post(self.url).status_code, 405)
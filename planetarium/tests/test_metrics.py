@@ -0,0 +1,262 @@
+import os
+import tempfile
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import resolve, reverse
+from rest_framework import serializers, status
+from rest_framework.test import APIClient
+
+from planetarium import serializers as planetarium_serializers
+from planetarium.metrics import RESERVATIONS_CREATED, SEAT_CONFLICTS
+from planetarium.models import ShowSession
+from planetarium.serializers import ShowThemeSerializer
+from planetarium.tests.test_reservation_api import (
+    RESERVATION_URL,
+    sample_show_session,
+)
+from planetarium_service.metrics import (
+    REQUEST_DURATION,
+    REQUEST_QUERIES,
+    REQUEST_SERIALIZER_DURATION,
+    RESPONSE_SIZE,
+    EXITED_FILE,
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+    SerializerTimer,
+    mark_process_dead,
+    serializer_timer,
+)
+
+METRICS_URL = reverse("metrics")
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+
+
+def sample(metric, **labels):
+    """Current values of ``metric`` with ``labels`` in this process."""
+    key = tuple(str(labels[name]) for name in metric.label_names)
+    values = metric.registry.collect()[metric.name].get(key)
+    return values or [0.0] * metric.size
+
+
+def observations(histogram, **labels):
+    return sum(sample(histogram, **labels)[:-1])
+
+
+class ExpositionTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.registry = Registry()
+
+    def test_counter(self):
+        counter = Counter(
+            "jobs_total", "Jobs run.", ("queue",), registry=self.registry
+        )
+        counter.inc(queue="mail")
+        counter.inc(2, queue='say "hi"')
+
+        self.assertEqual(
+            self.registry.render(),
+            "# HELP jobs_total Jobs run.\n"
+            "# TYPE jobs_total counter\n"
+            'jobs_total{queue="mail"} 1\n'
+            'jobs_total{queue="say \\"hi\\""} 2\n',
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram(
+            "job_seconds", "Job time.", buckets=(0.5, 1), registry=self.registry
+        )
+        for value in (0.25, 0.5, 0.75, 3):
+            histogram.observe(value)
+
+        self.assertEqual(
+            self.registry.render().splitlines()[2:],
+            [
+                'job_seconds_bucket{le="0.5"} 2',
+                'job_seconds_bucket{le="1"} 3',
+                'job_seconds_bucket{le="+Inf"} 4',
+                "job_seconds_sum 4.5",
+                "job_seconds_count 4",
+            ],
+        )
+
+    def test_processes_are_summed(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        workers = [Registry(), Registry()]
+        for count, registry in enumerate(workers, start=1):
+            registry.open_file(directory.name)
+            counter = Counter("jobs_total", "Jobs run.", registry=registry)
+            counter.inc(count)
+        workers[1].flush()
+
+        self.assertIn("jobs_total 3\n", workers[0].render())
+
+    def test_exited_processes_are_folded_into_one_file(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        counter = Counter("jobs_total", "Jobs run.", registry=self.registry)
+        for count in (1, 2):
+            worker = Registry()
+            worker.open_file(directory.name)
+            Counter("jobs_total", "Jobs run.", registry=worker).inc(count)
+            worker.flush()
+            mark_process_dead(os.getpid(), directory.name)
+
+        self.registry.open_file(directory.name)
+        counter.inc(4)
+
+        self.assertEqual(os.listdir(directory.name), [EXITED_FILE])
+        self.assertIn("jobs_total 7\n", self.registry.render())
+
+
+class SerializerTimerTest(SimpleTestCase):
+    def test_only_timed_serializers_are_measured(self):
+        class PlainSerializer(serializers.Serializer):
+            name = serializers.CharField()
+
+        timer = SerializerTimer()
+        token = serializer_timer.set(timer)
+        self.addCleanup(serializer_timer.reset, token)
+
+        PlainSerializer({"name": "Planets"}).data
+        self.assertEqual(timer.duration, 0)
+        ShowThemeSerializer([{"id": 1, "name": "Planets"}], many=True).data
+        self.assertGreater(timer.duration, 0)
+
+
+class MetricsMiddlewareTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "testpass")
+        )
+        sample_show_session()
+
+    def test_request_metrics_are_recorded_per_view(self):
+        labels = {"view": "planetarium:showsession-list", "method": "GET"}
+        before = {
+            metric: observations(metric, **labels)
+            for metric in (REQUEST_DURATION, REQUEST_SERIALIZER_DURATION)
+        }
+        queries_before = sample(REQUEST_QUERIES, **labels)[-1]
+        size_before = sample(RESPONSE_SIZE, **labels)[-1]
+
+        response = self.client.get(SHOW_SESSION_URL)
+
+        for metric, count in before.items():
+            self.assertEqual(observations(metric, **labels), count + 1)
+        self.assertGreater(sample(REQUEST_SERIALIZER_DURATION, **labels)[-1], 0)
+        self.assertGreater(sample(REQUEST_QUERIES, **labels)[-1], queries_before)
+        self.assertEqual(
+            sample(RESPONSE_SIZE, **labels)[-1],
+            size_before + len(response.content),
+        )
+
+    async def test_async_middleware_counts_queries(self):
+        async def view(request):
+            await ShowSession.objects.acount()
+            return HttpResponse()
+
+        request = RequestFactory().get(SHOW_SESSION_URL)
+        request.resolver_match = resolve(SHOW_SESSION_URL)
+        labels = {"view": "planetarium:showsession-list", "method": "GET"}
+        queries_before = sample(REQUEST_QUERIES, **labels)[-1]
+
+        await MetricsMiddleware(view)(request)
+
+        self.assertEqual(sample(REQUEST_QUERIES, **labels)[-1], queries_before + 1)
+
+    def test_metrics_are_denied_by_default(self):
+        response = self.client.get(METRICS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_ALLOWED_NETWORKS=["127.0.0.0/8"])
+    def test_metrics_endpoint(self):
+        self.client.get(SHOW_SESSION_URL)
+
+        response = self.client.get(METRICS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            'http_requests_total{view="planetarium:showsession-list",'
+            'method="GET",status="200"}',
+            response.content.decode(),
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        response = self.client.get(METRICS_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION="Bearer secret"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BookingMetricsTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+
+    def reserve(self, seat):
+        tickets = [{"row": 1, "seat": seat, "show_session": self.show_session.id}]
+        return self.client.post(RESERVATION_URL, {"tickets": tickets}, format="json")
+
+    def test_reservations_and_conflicts_are_counted(self):
+        created = sample(RESERVATIONS_CREATED)[0]
+        conflicts = sample(SEAT_CONFLICTS, reason="sold")[0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.reserve(1).status_code, status.HTTP_201_CREATED)
+            response = self.reserve(1)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(sample(RESERVATIONS_CREATED)[0], created + 1)
+        self.assertEqual(sample(SEAT_CONFLICTS, reason="sold")[0], conflicts + 1)
+
+    def test_lost_race_is_counted_once_as_race(self):
+        self.reserve(1)
+        before = {
+            reason: sample(SEAT_CONFLICTS, reason=reason)[0]
+            for reason in ("sold", "race")
+        }
+        seat_conflicts = planetarium_serializers.seat_conflicts
+        calls = []
+
+        def miss_sold_seats_once(seats, **kwargs):
+            # As if the first booking had committed after validation.
+            calls.append(seats)
+            if len(calls) == 1:
+                return [None for _ in seats]
+            return seat_conflicts(seats, **kwargs)
+
+        with mock.patch.object(
+            planetarium_serializers,
+            "seat_conflicts",
+            side_effect=miss_sold_seats_once,
+        ):
+            response = self.reserve(1)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(sample(SEAT_CONFLICTS, reason="sold")[0], before["sold"])
+        self.assertEqual(sample(SEAT_CONFLICTS, reason="race")[0], before["race"] + 1)
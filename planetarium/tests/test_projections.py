@@ -0,0 +1,62 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from planetarium.models import AstronomyShow, ShowTheme, ShowSession
+from planetarium.serializers import (
+    AstronomyShowListSerializer,
+    AstronomyShowDetailSerializer,
+    ShowSessionListSerializer,
+)
+from planetarium.tests.test_reservation_api import sample_show_session
+
+
+class ProjectionSerializerTest(TestCase):
+    def setUp(self) -> None:
+        self.context = {"request": APIRequestFactory().get("/")}
+        planets = ShowTheme.objects.create(name="Planets")
+        stars = ShowTheme.objects.create(name="Stars")
+
+        first = sample_show_session()
+        first.astronomy_show.image = "uploads/shows/mars.jpg"
+        first.astronomy_show.save()
+        first.astronomy_show.themes.add(planets, stars)
+        second = sample_show_session(show_time="2022-06-03T18:30:00Z")
+        second.astronomy_show.themes.add(stars)
+        sample_show_session(astronomy_show=first.astronomy_show)
+
+    def assertSameOutput(self, serializer_class, queryset):
+        expected = serializer_class(queryset, many=True, context=self.context).data
+        with self.assertNumQueries(1):
+            projected = serializer_class(
+                serializer_class.project(queryset), many=True, context=self.context
+            ).data
+
+        self.assertEqual(projected, expected)
+
+    def test_show_session_list_matches_instances(self):
+        queryset = ShowSession.objects.with_tickets_available().select_related(
+            "astronomy_show", "planetarium_dome"
+        )
+
+        self.assertSameOutput(ShowSessionListSerializer, queryset)
+
+    def test_astronomy_show_list_matches_instances(self):
+        AstronomyShow.objects.create(title="No themes", description="Empty")
+        queryset = AstronomyShow.objects.prefetch_related("themes").order_by("id")
+
+        self.assertSameOutput(AstronomyShowListSerializer, queryset)
+
+    def test_themes_are_aggregated_per_show(self):
+        rows = AstronomyShowListSerializer.project(
+            AstronomyShow.objects.order_by("id")
+        )
+
+        self.assertEqual(
+            [sorted(row["projected_themes"] or []) for row in rows],
+            [["Planets", "Stars"], ["Stars"], []],
+        )
+
+    def test_nested_serializer_cannot_be_projected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            AstronomyShowDetailSerializer.project(AstronomyShow.objects.all())
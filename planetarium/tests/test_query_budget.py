@@ -0,0 +1,213 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.models import (
+    AstronomyShow,
+    ShowTheme,
+    PlanetariumDome,
+    ShowSession,
+    Reservation,
+    SeatHold,
+    HeldSeat,
+    Ticket,
+)
+from planetarium.tests.query_budget import QueryBudgetMixin
+from planetarium.tests.test_reservation_api import RESERVATION_URL
+from planetarium.urls import router
+from planetarium.views import CursorOrPageNumberPagination, ShowSessionViewSet
+from planetarium_service.instrumentation import QueryBudgetExceeded
+from user.cache import local_users
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Every GET endpoint of the planetarium router stays within budget.
+
+    The fixture has several related rows per object, so an N+1 query
+    pattern shows up as a budget overrun.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        themes = [ShowTheme.objects.create(name=f"Theme {i}") for i in range(3)]
+        domes = [
+            PlanetariumDome.objects.create(name=f"Dome {i}", rows=10, seats_in_row=10)
+            for i in range(3)
+        ]
+        sessions = []
+        for i in range(3):
+            show = AstronomyShow.objects.create(
+                title=f"Show {i}", description="Description"
+            )
+            show.themes.set(themes)
+            for dome in domes:
+                sessions.append(
+                    ShowSession.objects.create(
+                        astronomy_show=show,
+                        planetarium_dome=dome,
+                        show_time=f"2022-06-0{i + 1}T10:00:00Z",
+                    )
+                )
+        for session in sessions[:3]:
+            reservation = Reservation.objects.create(user=cls.user)
+            for seat in range(1, 4):
+                Ticket.objects.create(
+                    row=1, seat=seat, show_session=session, reservation=reservation
+                )
+        cls.hold = SeatHold.objects.create(
+            user=cls.user,
+            show_session=sessions[0],
+            expires_at="2100-01-01T00:00:00Z",
+        )
+        for seat in range(4, 7):
+            HeldSeat.objects.create(
+                row=1, seat=seat, show_session=sessions[0], hold=cls.hold
+            )
+
+    def setUp(self) -> None:
+        local_users.clear()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def lookup_value(self, viewset, lookup_field):
+        if viewset.queryset.model is SeatHold:
+            return getattr(self.hold, lookup_field)
+        return getattr(viewset.queryset.model.objects.first(), lookup_field)
+
+    def test_get_endpoints_within_query_budget(self):
+        checked = set()
+        for pattern in router.urls:
+            actions = getattr(pattern.callback, "actions", None)
+            if not actions or "get" not in actions or pattern.name in checked:
+                continue
+            checked.add(pattern.name)
+
+            viewset = pattern.callback.cls
+            kwargs = {
+                name: self.lookup_value(viewset, viewset.lookup_field)
+                for name in pattern.pattern.regex.groupindex
+                if name != "format"
+            }
+            with self.subTest(pattern.name):
+                url = reverse(f"planetarium:{pattern.name}", kwargs=kwargs)
+                response = self.assertWithinQueryBudget("get", url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertIn("showsession-list", checked)
+
+    def test_pagination_modes_within_query_budget(self):
+        checked = set()
+        for pattern in router.urls:
+            actions = getattr(pattern.callback, "actions", None)
+            viewset = getattr(pattern.callback, "cls", None)
+            if (
+                not actions
+                or actions.get("get") != "list"
+                or viewset.pagination_class is None
+                or pattern.name in checked
+            ):
+                continue
+            checked.add(pattern.name)
+
+            modes = [{"page": 1}, {"page": 2}]
+            if issubclass(viewset.pagination_class, CursorOrPageNumberPagination):
+                modes.append({"cursor": ""})
+            url = reverse(f"planetarium:{pattern.name}")
+            for params in modes:
+                with self.subTest(pattern.name, **params):
+                    local_users.clear()
+                    response = self.assertWithinQueryBudget("get", url, data=params)
+                    self.assertIn(
+                        response.status_code,
+                        (status.HTTP_200_OK, status.HTTP_404_NOT_FOUND),
+                    )
+
+        self.assertIn("showsession-list", checked)
+        self.assertIn("reservation-list", checked)
+
+    def test_reservation_create_within_query_budget(self):
+        session = ShowSession.objects.last()
+        tickets = [
+            {"row": 2, "seat": seat, "show_session": session.id}
+            for seat in range(1, 11)
+        ]
+
+        response = self.assertWithinQueryBudget(
+            "post", RESERVATION_URL, data={"tickets": tickets}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_schedule_import_within_query_budget(self):
+        admin = get_user_model().objects.create_superuser(
+            "admin@test.com", "testpass"
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(admin)}"
+        )
+        rule = {
+            "astronomy_show": AstronomyShow.objects.first().id,
+            "planetarium_dome": PlanetariumDome.objects.first().id,
+            "weekdays": ["mon", "thu"],
+            "times": ["14:00", "18:00"],
+            "date_from": "2022-07-04",
+            "date_to": "2022-07-17",
+        }
+        rows = [
+            {
+                "astronomy_show": rule["astronomy_show"],
+                "planetarium_dome": rule["planetarium_dome"],
+                "show_time": f"2022-08-0{day}T10:00:00Z",
+            }
+            for day in range(1, 4)
+        ]
+
+        for data in (rule, rows):
+            with self.subTest(type(data).__name__):
+                response = self.assertWithinQueryBudget(
+                    "post",
+                    reverse("planetarium:showsession-import-schedule"),
+                    data=data,
+                    format="json",
+                )
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_exceeded_budget_raises_under_test(self):
+        with mock.patch.object(ShowSessionViewSet, "query_budget", {"list": 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse("planetarium:showsession-list"))
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_exceeded_budget_logs_a_warning(self):
+        with mock.patch.object(ShowSessionViewSet, "query_budget", {"list": 1}):
+            with self.assertLogs(
+                "planetarium_service.instrumentation", "WARNING"
+            ) as logs:
+                response = self.client.get(reverse("planetarium:showsession-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("over its budget of 1", logs.output[0])
+
+    @override_settings(QUERY_COUNT_HEADERS=True)
+    def test_query_count_headers(self):
+        response = self.client.get(reverse("planetarium:showsession-list"))
+
+        self.assertEqual(response["X-DB-Query-Count"], "3")
+        self.assertIn("X-DB-Time-Ms", response)
+
+    @override_settings(QUERY_COUNT_HEADERS=False)
+    def test_no_query_count_headers_when_disabled(self):
+        response = self.client.get(reverse("planetarium:showsession-list"))
+
+        self.assertNotIn("X-DB-Query-Count", response)
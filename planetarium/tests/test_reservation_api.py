@@ -0,0 +1,237 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
+
+RESERVATION_URL = reverse("planetarium:reservation-list")
+
+
+def sample_show_session(**params):
+    astronomy_show = AstronomyShow.objects.create(
+        title="TestShow",
+        description="TestDescription",
+    )
+    planetarium_dome = PlanetariumDome.objects.create(
+        name="TestDome",
+        rows=10,
+        seats_in_row=10,
+    )
+    defaults = {
+        "astronomy_show": astronomy_show,
+        "planetarium_dome": planetarium_dome,
+        "show_time": "2022-06-02T14:00:00Z",
+    }
+    defaults.update(params)
+
+    return ShowSession.objects.create(**defaults)
+
+
+class ReservationCreateApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+
+    def ticket(self, row, seat, show_session=None):
+        show_session = show_session or self.show_session
+        return {"row": row, "seat": seat, "show_session": show_session.id}
+
+    def test_create_reservation_with_many_tickets(self):
+        tickets = [self.ticket(row, seat) for row in range(1, 6) for seat in (1, 2)]
+
+        response = self.client.post(
+            RESERVATION_URL, {"tickets": tickets}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["tickets"]), 10)
+        self.assertEqual(
+            Ticket.objects.filter(reservation__user=self.user).count(), 10
+        )
+
+    def test_query_count_does_not_grow_with_tickets(self):
+        other_session = sample_show_session()
+        payload = {
+            "tickets": [self.ticket(1, seat) for seat in range(1, 3)]
+        }
+        big_payload = {
+            "tickets": [self.ticket(2, seat) for seat in range(1, 11)]
+            + [self.ticket(3, seat, other_session) for seat in range(1, 11)]
+        }
+
+        with self.assertNumQueries(10):
+            self.client.post(RESERVATION_URL, payload, format="json")
+        with self.assertNumQueries(10):
+            self.client.post(RESERVATION_URL, big_payload, format="json")
+
+    def test_seat_out_of_dome_range(self):
+        response = self.client.post(
+            RESERVATION_URL,
+            {"tickets": [self.ticket(1, 1), self.ticket(11, 1)]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["tickets"][0], {})
+        self.assertIn("row", response.data["tickets"][1])
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_seat_already_taken(self):
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1, seat=1, show_session=self.show_session, reservation=reservation
+        )
+
+        response = self.client.post(
+            RESERVATION_URL,
+            {"tickets": [self.ticket(1, 2), self.ticket(1, 1)]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["tickets"][0], {})
+        self.assertEqual(
+            response.data["tickets"][1]["non_field_errors"][0].code, "unique"
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_same_seat_twice_in_request(self):
+        response = self.client.post(
+            RESERVATION_URL,
+            {"tickets": [self.ticket(1, 1), self.ticket(1, 1)]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["tickets"][0], {})
+        self.assertIn("non_field_errors", response.data["tickets"][1])
+
+    def test_unknown_show_session(self):
+        response = self.client.post(
+            RESERVATION_URL,
+            {"tickets": [{"row": 1, "seat": 1, "show_session": 999}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("show_session", response.data["tickets"][0])
+
+
+class ReservationHistoryApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+        self.other_session = sample_show_session()
+        for show_session in (self.show_session, self.other_session):
+            Reservation.create_with_tickets(
+                [
+                    {"show_session": show_session, "row": row, "seat": seat}
+                    for row in (2, 1)
+                    for seat in (1, 2)
+                ],
+                user=self.user,
+            )
+        Reservation.create_with_tickets(
+            [{"show_session": self.show_session, "row": 3, "seat": 1}],
+            user=self.user,
+        )
+
+    def test_tickets_reference_show_sessions_listed_once(self):
+        response = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first = response.data["results"][0]
+        self.assertEqual(
+            first["tickets"][0],
+            {
+                "id": first["tickets"][0]["id"],
+                "row": 1,
+                "seat": 1,
+                "show_session": self.show_session.id,
+            },
+        )
+        self.assertEqual(
+            [(ticket["row"], ticket["seat"]) for ticket in first["tickets"]],
+            [(1, 1), (1, 2), (2, 1), (2, 2)],
+        )
+        sessions = response.data["show_sessions"]
+        self.assertEqual(
+            [session["id"] for session in sessions],
+            [self.show_session.id, self.other_session.id],
+        )
+        self.assertEqual(sessions[0]["astronomy_show_title"], "TestShow")
+        self.assertEqual(sessions[0]["tickets_available"], 95)
+
+    def test_history_is_read_with_one_joined_query_per_page(self):
+        # The page of reservations and the joined tickets.
+        with self.assertNumQueries(2):
+            response = self.client.get(RESERVATION_URL, {"cursor": ""})
+
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(len(response.data["show_sessions"]), 2)
+
+    def test_history_pages_follow_cursor(self):
+        response = self.client.get(RESERVATION_URL, {"cursor": ""})
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(len(response.data["show_sessions"]), 2)
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(
+            [session["id"] for session in response.data["show_sessions"]],
+            [self.show_session.id],
+        )
+
+    def test_history_is_paged_by_number_by_default(self):
+        response = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(response["Deprecation"], "true")
+        self.assertEqual(
+            response["Link"],
+            f'<http://testserver{RESERVATION_URL}?cursor=>; rel="alternate"',
+        )
+
+    def test_explicit_pagination_is_not_deprecated(self):
+        for params in ({"cursor": ""}, {"page": 1}):
+            response = self.client.get(RESERVATION_URL, params)
+
+            self.assertNotIn("Deprecation", response)
+
+    def test_reservation_without_tickets(self):
+        Reservation.objects.filter(user=self.user).delete()
+        reservation = Reservation.objects.create(user=self.user)
+
+        response = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(response.data["results"][0]["id"], reservation.id)
+        self.assertEqual(response.data["results"][0]["tickets"], [])
+        self.assertEqual(response.data["show_sessions"], [])
+
+    def test_other_users_reservations_hidden(self):
+        other = get_user_model().objects.create_user("other@test.com", "testpass")
+        self.client.force_authenticate(other)
+
+        response = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(response.data["results"], [])
+        self.assertEqual(response.data["show_sessions"], [])
@@ -0,0 +1,175 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import ShowSession
+from planetarium.tests.test_reservation_api import sample_show_session
+
+IMPORT_URL = reverse("planetarium:showsession-import-schedule")
+
+
+class ScheduleImportTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.admin)
+        # Booked 2022-06-02 14:00 UTC.
+        self.booked = sample_show_session()
+        self.show_id = self.booked.astronomy_show_id
+        self.dome_id = self.booked.planetarium_dome_id
+
+    def row(self, show_time, **params):
+        return {
+            "astronomy_show": self.show_id,
+            "planetarium_dome": self.dome_id,
+            "show_time": show_time,
+            **params,
+        }
+
+    def test_import_requires_admin(self):
+        user = get_user_model().objects.create_user("test@test.com", "testpass")
+        self.client.force_authenticate(user)
+
+        response = self.client.post(IMPORT_URL, [], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_reports_row_errors_without_aborting(self):
+        rows = [
+            self.row("2022-06-03T10:00:00Z"),
+            self.row("2022-06-02T14:30:00Z"),
+            self.row("2022-06-03T10:45:00Z"),
+            self.row("2022-06-03T12:00:00Z", planetarium_dome=0),
+            self.row("not a date"),
+            self.row("2022-06-03T12:00:00Z"),
+        ]
+
+        response = self.client.post(IMPORT_URL, rows, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["created"]), 2)
+        self.assertEqual(
+            [error["index"] for error in response.data["errors"]], [1, 2, 3, 4]
+        )
+        self.assertIn("show_time", response.data["errors"][0]["errors"])
+        self.assertIn("planetarium_dome", response.data["errors"][2]["errors"])
+        self.assertEqual(ShowSession.objects.count(), 3)
+
+    def test_import_csv(self):
+        body = (
+            "astronomy_show,planetarium_dome,show_time\n"
+            f"{self.show_id},{self.dome_id},2022-06-04T10:00:00Z\n"
+            f"{self.show_id},{self.dome_id},2022-06-04T11:00:00Z\n"
+        )
+
+        response = self.client.post(IMPORT_URL, body, content_type="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["created"]), 2)
+
+    def test_import_csv_without_columns(self):
+        response = self.client.post(
+            IMPORT_URL, "show,time\n1,2\n", content_type="text/csv"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_recurrence_rule(self):
+        rule = {
+            "astronomy_show": self.show_id,
+            "planetarium_dome": self.dome_id,
+            "weekdays": ["mon", "thu"],
+            "times": ["14:00", "18:00"],
+            "date_from": "2022-05-30",
+            "date_to": "2022-06-12",
+        }
+
+        # The show and dome of the rule, slot conflicts and a savepointed
+        # insert.
+        with self.assertNumQueries(6):
+            response = self.client.post(IMPORT_URL, rule, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # 4 days x 2 times, minus Thursday 2022-06-02 14:00 already booked.
+        self.assertEqual(len(response.data["created"]), 7)
+        self.assertEqual(response.data["errors"][0]["index"], 2)
+        self.assertEqual(
+            ShowSession.objects.get(pk=response.data["created"][0]).show_time,
+            datetime(2022, 5, 30, 14, tzinfo=dt_timezone.utc),
+        )
+
+    def test_recurrence_rule_validation(self):
+        rule = {
+            "astronomy_show": self.show_id,
+            "planetarium_dome": self.dome_id,
+            "weekdays": ["someday"],
+            "times": ["14:00"],
+            "date_from": "2022-06-12",
+            "date_to": "2022-05-30",
+        }
+
+        response = self.client.post(IMPORT_URL, rule, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("weekdays", response.data)
+
+    def test_slot_conflicts_in_one_query(self):
+        other = sample_show_session(
+            show_time=datetime(2022, 6, 2, 14, tzinfo=dt_timezone.utc)
+        )
+        slots = [
+            (self.dome_id, datetime(2022, 6, 2, 13, 30, tzinfo=dt_timezone.utc)),
+            (self.dome_id, datetime(2022, 6, 2, 15, tzinfo=dt_timezone.utc)),
+            (other.planetarium_dome_id, other.show_time),
+        ]
+
+        with self.assertNumQueries(1):
+            conflicts = ShowSession.find_slot_conflicts(slots)
+
+        self.assertEqual(conflicts, {slots[0], slots[2]})
+
+    def test_import_schedule_command(self):
+        rows = [self.row("2022-06-05T10:00:00Z"), self.row("2022-06-02T14:00:00Z")]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "schedule.json")
+            with open(path, "w") as schedule:
+                json.dump(rows, schedule)
+            out, err = StringIO(), StringIO()
+
+            call_command("import_schedule", path, stdout=out, stderr=err)
+
+        self.assertIn("Created 1 show sessions, 1 rows rejected.", out.getvalue())
+        self.assertIn("Row 1", err.getvalue())
+
+    def test_import_schedule_command_recurrence(self):
+        out = StringIO()
+
+        call_command(
+            "import_schedule",
+            "--show", str(self.show_id),
+            "--dome", str(self.dome_id),
+            "--weekdays", "sat,sun",
+            "--times", "10:00,12:00",
+            "--date-from", "2022-06-01",
+            "--date-to", "2022-06-07",
+            "--batch-size", "3",
+            stdout=out,
+        )
+
+        self.assertIn("Created 4 show sessions", out.getvalue())
+
+    def test_import_schedule_command_rejects_bad_rule(self):
+        with self.assertRaises(CommandError):
+            call_command("import_schedule", "--show", "1", stdout=StringIO())
@@ -0,0 +1,249 @@
+import asyncio
+import json
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.events import (
+    CLOSED,
+    LocalBroker,
+    ReleaseTimers,
+    get_broker,
+    release_timers,
+    seat_event_stream,
+)
+from planetarium.models import (
+    Reservation,
+    SeatHold,
+    HeldSeat,
+    ShowSession,
+    Ticket,
+)
+from planetarium.tests.test_reservation_api import sample_show_session
+
+
+def events_url(show_session_id):
+    return reverse("planetarium:showsession-events", args=[show_session_id])
+
+
+def parse_event(chunk):
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode()
+    fields = dict(
+        line.split(": ", 1) for line in chunk.strip().splitlines() if ": " in line
+    )
+    return fields["event"], json.loads(fields["data"])
+
+
+class LocalBrokerTest(TestCase):
+    async def test_publish_reaches_subscribers_of_channel(self):
+        broker = LocalBroker(queue_size=10)
+
+        async with broker.subscribe("a") as first, broker.subscribe("a") as second:
+            async with broker.subscribe("b") as other:
+                await sync_to_async(broker.publish, thread_sensitive=False)(
+                    "a", {"seat": 1}
+                )
+
+                self.assertEqual(await asyncio.wait_for(first.get(), 1), {"seat": 1})
+                self.assertEqual(await asyncio.wait_for(second.get(), 1), {"seat": 1})
+                self.assertTrue(other.empty())
+
+        self.assertEqual(broker.subscribers, {})
+
+    async def test_slow_subscriber_is_closed(self):
+        broker = LocalBroker(queue_size=2)
+
+        async with broker.subscribe("a") as queue:
+            for seat in range(3):
+                broker.publish("a", {"seat": seat})
+            await asyncio.sleep(0)
+
+            self.assertIs(await asyncio.wait_for(queue.get(), 1), CLOSED)
+
+
+class SeatEventsApiTest(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.show_session = sample_show_session()
+        self.reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.show_session,
+            reservation=self.reservation,
+        )
+
+    def book(self, *seats):
+        with self.captureOnCommitCallbacks(execute=True):
+            Reservation.create_with_tickets(
+                [
+                    {"show_session": self.show_session, "row": row, "seat": seat}
+                    for row, seat in seats
+                ],
+                user=self.user,
+            )
+
+    def release_hold(self, hold):
+        with self.captureOnCommitCallbacks(execute=True):
+            hold.delete()
+
+    @override_settings(SEAT_EVENTS_MAX_AGE=2)
+    async def test_stream_sends_snapshot_then_changes(self):
+        hold = await SeatHold.objects.acreate(
+            user=self.user,
+            show_session=self.show_session,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        await HeldSeat.objects.acreate(
+            row=2, seat=2, show_session=self.show_session, hold=hold
+        )
+        response = await self.async_client.get(
+            events_url(self.show_session.id), headers=self.headers
+        )
+        stream = response.streaming_content
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertTrue((await anext(stream)).startswith(b"retry: "))
+        self.assertEqual(
+            parse_event(await anext(stream)),
+            (
+                "snapshot",
+                {"show_session": self.show_session.id, "taken": [[1, 1], [2, 2]]},
+            ),
+        )
+
+        await sync_to_async(self.book)((3, 1), (3, 2))
+        await sync_to_async(self.release_hold)(hold)
+
+        self.assertEqual(
+            parse_event(await asyncio.wait_for(anext(stream), 1)),
+            (
+                "seats",
+                {
+                    "show_session": self.show_session.id,
+                    "taken": [[3, 1], [3, 2]],
+                    "released": [],
+                },
+            ),
+        )
+        self.assertEqual(
+            parse_event(await asyncio.wait_for(anext(stream), 1))[1]["released"],
+            [[2, 2]],
+        )
+        self.assertEqual(await asyncio.wait_for(anext(stream), 3), b": keepalive\n\n")
+        with self.assertRaises(StopAsyncIteration):
+            await asyncio.wait_for(anext(stream), 3)
+        self.assertEqual(get_broker().subscribers, {})
+
+    @override_settings(SEAT_EVENTS_MAX_AGE=2)
+    async def test_stream_releases_expired_holds(self):
+        hold = await SeatHold.objects.acreate(
+            user=self.user,
+            show_session=self.show_session,
+            expires_at=timezone.now() + timedelta(seconds=0.5),
+        )
+        await HeldSeat.objects.acreate(
+            row=2, seat=2, show_session=self.show_session, hold=hold
+        )
+        # The test transaction never commits, so publish right away.
+        on_commit = mock.patch.object(
+            transaction, "on_commit", side_effect=lambda func, *args: func()
+        )
+        on_commit.start()
+        self.addCleanup(on_commit.stop)
+        streams = []
+
+        def record_stream(*args):
+            streams.append(seat_event_stream(*args))
+            return streams[-1]
+
+        with mock.patch(
+            "planetarium.views.seat_event_stream", side_effect=record_stream
+        ):
+            response = await self.async_client.get(
+                events_url(self.show_session.id), headers=self.headers
+            )
+        stream = response.streaming_content
+        await anext(stream)
+
+        snapshot = parse_event(await anext(stream))
+
+        self.assertEqual(snapshot[1]["taken"], [[1, 1], [2, 2]])
+        self.assertEqual(
+            parse_event(await asyncio.wait_for(anext(stream), 1))[1]["released"],
+            [[2, 2]],
+        )
+        self.assertFalse(await SeatHold.objects.filter(pk=hold.pk).aexists())
+        # streaming_content only wraps the stream, which has to be closed
+        # itself to leave its subscriptions.
+        await streams[0].aclose()
+        self.assertEqual(release_timers.tasks, {})
+        self.assertEqual(get_broker().subscribers, {})
+
+    async def test_streams_of_a_session_share_one_timer(self):
+        timers = ReleaseTimers()
+        calls = []
+
+        async def release_expired_holds():
+            calls.append(self.show_session.id)
+
+        async with timers.watch(self.show_session.id, release_expired_holds):
+            async with timers.watch(self.show_session.id, release_expired_holds):
+                for _ in range(3):
+                    await asyncio.sleep(0)
+                self.assertEqual(len(timers.tasks), 1)
+
+        self.assertEqual(calls, [self.show_session.id])
+        self.assertEqual(timers.tasks, {})
+
+    def test_sweep_publishes_released_seats_once(self):
+        hold = SeatHold.objects.create(
+            user=self.user,
+            show_session=self.show_session,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        for seat in (2, 3):
+            HeldSeat.objects.create(
+                row=2, seat=seat, show_session=self.show_session, hold=hold
+            )
+        version = ShowSession.objects.get().version
+
+        with mock.patch.object(get_broker(), "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(SeatHold.sweep_expired(), 3)
+                self.assertEqual(SeatHold.sweep_expired(), 0)
+
+        publish.assert_called_once_with(
+            f"show_session:{self.show_session.id}",
+            {
+                "show_session": self.show_session.id,
+                "taken": [],
+                "released": [(2, 2), (2, 3)],
+            },
+        )
+        self.assertEqual(ShowSession.objects.get().version, version + 1)
+
+    def test_wsgi_sends_snapshot_and_retry(self):
+        response = APIClient().get(
+            events_url(self.show_session.id), headers=self.headers
+        )
+        content = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("retry: ", content)
+        self.assertIn("event: snapshot", content)
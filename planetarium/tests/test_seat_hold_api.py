@@ -0,0 +1,169 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import SeatHold, HeldSeat, Ticket
+from planetarium.tests.test_reservation_api import (
+    RESERVATION_URL,
+    sample_show_session,
+)
+
+SEAT_HOLD_URL = reverse("planetarium:seathold-list")
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+
+
+def confirm_url(token):
+    return reverse("planetarium:seathold-confirm", args=[token])
+
+
+class SeatHoldApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.other_user = get_user_model().objects.create_user(
+            "other@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+
+    def hold(self, *seats):
+        return self.client.post(
+            SEAT_HOLD_URL,
+            {
+                "show_session": self.show_session.id,
+                "seats": [{"row": row, "seat": seat} for row, seat in seats],
+            },
+            format="json",
+        )
+
+    def test_hold_seats(self):
+        response = self.hold((1, 1), (1, 2))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn("token", response.data)
+        self.assertEqual(HeldSeat.objects.count(), 2)
+
+    def test_held_seats_reduce_tickets_available(self):
+        self.hold((1, 1), (1, 2))
+
+        response = self.client.get(SHOW_SESSION_URL)
+
+        self.assertEqual(response.data[0]["tickets_available"], 98)
+
+    def test_held_seat_cannot_be_held_or_reserved_by_others(self):
+        self.hold((1, 1))
+        self.client.force_authenticate(self.other_user)
+
+        hold_response = self.hold((1, 2), (1, 1))
+        reservation_response = self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": 1, "seat": 1, "show_session": self.show_session.id}
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(hold_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(hold_response.data["seats"][0], {})
+        self.assertIn("non_field_errors", hold_response.data["seats"][1])
+        self.assertEqual(
+            reservation_response.status_code, status.HTTP_400_BAD_REQUEST
+        )
+
+    def test_seat_sold_after_validation_is_not_held(self):
+        reservation_response = self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": 1, "seat": 2, "show_session": self.show_session.id}
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(
+            reservation_response.status_code, status.HTTP_201_CREATED
+        )
+
+        # As if the reservation had committed after validate() ran.
+        with mock.patch(
+            "planetarium.serializers.seat_conflicts",
+            side_effect=lambda seats, **kwargs: [None for _ in seats],
+        ):
+            response = self.hold((1, 1), (1, 2))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["seats"][0], {})
+        self.assertEqual(
+            response.data["seats"][1]["non_field_errors"][0].code, "unique"
+        )
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_repeated_seat_is_rejected(self):
+        response = self.hold((1, 1), (1, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["seats"][0], {})
+        self.assertIn("non_field_errors", response.data["seats"][1])
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_hold_seat_out_of_dome_range(self):
+        response = self.hold((1, 11))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("seat", response.data["seats"][0])
+
+    def test_confirm_hold(self):
+        token = self.hold((2, 3), (2, 4)).data["token"]
+
+        response = self.client.post(confirm_url(token))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["tickets"]), 2)
+        self.assertEqual(Ticket.objects.count(), 2)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_confirm_hold_of_other_user(self):
+        token = self.hold((2, 3)).data["token"]
+        self.client.force_authenticate(self.other_user)
+
+        response = self.client.post(confirm_url(token))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_expired_hold(self):
+        token = self.hold((1, 1)).data["token"]
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        confirm_response = self.client.post(confirm_url(token))
+        hold_response = self.hold((1, 1))
+
+        self.assertEqual(
+            confirm_response.status_code, status.HTTP_404_NOT_FOUND
+        )
+        self.assertEqual(hold_response.status_code, status.HTTP_201_CREATED)
+
+    def test_sweep_seat_holds_command(self):
+        self.hold((1, 1))
+        self.hold((1, 2))
+        SeatHold.objects.filter(seats__seat=1).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        call_command("sweep_seat_holds", stdout=StringIO())
+
+        self.assertEqual(SeatHold.objects.count(), 1)
+        self.assertEqual(HeldSeat.objects.get().seat, 2)
@@ -0,0 +1,421 @@
+import base64
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    HeldSeat,
+    PlanetariumDome,
+    Reservation,
+    SeatHold,
+    ShowSession,
+    Ticket,
+)
+from planetarium.seating import best_available, free_intervals
+from planetarium.tests.test_reservation_api import (
+    RESERVATION_URL,
+    sample_show_session,
+)
+
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+
+
+def seat_map_url(show_session_id):
+    return reverse("planetarium:showsession-seat-map", args=[show_session_id])
+
+
+def best_available_url(show_session_id):
+    return reverse(
+        "planetarium:showsession-best-available", args=[show_session_id]
+    )
+
+
+class ShowSessionSeatMapApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+        reservation = Reservation.objects.create(user=self.user)
+        for row, seat in [(1, 1), (1, 2), (2, 10)]:
+            Ticket.objects.create(
+                row=row,
+                seat=seat,
+                show_session=self.show_session,
+                reservation=reservation,
+            )
+
+    def test_seat_map_base64(self):
+        response = self.client.get(seat_map_url(self.show_session.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rows"], 10)
+        self.assertEqual(response.data["seats_in_row"], 10)
+
+        bitmap = base64.b64decode(response.data["taken"])
+        self.assertEqual(len(bitmap), 13)
+        self.assertEqual(bitmap[0], 0b11000000)
+        self.assertEqual(bitmap[2], 0b00010000)
+        self.assertEqual(sum(bin(byte).count("1") for byte in bitmap), 3)
+
+    def test_seat_map_run_length(self):
+        response = self.client.get(
+            seat_map_url(self.show_session.id), {"encoding": "rle"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["taken"], [0, 2, 17, 1, 80])
+
+    def test_seat_map_unknown_encoding(self):
+        response = self.client.get(
+            seat_map_url(self.show_session.id), {"encoding": "png"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_seat_map_not_found(self):
+        response = self.client.get(seat_map_url(self.show_session.id + 1))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ShowSessionTicketsSoldTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+
+    def test_reservation_updates_tickets_sold(self):
+        self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": 1, "seat": seat, "show_session": self.show_session.id}
+                    for seat in range(1, 4)
+                ]
+            },
+            format="json",
+        )
+        self.show_session.refresh_from_db()
+
+        response = self.client.get(SHOW_SESSION_URL)
+
+        self.assertEqual(self.show_session.tickets_sold, 3)
+        self.assertEqual(response.data[0]["tickets_available"], 97)
+
+    def test_deleted_reservation_releases_tickets(self):
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1, seat=1, show_session=self.show_session, reservation=reservation
+        )
+
+        reservation.delete()
+        self.show_session.refresh_from_db()
+
+        self.assertEqual(self.show_session.tickets_sold, 0)
+
+    def test_deleted_user_releases_tickets(self):
+        user = get_user_model().objects.create_user("other@test.com", "testpass")
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=user),
+        )
+
+        user.delete()
+        self.show_session.refresh_from_db()
+
+        self.assertEqual(self.show_session.tickets_sold, 0)
+
+    def test_deleted_tickets_are_counted_in_one_update(self):
+        other_session = sample_show_session()
+        reservation = Reservation.objects.create(user=self.user)
+        for show_session in (self.show_session, other_session):
+            for seat in (1, 2):
+                Ticket.objects.create(
+                    row=1,
+                    seat=seat,
+                    show_session=show_session,
+                    reservation=reservation,
+                )
+        Ticket.objects.create(
+            row=2,
+            seat=1,
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            reservation.delete()
+        Ticket.objects.filter(row=2).delete()
+
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "planetarium_showsession"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            sorted(ShowSession.objects.values_list("tickets_sold", flat=True)),
+            [0, 0],
+        )
+
+    def test_reconcile_tickets_sold_command(self):
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1, seat=1, show_session=self.show_session, reservation=reservation
+        )
+        ShowSession.objects.update(tickets_sold=42)
+
+        call_command("reconcile_tickets_sold", stdout=StringIO())
+        self.show_session.refresh_from_db()
+
+        self.assertEqual(self.show_session.tickets_sold, 1)
+
+
+class BestAvailableSeatsTest(TestCase):
+    def test_free_intervals(self):
+        intervals = free_intervals(2, 5, [(1, 2), (1, 3), (2, 5)])
+
+        self.assertEqual(intervals, {1: [(1, 1), (4, 5)], 2: [(1, 4)]})
+
+    def test_center_block(self):
+        seats = best_available(5, 10, [], 2)
+
+        self.assertEqual(seats, [(3, 5), (3, 6)])
+
+    def test_rear_block_skips_taken_seats(self):
+        taken = [(5, seat) for seat in range(3, 9)]
+
+        seats = best_available(5, 10, taken, 3, prefer="rear")
+
+        self.assertEqual(seats, [(4, 4), (4, 5), (4, 6)])
+
+    def test_split_party_only_when_allowed(self):
+        taken = [(row, seat) for row in (1, 2) for seat in (2, 4)]
+
+        self.assertIsNone(best_available(2, 5, taken, 2))
+        self.assertEqual(
+            best_available(2, 5, taken, 2, same_row=False), [(1, 3), (2, 3)]
+        )
+
+
+class BestAvailableApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+
+    def test_reserve_best_available(self):
+        response = self.client.post(
+            best_available_url(self.show_session.id),
+            {"party_size": 4},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(ticket["row"], ticket["seat"]) for ticket in response.data["tickets"]],
+            [(5, 4), (5, 5), (5, 6), (5, 7)],
+        )
+
+    def test_reserve_best_available_avoids_taken_seats(self):
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=5, seat=5, show_session=self.show_session, reservation=reservation
+        )
+
+        response = self.client.post(
+            best_available_url(self.show_session.id),
+            {"party_size": 2},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(ticket["row"], ticket["seat"]) for ticket in response.data["tickets"]],
+            [(6, 5), (6, 6)],
+        )
+
+    def test_party_too_big(self):
+        response = self.client.post(
+            best_available_url(self.show_session.id),
+            {"party_size": 11},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Reservation.objects.exists())
+
+    @override_settings(BEST_AVAILABLE_MAX_PARTY_SIZE=6)
+    def test_party_size_limit(self):
+        response = self.client.post(
+            best_available_url(self.show_session.id),
+            {"party_size": 7},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("party_size", response.data)
+
+    def test_seats_held_after_the_search_are_picked_again(self):
+        hold = SeatHold.objects.create(
+            user=self.user,
+            show_session=self.show_session,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        HeldSeat.objects.create(
+            row=5, seat=5, show_session=self.show_session, hold=hold
+        )
+        taken_seats = ShowSession.taken_seats
+        searches = []
+
+        def taken_seats_before_the_hold(show_session):
+            searches.append(show_session)
+            return [] if len(searches) == 1 else taken_seats(show_session)
+
+        with mock.patch.object(
+            ShowSession,
+            "taken_seats",
+            autospec=True,
+            side_effect=taken_seats_before_the_hold,
+        ):
+            response = self.client.post(
+                best_available_url(self.show_session.id),
+                {"party_size": 2},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(searches), 2)
+        self.assertEqual(
+            [(ticket["row"], ticket["seat"]) for ticket in response.data["tickets"]],
+            [(6, 5), (6, 6)],
+        )
+        self.assertEqual(Ticket.objects.count(), 2)
+
+
+class ShowSessionPaginationApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        first_session = sample_show_session(show_time="2022-06-01T10:00:00Z")
+        for day in range(2, 7):
+            ShowSession.objects.create(
+                astronomy_show=first_session.astronomy_show,
+                planetarium_dome=first_session.planetarium_dome,
+                show_time=f"2022-06-0{day}T10:00:00Z",
+            )
+
+    def test_list_is_not_paginated_by_default(self):
+        response = self.client.get(SHOW_SESSION_URL)
+
+        self.assertEqual(len(response.data), 6)
+
+    def test_cursor_pages_follow_show_time(self):
+        first_page = self.client.get(SHOW_SESSION_URL, {"cursor": ""})
+        second_page = self.client.get(first_page.data["next"])
+
+        self.assertNotIn("count", first_page.data)
+        self.assertEqual(len(first_page.data["results"]), 4)
+        self.assertEqual(len(second_page.data["results"]), 2)
+        self.assertIsNone(second_page.data["next"])
+        self.assertEqual(
+            [session["show_time"][:10] for session in second_page.data["results"]],
+            ["2022-06-05", "2022-06-06"],
+        )
+
+    def test_page_number_mode(self):
+        response = self.client.get(SHOW_SESSION_URL, {"page": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 6)
+        self.assertEqual(len(response.data["results"]), 2)
+
+
+class ShowSessionScheduleFilterApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.session = sample_show_session(show_time="2022-06-02T23:30:00Z")
+        self.other_dome = PlanetariumDome.objects.create(
+            name="OtherDome", rows=5, seats_in_row=5
+        )
+        for show_time, dome in [
+            ("2022-06-03T00:30:00Z", self.session.planetarium_dome),
+            ("2022-06-04T12:00:00Z", self.other_dome),
+        ]:
+            ShowSession.objects.create(
+                astronomy_show=self.session.astronomy_show,
+                planetarium_dome=dome,
+                show_time=show_time,
+            )
+
+    def show_times(self, **params):
+        response = self.client.get(SHOW_SESSION_URL, params)
+        return [session["show_time"] for session in response.data]
+
+    def test_filter_by_date(self):
+        self.assertEqual(self.show_times(date="2022-06-03"), ["2022-06-03T00:30:00Z"])
+
+    @override_settings(TIME_ZONE="Europe/Kyiv")
+    def test_filter_by_date_uses_current_time_zone(self):
+        self.assertEqual(
+            self.show_times(date="2022-06-03"),
+            ["2022-06-03T02:30:00+03:00", "2022-06-03T03:30:00+03:00"],
+        )
+
+    def test_filter_by_date_range_and_dome(self):
+        self.assertEqual(len(self.show_times(date_from="2022-06-03")), 2)
+        self.assertEqual(len(self.show_times(date_to="2022-06-03")), 2)
+        self.assertEqual(
+            self.show_times(date_from="2022-06-01", dome=self.other_dome.id),
+            ["2022-06-04T12:00:00Z"],
+        )
+
+    def test_invalid_date(self):
+        response = self.client.get(SHOW_SESSION_URL, {"date": "03.06.2022"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("date", response.data)
+
+    def test_date_filter_can_use_show_time_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Query plan format is SQLite specific.")
+
+        plan = ShowSession.objects.filter(
+            show_time__gte="2022-06-03T00:00:00Z",
+            show_time__lt="2022-06-04T00:00:00Z",
+        ).explain()
+
+        self.assertIn("USING INDEX", plan)
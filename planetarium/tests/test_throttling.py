@@ -0,0 +1,152 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.tests.test_reservation_api import (
+    RESERVATION_URL,
+    sample_show_session,
+)
+from planetarium_service.throttling import (
+    ActionRateThrottle,
+    SQLiteWindowStore,
+    check_throttle_database,
+    get_store,
+    sliding_window,
+)
+
+
+class SlidingWindowTest(SimpleTestCase):
+    def test_requests_are_allowed_up_to_the_limit(self):
+        state = None
+        for _ in range(3):
+            allowed, wait, state = sliding_window(state, 3, 60, 600)
+            self.assertTrue(allowed)
+
+        allowed, wait, _ = sliding_window(state, 3, 60, 610)
+
+        self.assertFalse(allowed)
+        # Window 11 must start, and then 2 of the 3 requests slide out.
+        self.assertAlmostEqual(wait, 70)
+
+    def test_previous_window_slides_out(self):
+        state = (10, 4, 0)
+
+        allowed, wait, _ = sliding_window(state, 4, 60, 665)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 10)
+
+        # A quarter into window 11, 3 of the previous 4 requests count.
+        allowed, _, state = sliding_window(state, 4, 60, 675)
+        self.assertTrue(allowed)
+        self.assertEqual(state, (11, 1, 4))
+
+    def test_old_windows_are_forgotten(self):
+        allowed, _, state = sliding_window((10, 4, 4), 4, 60, 725)
+
+        self.assertTrue(allowed)
+        self.assertEqual(state, (12, 1, 0))
+
+    def test_zero_limit_refuses_everything(self):
+        self.assertEqual(sliding_window(None, 0, 60, 600), (False, None, None))
+        self.assertEqual(sliding_window((10, 0, 0), 0, 60, 610), (False, None, None))
+
+
+class SQLiteWindowStoreTest(SimpleTestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "throttle.sqlite3")
+
+    def test_stores_share_counters(self):
+        first = SQLiteWindowStore(self.path)
+        second = SQLiteWindowStore(self.path)
+
+        results = [
+            store.hit("client", 3, 60, 600)[0]
+            for store in (first, second, first, second)
+        ]
+
+        self.assertEqual(results, [True, True, True, False])
+        self.assertTrue(first.hit("other", 3, 60, 600)[0])
+
+    def test_expired_counters_are_pruned(self):
+        store = SQLiteWindowStore(self.path)
+        store.hit("client", 3, 60, 600)
+
+        store.prune(720)
+
+        count = store.connect().execute(
+            "SELECT COUNT(*) FROM throttle_window"
+        ).fetchone()[0]
+        self.assertEqual(count, 0)
+
+    def test_unusable_path_fails_loudly(self):
+        path = os.path.join(self.path, "missing", "throttle.sqlite3")
+
+        with self.assertRaises(ImproperlyConfigured):
+            SQLiteWindowStore(path)
+        with override_settings(THROTTLE_DATABASE=path):
+            errors = check_throttle_database()
+        self.assertEqual([error.id for error in errors], ["planetarium_service.E001"])
+
+
+class ReservationThrottleTest(TestCase):
+    def setUp(self) -> None:
+        get_store(settings.THROTTLE_DATABASE).clear()
+        rates = mock.patch.dict(
+            ActionRateThrottle.THROTTLE_RATES, {"reservation": "2/minute"}
+        )
+        rates.start()
+        self.addCleanup(rates.stop)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+
+    def reserve(self, seat):
+        tickets = [{"row": 1, "seat": seat, "show_session": self.show_session.id}]
+        return self.client.post(RESERVATION_URL, {"tickets": tickets}, format="json")
+
+    def test_reservation_create_is_throttled(self):
+        self.assertEqual(self.reserve(1).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.reserve(2).status_code, status.HTTP_201_CREATED)
+
+        response = self.reserve(3)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+
+    def test_best_available_shares_the_reservation_scope(self):
+        self.reserve(1)
+        self.reserve(2)
+
+        response = self.client.post(
+            reverse(
+                "planetarium:showsession-best-available",
+                args=[self.show_session.id],
+            ),
+            {"party_size": 2},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_other_actions_are_not_scoped(self):
+        self.reserve(1)
+        self.reserve(2)
+
+        response = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,124 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.models import Reservation
+from planetarium.tests.test_reservation_api import sample_show_session
+
+EXPORT_URL = reverse("planetarium:ticket-export")
+
+
+def read_stream(response):
+    return b"".join(response.streaming_content).decode()
+
+
+@override_settings(TICKET_EXPORT_CHUNK_SIZE=2)
+class TicketExportTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.admin)
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.june_session = sample_show_session()
+        self.july_session = sample_show_session(show_time="2022-07-02T14:00:00Z")
+        for show_session in (self.june_session, self.july_session):
+            Reservation.create_with_tickets(
+                [
+                    {"show_session": show_session, "row": 1, "seat": seat}
+                    for seat in (1, 2, 3)
+                ],
+                user=self.user,
+            )
+
+    def test_export_requires_admin(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_ndjson(self):
+        response = self.client.get(EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]["user_email"], "test@test.com")
+        self.assertEqual(rows[0]["astronomy_show"], "TestShow")
+        self.assertEqual(rows[0]["planetarium_dome"], "TestDome")
+        self.assertEqual(rows[0]["show_time"], "2022-06-02T14:00:00+00:00")
+        self.assertEqual((rows[0]["row"], rows[0]["seat"]), (1, 1))
+
+    async def test_export_is_async_under_asgi(self):
+        response = await self.async_client.get(
+            EXPORT_URL,
+            headers={"Authorization": f"Bearer {AccessToken.for_user(self.admin)}"},
+        )
+
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        # Two rows per chunk, see TICKET_EXPORT_CHUNK_SIZE above.
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(b"".join(chunks).count(b"\n"), 6)
+
+    def test_export_csv(self):
+        response = self.client.get(EXPORT_URL, {"type": "csv"})
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("tickets.csv", response["Content-Disposition"])
+        rows = list(csv.DictReader(StringIO(read_stream(response))))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[-1]["show_session_id"], str(self.july_session.id))
+
+    def test_export_filters_by_date_range_and_dome(self):
+        response = self.client.get(
+            EXPORT_URL, {"date_from": "2022-07-01", "date_to": "2022-07-31"}
+        )
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        self.assertEqual(
+            {row["show_session_id"] for row in rows}, {self.july_session.id}
+        )
+
+        response = self.client.get(
+            EXPORT_URL, {"dome": self.june_session.planetarium_dome_id}
+        )
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        self.assertEqual(
+            {row["show_session_id"] for row in rows}, {self.june_session.id}
+        )
+
+    def test_export_unknown_type(self):
+        response = self.client.get(EXPORT_URL, {"type": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_tickets_command(self):
+        out = StringIO()
+
+        call_command(
+            "export_tickets", "--format", "csv", "--date-to", "2022-06-30", stdout=out
+        )
+
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["user_email"], "test@test.com")
+
+    def test_export_tickets_command_rejects_bad_date(self):
+        with self.assertRaises(CommandError):
+            call_command("export_tickets", "--date-from", "June", stdout=StringIO())
@@ -1,3 +1,4 @@
+from django.urls import path
 from rest_framework import routers
 
 from planetarium.views import (
@@ -6,6 +7,8 @@ from planetarium.views import (
     PlanetariumDomeViewSet,
     ShowSessionViewSet,
     ReservationViewSet,
+    SeatHoldViewSet,
+    TicketExportView,
 )
 
 app_name = "planetarium"
@@ -17,5 +20,8 @@ router.register("astronomy_shows", AstronomyShowViewSet)
 router.register("domes", PlanetariumDomeViewSet)
 router.register("show_sessions", ShowSessionViewSet)
 router.register("reservations", ReservationViewSet)
+router.register("seat_holds", SeatHoldViewSet)
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path("tickets/export/", TicketExportView.as_view(), name="ticket-export"),
+]
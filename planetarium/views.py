@@ -1,15 +1,51 @@
-from datetime import datetime
-
-from django.db.models import F, Count
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.utils import (
+    extend_schema,
+    OpenApiParameter,
+    PolymorphicProxySerializer,
+)
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
-
+from rest_framework.utils.urls import replace_query_param
+
+from planetarium.async_views import (
+    AsyncViewSetMixin,
+    AsyncListModelMixin,
+    AsyncRetrieveModelMixin,
+    fetch,
+    set_prefetched,
+)
+from planetarium.cache import cache_response
+from planetarium.etags import (
+    conditional_response,
+    aggregate_list_etag,
+    detail_etag,
+    summed_list_etag,
+)
+from planetarium.events import seat_event_stream, seat_snapshot_stream
+from planetarium.exports import (
+    EXPORT_FORMATS,
+    async_chunks,
+    export_queryset,
+    stream_export,
+)
+from planetarium.filters import filter_schedule
+from planetarium.metrics import SEAT_CONFLICTS
 from planetarium.permissions import IsAdminOrAuthenticatedOrReadOnly
+from planetarium.schedule import ScheduleCSVParser
+from planetarium.search import search_shows
+from planetarium.seating import SEAT_MAP_ENCODERS, best_available
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
 from planetarium.models import (
@@ -18,6 +54,8 @@ from planetarium.models import (
     PlanetariumDome,
     ShowSession,
     Reservation,
+    SeatHold,
+    Ticket,
 )
 from planetarium.serializers import (
     ShowThemeSerializer,
@@ -25,8 +63,11 @@ from planetarium.serializers import (
     PlanetariumDomeSerializer,
     ShowSessionSerializer,
     ReservationSerializer,
-    ShowSessionDetailSerializer, ReservationListSerializer, ShowSessionListSerializer, AstronomyShowListSerializer,
-    AstronomyShowDetailSerializer, ShowImageSerializer,
+    ShowSessionDetailSerializer, ReservationHistorySerializer,
+    ReservationHistoryPageSerializer, ShowSessionListSerializer, AstronomyShowListSerializer,
+    AstronomyShowDetailSerializer, ShowImageSerializer, SeatMapSerializer,
+    SeatHoldSerializer, BestAvailableSerializer, ScheduleRowSerializer,
+    ScheduleRecurrenceSerializer, ScheduleImportSerializer,
 )
 
 
@@ -35,6 +76,95 @@ class DefaultPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class CursorOrPageNumberPagination(CursorPagination):
+    """Keyset pagination on ``?cursor=``, page numbers on ``?page=``.
+
+    Cursor pages filter on the indexed ``ordering`` columns instead of
+    counting the whole queryset and scanning past an OFFSET; an empty
+    ``?cursor=`` asks for the first one. Requests with neither parameter
+    get ``default_mode``: ``"cursor"``, ``"page"`` or ``None`` for the
+    whole list, unpaginated.
+
+    With ``deprecated_default_mode`` such requests are answered with a
+    ``Deprecation`` header and a ``Link`` to the first cursor page, ahead
+    of ``default_mode`` becoming ``"cursor"``.
+    """
+
+    page_query_param = "page"
+    default_mode = "cursor"
+    deprecated_default_mode = False
+
+    def get_mode(self, request):
+        if self.cursor_query_param in request.query_params:
+            return "cursor"
+        if self.page_query_param in request.query_params:
+            return "page"
+        return self.default_mode
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_number_paginator = None
+        self.request = request
+        mode = self.get_mode(request)
+        if mode is None:
+            return None
+        if mode == "page":
+            self.page_number_paginator = PageNumberPagination()
+            self.page_number_paginator.page_size = self.page_size
+            self.page_number_paginator.page_query_param = self.page_query_param
+            return self.page_number_paginator.paginate_queryset(
+                queryset.order_by(*self.ordering), request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.page_number_paginator is not None:
+            response = self.page_number_paginator.get_paginated_response(data)
+        else:
+            response = super().get_paginated_response(data)
+        query_params = self.request.query_params
+        if self.deprecated_default_mode and not (
+            self.cursor_query_param in query_params
+            or self.page_query_param in query_params
+        ):
+            first_cursor_page = replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, ""
+            )
+            response["Deprecation"] = "true"
+            response["Link"] = f'<{first_cursor_page}>; rel="alternate"'
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        paginated = super().get_paginated_response_schema(schema)
+        if self.default_mode is None:
+            return {"oneOf": [schema, paginated]}
+        return paginated
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.page_query_param,
+                "required": False,
+                "in": "query",
+                "description": (
+                    "A page number, for page-number pagination instead of "
+                    "cursors. "
+                    + (
+                        "Page numbers are deprecated as the default, pass "
+                        "?cursor= for the first cursor page."
+                        if self.deprecated_default_mode
+                        else ""
+                    )
+                ).strip(),
+                "schema": {"type": "integer"},
+            }
+        ]
+
+    def to_html(self):
+        if self.page_number_paginator is not None:
+            return self.page_number_paginator.to_html()
+        return super().to_html()
+
+
 class ShowThemeViewSet(
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
@@ -44,12 +174,19 @@ class ShowThemeViewSet(
     serializer_class = ShowThemeSerializer
     pagination_class = DefaultPagination
     permission_classes = (IsAdminOrAuthenticatedOrReadOnly, )
+    query_budget = {"list": 4}
+
+    @cache_response("show_theme")
+    @conditional_response(aggregate_list_etag)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
 
 class AstronomyShowViewSet(
-    mixins.ListModelMixin,
+    AsyncViewSetMixin,
+    AsyncListModelMixin,
     mixins.CreateModelMixin,
-    mixins.RetrieveModelMixin,
+    AsyncRetrieveModelMixin,
     viewsets.GenericViewSet
 ):
     queryset = AstronomyShow.objects.all().prefetch_related(
@@ -57,6 +194,7 @@ class AstronomyShowViewSet(
     )
     serializer_class = AstronomyShowSerializer
     permission_classes = (IsAdminOrAuthenticatedOrReadOnly,)
+    query_budget = {"list": 4, "retrieve": 4}
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -76,13 +214,17 @@ class AstronomyShowViewSet(
 
     def get_queryset(self):
         """Retrieve the astronomy show with filter."""
-        queryset = self.queryset
+        queryset = self.queryset.all()
         themes = self.request.query_params.get("themes")
+        search = self.request.query_params.get("search")
 
         if themes:
             themes_ids = self._params_to_ints(themes)
             queryset = queryset.filter(themes__id__in=themes_ids)
 
+        if search:
+            queryset = search_shows(queryset, search)
+
         return queryset
 
     @extend_schema(
@@ -91,11 +233,24 @@ class AstronomyShowViewSet(
                 "themes",
                 type={"type": "list", "items": {"type": "number"}},
                 description="Filtering by themes (ex. ?themes=1,2)"
+            ),
+            OpenApiParameter(
+                "search",
+                type=str,
+                description="Full-text search in title and description, "
+                            "best matches first (ex. ?search=sun)"
             )
         ]
     )
-    def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+    @cache_response("astronomy_show")
+    @conditional_response(aggregate_list_etag)
+    async def list(self, request, *args, **kwargs):
+        return await super().list(request, *args, **kwargs)
+
+    @cache_response("astronomy_show")
+    @conditional_response(detail_etag("version"))
+    async def retrieve(self, request, *args, **kwargs):
+        return await super().retrieve(request, *args, **kwargs)
 
     @action(
         methods=["POST"],
@@ -110,6 +265,7 @@ class AstronomyShowViewSet(
 
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        show.generate_image_variants()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -122,25 +278,42 @@ class PlanetariumDomeViewSet(
     serializer_class = PlanetariumDomeSerializer
     pagination_class = DefaultPagination
     permission_classes = (IsAdminOrAuthenticatedOrReadOnly,)
+    query_budget = {"list": 4}
+
+    @cache_response("planetarium_dome")
+    @conditional_response(aggregate_list_etag)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
 
-class ShowSessionPagination(PageNumberPagination):
+class ShowSessionPagination(CursorOrPageNumberPagination):
     page_size = 4
     max_page_size = 100
+    ordering = ("show_time", "id")
+    # The list was never paginated; clients opt in.
+    default_mode = None
 
 
-class ShowSessionViewSet(viewsets.ModelViewSet):
-    queryset = (
-        ShowSession.objects.all()
-        .annotate(
-            tickets_available=(
-                F("planetarium_dome__rows") * F("planetarium_dome__seats_in_row")
-                - Count("tickets")
-            )
-        )
-    )
+class ShowSessionViewSet(
+    AsyncViewSetMixin,
+    AsyncListModelMixin,
+    viewsets.ModelViewSet
+):
+    queryset = ShowSession.objects.all()
     serializer_class = ShowSessionSerializer
+    pagination_class = ShowSessionPagination
     permission_classes = (IsAdminOrAuthenticatedOrReadOnly,)
+    # Lists count the sessions on ?page= only.
+    query_budget = {
+        "list": 4,
+        "retrieve": 5,
+        "seat_map": 4,
+        "events": 4,
+        "import_schedule": 7,
+    }
+    throttle_scopes = {"best_available": "reservation"}
+    best_available_attempts = 3
+    lookup_value_regex = r"\d+"
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -151,17 +324,32 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Retrieve the astronomy show with filters."""
-        queryset = self.queryset
-        date = self.request.query_params.get("date")
+        queryset = self.queryset.with_tickets_available()
         title = self.request.query_params.get("title")
+        search = self.request.query_params.get("search")
+
+        if self.action == "list":
+            queryset = queryset.select_related(
+                "astronomy_show", "planetarium_dome"
+            )
+
+        if self.action == "retrieve":
+            queryset = queryset.select_related(
+                "astronomy_show", "planetarium_dome"
+            )
 
-        if date:
-            date = datetime.strptime(date, "%Y-%m-%d").date()
-            queryset = queryset.filter(show_time__date=date)
+        queryset = filter_schedule(queryset, self.request.query_params)
 
         if title:
             queryset = queryset.filter(astronomy_show__title__icontains=title)
 
+        if search:
+            queryset = queryset.filter(
+                astronomy_show__in=search_shows(
+                    AstronomyShow.objects.all(), search, ranked=False
+                )
+            )
+
         return queryset
 
     @extend_schema(
@@ -171,24 +359,245 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
                 type=OpenApiTypes.DATE,
                 description="Filtering by date (ex. ?date=2012-12-12)"
             ),
+            OpenApiParameter(
+                "date_from",
+                type=OpenApiTypes.DATE,
+                description="Sessions on or after date (ex. ?date_from=2012-12-12)"
+            ),
+            OpenApiParameter(
+                "date_to",
+                type=OpenApiTypes.DATE,
+                description="Sessions on or before date (ex. ?date_to=2012-12-31)"
+            ),
+            OpenApiParameter(
+                "dome",
+                type=int,
+                description="Filtering by dome id (ex. ?dome=1)"
+            ),
             OpenApiParameter(
                 "title",
                 type=str,
                 description="Filtering by title (ex. ?title=Sun)"
+            ),
+            OpenApiParameter(
+                "search",
+                type=str,
+                description="Full-text search in the show title and "
+                            "description (ex. ?search=sun)"
             )
         ]
     )
-    def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+    @conditional_response(
+        summed_list_etag(
+            "version",
+            "tickets_available",
+            "astronomy_show__version",
+            "planetarium_dome__version",
+        )
+    )
+    async def list(self, request, *args, **kwargs):
+        return await super().list(request, *args, **kwargs)
 
+    @conditional_response(
+        detail_etag("version", "astronomy_show__version", "planetarium_dome__version")
+    )
+    async def retrieve(self, request, pk=None):
+        """Read the session, its show's themes and its sold seats."""
+        show_session = await self.aget_object()
+        themes = await fetch(ShowTheme.objects.filter(astronomy_show__shows=pk))
+        tickets = await fetch(Ticket.objects.filter(show_session=pk))
+        set_prefetched(show_session.astronomy_show, "themes", themes)
+        set_prefetched(show_session, "tickets", tickets)
+
+        serializer = self.get_serializer(show_session)
+        return Response(serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "encoding",
+                type=str,
+                enum=tuple(SEAT_MAP_ENCODERS),
+                description="Seat map encoding (ex. ?encoding=rle)"
+            )
+        ],
+        responses=SeatMapSerializer,
+    )
+    @action(methods=["GET"], detail=True, url_path="seat_map")
+    def seat_map(self, request, pk=None):
+        """Endpoint with taken seats packed into a compact bitmap."""
+        show_session = get_object_or_404(
+            ShowSession.objects.select_related("planetarium_dome"), pk=pk
+        )
+        self.check_object_permissions(request, show_session)
+
+        encoding = request.query_params.get("encoding", "base64")
+        if encoding not in SEAT_MAP_ENCODERS:
+            return Response(
+                {"encoding": f"Must be one of: {', '.join(SEAT_MAP_ENCODERS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        dome = show_session.planetarium_dome
+        taken = show_session.taken_seats()
+        serializer = SeatMapSerializer({
+            "rows": dome.rows,
+            "seats_in_row": dome.seats_in_row,
+            "encoding": encoding,
+            "taken": SEAT_MAP_ENCODERS[encoding](
+                dome.rows, dome.seats_in_row, taken
+            ),
+        })
+        return Response(serializer.data)
+
+    @extend_schema(
+        responses={(status.HTTP_200_OK, "text/event-stream"): OpenApiTypes.STR},
+    )
+    @action(methods=["GET"], detail=True, url_path="events")
+    def events(self, request, pk=None):
+        """Server-sent events with seats taken and released in the session.
+
+        Starts with a ``snapshot`` event of all taken seats, followed by a
+        ``seats`` event per committed change, including seats of holds
+        that expire meanwhile. Streams stay open only when served over
+        ASGI; over WSGI the snapshot is sent and the client is told to
+        reconnect.
+        """
+        show_session = get_object_or_404(ShowSession.objects.only("id"), pk=pk)
+        self.check_object_permissions(request, show_session)
+
+        if isinstance(request._request, ASGIRequest):
+            stream = seat_event_stream(
+                show_session,
+                sync_to_async(show_session.taken_seats),
+                sync_to_async(show_session.release_expired_holds),
+            )
+        else:
+            stream = seat_snapshot_stream(show_session, show_session.taken_seats())
 
-class ReservationPagination(PageNumberPagination):
+        response = StreamingHttpResponse(stream, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @extend_schema(
+        request=BestAvailableSerializer,
+        responses={status.HTTP_201_CREATED: ReservationSerializer},
+    )
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path="best_available",
+        permission_classes=[IsAuthenticated, ]
+    )
+    def best_available(self, request, pk=None):
+        """Endpoint for reserving the best free seats for a party."""
+        show_session = get_object_or_404(
+            ShowSession.objects.select_related("planetarium_dome"), pk=pk
+        )
+        serializer = BestAvailableSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        dome = show_session.planetarium_dome
+        for _ in range(self.best_available_attempts):
+            seats = best_available(
+                dome.rows,
+                dome.seats_in_row,
+                show_session.taken_seats(),
+                **serializer.validated_data,
+            )
+            if seats is None:
+                return Response(
+                    {"detail": "Not enough free seats for this party."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            try:
+                reservation = Reservation.create_with_tickets(
+                    [
+                        {"show_session": show_session, "row": row, "seat": seat}
+                        for row, seat in seats
+                    ],
+                    user=request.user,
+                )
+            except IntegrityError:
+                # Someone booked one of the picked seats first, pick again.
+                SEAT_CONFLICTS.inc(reason="race")
+                continue
+
+            return Response(
+                ReservationSerializer(reservation).data,
+                status=status.HTTP_201_CREATED,
+            )
+
+        return Response(
+            {"detail": "Seats are selling fast, please try again."},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    @extend_schema(
+        request={
+            "application/json": PolymorphicProxySerializer(
+                component_name="ScheduleImportRequest",
+                serializers=[
+                    ScheduleRowSerializer(many=True),
+                    ScheduleRecurrenceSerializer,
+                ],
+                resource_type_field_name=None,
+                many=False,
+            ),
+            "text/csv": OpenApiTypes.STR,
+        },
+        responses={
+            status.HTTP_201_CREATED: ScheduleImportSerializer,
+            status.HTTP_400_BAD_REQUEST: ScheduleImportSerializer,
+        },
+    )
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="import",
+        permission_classes=[IsAdminUser, ],
+        parser_classes=[JSONParser, ScheduleCSVParser],
+    )
+    def import_schedule(self, request):
+        """Endpoint for creating many sessions at once.
+
+        Takes a JSON list or a CSV body of sessions, or a recurrence rule
+        object. Rows that are invalid or overlap another session of the
+        dome are reported by index; the other rows are still created.
+        """
+        if isinstance(request.data, list):
+            result = ScheduleRowSerializer.import_rows(request.data)
+        else:
+            rule = ScheduleRecurrenceSerializer(data=request.data)
+            rule.is_valid(raise_exception=True)
+            result = ScheduleRowSerializer.import_rows(
+                rule.sessions(), context=rule.import_context()
+            )
+
+        return Response(
+            ScheduleImportSerializer(result).data,
+            status=(
+                status.HTTP_201_CREATED
+                if result["created"]
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+
+class ReservationPagination(CursorOrPageNumberPagination):
     page_size = 2
     max_page_size = 100
+    ordering = ("created_at", "id")
+    # Clients were built on page numbers; cursors become the default once
+    # they send ?cursor=.
+    default_mode = "page"
+    deprecated_default_mode = True
 
 
 class ReservationViewSet(
-    mixins.ListModelMixin,
+    AsyncViewSetMixin,
+    AsyncListModelMixin,
     mixins.CreateModelMixin,
     GenericViewSet
 ):
@@ -196,18 +605,142 @@ class ReservationViewSet(
     serializer_class = ReservationSerializer
     pagination_class = ReservationPagination
     permission_classes = (IsAuthenticated, )
+    # Page numbers, the default, count the reservations; cursors don't.
+    query_budget = {"list": 4, "create": 11}
+    throttle_scopes = {"create": "reservation"}
 
     def get_queryset(self):
-        return Reservation.objects.filter(user=self.request.user).prefetch_related(
-            "tickets__show_session",
-            "tickets__show_session__astronomy_show",
-            "tickets__show_session__planetarium_dome"
-        )
+        return Reservation.objects.filter(user=self.request.user)
 
     def get_serializer_class(self):
         if self.action == "list":
-            return ReservationListSerializer
+            return ReservationHistorySerializer
         return ReservationSerializer
 
+    @extend_schema(responses=ReservationHistoryPageSerializer)
+    async def list(self, request, *args, **kwargs):
+        """Reservation history of the current user.
+
+        Tickets reference their show session by id; each session is
+        listed once in ``show_sessions``. Page with ``?cursor=``, the
+        preferred mode: without it the history is still paged by number,
+        but that default is deprecated and will change to cursors.
+        """
+        serializer_class = self.get_serializer_class()
+        reservations = await self.apaginate_queryset(
+            self.filter_queryset(self.get_queryset()).values("id", "created_at")
+        )
+        ticket_rows = await fetch(
+            serializer_class.ticket_rows([row["id"] for row in reservations])
+        )
+        results, show_sessions = serializer_class.group(
+            reservations, ticket_rows, self.get_serializer_context()
+        )
+
+        response = self.get_paginated_response(results)
+        response.data["show_sessions"] = show_sessions
+        return response
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+class SeatHoldViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet
+):
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    permission_classes = (IsAuthenticated, )
+    query_budget = {"retrieve": 3}
+    lookup_field = "token"
+
+    def get_queryset(self):
+        """Retrieve the active holds of the current user."""
+        return SeatHold.objects.filter(
+            user=self.request.user, expires_at__gt=timezone.now()
+        ).prefetch_related("seats")
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @extend_schema(request=None, responses=ReservationSerializer)
+    @action(methods=["POST"], detail=True)
+    def confirm(self, request, token=None):
+        """Endpoint for turning a hold into a reservation."""
+        hold = self.get_object()
+        try:
+            reservation = hold.confirm()
+        except IntegrityError:
+            SEAT_CONFLICTS.inc(reason="race")
+            return Response(
+                {"detail": "Some of the held seats have already been sold."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        serializer = ReservationSerializer(
+            reservation, context=self.get_serializer_context()
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class TicketExportView(APIView):
+    """Admin-only streaming export of tickets for reconciliation."""
+
+    permission_classes = (IsAdminUser, )
+    query_budget = {"get": 1}
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "type",
+                type=str,
+                enum=tuple(EXPORT_FORMATS),
+                description="Export format, ndjson by default (ex. ?type=csv)"
+            ),
+            OpenApiParameter(
+                "date_from",
+                type=OpenApiTypes.DATE,
+                description="Sessions on or after date (ex. ?date_from=2012-12-12)"
+            ),
+            OpenApiParameter(
+                "date_to",
+                type=OpenApiTypes.DATE,
+                description="Sessions on or before date (ex. ?date_to=2012-12-31)"
+            ),
+            OpenApiParameter(
+                "dome",
+                type=int,
+                description="Filtering by dome id (ex. ?dome=1)"
+            ),
+        ],
+        responses={
+            (status.HTTP_200_OK, content_type): OpenApiTypes.STR
+            for content_type, _ in EXPORT_FORMATS.values()
+        },
+    )
+    def get(self, request):
+        """Tickets joined to reservation, user email, session and show.
+
+        Rows are streamed in chunks, so any number of tickets can be
+        exported with flat memory use.
+        """
+        export_format = request.query_params.get("type", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"type": f"Must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = export_queryset(request.query_params)
+        content_type, _ = EXPORT_FORMATS[export_format]
+        stream = stream_export(queryset, export_format)
+        if isinstance(request._request, ASGIRequest):
+            stream = async_chunks(stream)
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="tickets.{export_format}"'
+        )
+        return response
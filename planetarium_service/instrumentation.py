@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """A view action ran more queries than its ``query_budget``."""
+
+
+class QueryRecorder:
+    """Count SQL queries and their total time on every database connection."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+    def install(self):
+        """Wrap the connections of this thread until the stack is closed."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+    @contextmanager
+    def record(self):
+        with self.install():
+            yield self
+
+    @asynccontextmanager
+    async def arecord(self):
+        """``record()`` for async code.
+
+        Connections are per thread and the async ORM queries in the
+        thread of ``sync_to_async(thread_sensitive=True)``, one per
+        request under ASGI, so the wrappers go on its connections.
+        """
+        stack = await sync_to_async(self.install)()
+        try:
+            yield self
+        finally:
+            await sync_to_async(stack.close)()
+
+
+def resolve_view_action(request):
+    """Return the ``(view class, action)`` a resolved request was routed to.
+
+    Works for DRF viewsets, whose router views remember the
+    method-to-action mapping; plain views get the lowercase method.
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None, None
+
+    view_class = getattr(match.func, "cls", None) or getattr(
+        match.func, "view_class", None
+    )
+    method = request.method.lower()
+    actions = getattr(match.func, "actions", None) or {}
+    return view_class, actions.get(method, method)
+
+
+def get_query_budget(view_class, action):
+    """Declared ``query_budget`` of a view action, or ``None``."""
+    return getattr(view_class, "query_budget", {}).get(action)
+
+
+class QueryBudgetMiddleware:
+    """Record query count and DB time of each request.
+
+    The numbers are exposed as ``X-DB-Query-Count`` and ``X-DB-Time-Ms``
+    response headers when ``QUERY_COUNT_HEADERS`` is on, and a warning is
+    logged when a view action runs more queries than its budget, or
+    ``QueryBudgetExceeded`` raised under ``QUERY_BUDGET_STRICT``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with QueryRecorder().record() as recorder:
+            response = self.get_response(request)
+        return self.process_response(request, response, recorder)
+
+    async def __acall__(self, request):
+        async with QueryRecorder().arecord() as recorder:
+            response = await self.get_response(request)
+        return self.process_response(request, response, recorder)
+
+    def process_response(self, request, response, recorder):
+        if getattr(settings, "QUERY_COUNT_HEADERS", False):
+            response["X-DB-Query-Count"] = str(recorder.count)
+            response["X-DB-Time-Ms"] = f"{recorder.duration * 1000:.2f}"
+
+        view_class, action = resolve_view_action(request)
+        budget = get_query_budget(view_class, action)
+        if budget is not None and recorder.count > budget:
+            message = (
+                f"{view_class.__name__}.{action} ran {recorder.count} "
+                f"queries, over its budget of {budget}: {request.path}"
+            )
+            if getattr(settings, "QUERY_BUDGET_STRICT", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
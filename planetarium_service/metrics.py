@@ -0,0 +1,514 @@
+"""Prometheus metrics of the service, summed over all worker processes.
+
+``MetricsMiddleware`` records per URL name (e.g.
+``planetarium:showsession-list``) and method the latency, SQL query
+count, DB time, serializer time and response size of each request in
+histograms. Serializer time covers serializers with
+``TimedSerializerMixin``. Apps define counters of their own
+(planetarium/metrics.py). ``metrics_view`` serves them all in the text
+exposition format.
+
+Each process keeps its metrics in memory. With ``METRICS_DIRECTORY`` set,
+a thread of each process also writes them to a file of its own, every
+``METRICS_FLUSH_INTERVAL`` seconds while they change and when it exits,
+in a directory per parent process: the workers of one gunicorn master
+share it, so whichever worker is scraped sums them all, and a restarted
+server starts from zero. The parent folds the file of an exited worker
+into ``exited.json`` with ``mark_process_dead`` (see gunicorn.conf.py),
+so counters never go back and the files don't pile up. Without a
+directory, a process reports only itself.
+"""
+import asyncio
+import atexit
+import bisect
+import contextvars
+import hmac
+import ipaddress
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+from planetarium_service.instrumentation import QueryRecorder
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Where the files of exited workers are summed up.
+EXITED_FILE = "exited.json"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def read_snapshot(path):
+    """The snapshot in ``path``, or ``None`` when it is gone or half written."""
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(path, snapshot):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as file:
+        json.dump(snapshot, file)
+    os.replace(temporary, path)
+
+
+def sum_snapshots(snapshots):
+    """``{name: {labels: values}}`` summed over ``snapshots``."""
+    totals = {}
+    for snapshot in snapshots:
+        for name, samples in snapshot.items():
+            metric_totals = totals.setdefault(name, {})
+            for key, values in samples:
+                total = metric_totals.setdefault(tuple(key), [0.0] * len(values))
+                for index, value in enumerate(values):
+                    total[index] += value
+    return totals
+
+
+def mark_process_dead(pid, directory=None):
+    """Fold the metrics file of the exited child ``pid`` into ``EXITED_FILE``.
+
+    Runs in the parent process, whose children share ``directory``.
+    """
+    if directory is None:
+        if settings.METRICS_DIRECTORY is None:
+            return
+        directory = os.path.join(settings.METRICS_DIRECTORY, str(os.getpid()))
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    paths = [
+        os.path.join(directory, name)
+        for name in names
+        if name.startswith(f"{pid}-") and name.endswith(".json")
+    ]
+    if not paths:
+        return
+
+    exited = os.path.join(directory, EXITED_FILE)
+    snapshots = [read_snapshot(path) for path in [exited, *paths]]
+    totals = sum_snapshots(snapshot for snapshot in snapshots if snapshot)
+    write_snapshot(
+        exited,
+        {
+            name: [[list(key), values] for key, values in samples.items()]
+            for name, samples in totals.items()
+        },
+    )
+    for path in paths:
+        os.remove(path)
+
+
+class Registry:
+    """The metrics of a process, and the files of its sibling processes."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.changed = threading.Event()
+        self.pid = self.path = None
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: [
+                    [list(key), list(values)]
+                    for key, values in metric.values.items()
+                ]
+                for name, metric in self.metrics.items()
+            }
+
+    def record(self, metric, labels, increments):
+        key = tuple(str(labels[name]) for name in metric.label_names)
+        with self.lock:
+            values = metric.values.get(key)
+            if values is None:
+                values = metric.values[key] = [0.0] * metric.size
+            for index, amount in increments:
+                values[index] += amount
+        if self.pid != os.getpid():
+            self.start_flushing()
+        self.changed.set()
+
+    @staticmethod
+    def directory():
+        location = settings.METRICS_DIRECTORY
+        if location is None:
+            return None
+        return os.path.join(location, str(os.getppid()))
+
+    def open_file(self, directory):
+        """Name the file of this process in ``directory``, if any."""
+        self.pid = os.getpid()
+        self.path = None
+        if directory is not None:
+            # Not the pid alone: a later worker may get the same one.
+            name = f"{self.pid}-{uuid.uuid4().hex[:8]}.json"
+            self.path = os.path.join(directory, name)
+
+    def start_flushing(self):
+        """Start the thread writing this process's file, once per process."""
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.open_file(self.directory())
+        if self.path is None:
+            return
+
+        self.remove_stale_directories()
+        threading.Thread(
+            target=self.flush_periodically, name="metrics-flush", daemon=True
+        ).start()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def remove_stale_directories():
+        """Drop the directories of parent processes that have exited."""
+        location = settings.METRICS_DIRECTORY
+        try:
+            names = os.listdir(location)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.isdigit() or int(name) == os.getppid():
+                continue
+            try:
+                os.kill(int(name), 0)
+            except ProcessLookupError:
+                shutil.rmtree(os.path.join(location, name), ignore_errors=True)
+            except PermissionError:
+                pass
+
+    def flush_periodically(self):
+        pid = os.getpid()
+        while self.pid == pid:
+            self.changed.wait()
+            self.changed.clear()
+            self.flush()
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+
+    def flush(self):
+        if self.path is not None:
+            write_snapshot(self.path, self.snapshot())
+
+    def collect(self):
+        """``{name: {labels: values}}`` summed over the sibling processes."""
+        if self.pid != os.getpid():
+            self.start_flushing()
+        if self.path is None:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush()
+            directory = os.path.dirname(self.path)
+            snapshots = [
+                read_snapshot(os.path.join(directory, name))
+                for name in os.listdir(directory)
+                if name.endswith(".json")
+            ]
+
+        totals = sum_snapshots(snapshot for snapshot in snapshots if snapshot)
+        return {name: totals.get(name, {}) for name in self.metrics}
+
+    def render(self):
+        lines = []
+        for name, samples in self.collect().items():
+            lines.extend(self.metrics[name].render(samples))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    type = None
+    size = None
+
+    def __init__(self, name, documentation, labels=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.values = {}
+        self.registry = registry
+        registry.register(self)
+
+    def header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+
+class Counter(Metric):
+    type = "counter"
+    size = 1
+
+    def inc(self, amount=1, **labels):
+        self.registry.record(self, labels, [(0, amount)])
+
+    def render(self, samples):
+        lines = self.header()
+        for key, (value,) in sorted(samples.items()):
+            labels = format_labels(self.label_names, key)
+            lines.append(f"{self.name}{labels} {format_value(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    """Observation counts per bucket (not cumulative) and their sum."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name,
+        documentation,
+        labels=(),
+        buckets=LATENCY_BUCKETS,
+        registry=REGISTRY,
+    ):
+        self.buckets = tuple(buckets)
+        self.size = len(self.buckets) + 2
+        super().__init__(name, documentation, labels, registry)
+
+    def observe(self, value, **labels):
+        bucket = bisect.bisect_left(self.buckets, value)
+        self.registry.record(self, labels, [(bucket, 1), (-1, value)])
+
+    def render(self, samples):
+        lines = self.header()
+        bounds = [*self.buckets, float("inf")]
+        for key, values in sorted(samples.items()):
+            count = 0
+            for bound, observations in zip(bounds, values):
+                count += observations
+                labels = format_labels(
+                    self.label_names, key, [("le", format_value(bound))]
+                )
+                lines.append(f"{self.name}_bucket{labels} {format_value(count)}")
+            labels = format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(values[-1])}")
+            lines.append(f"{self.name}_count{labels} {format_value(count)}")
+        return lines
+
+
+REQUEST_LABELS = ("view", "method")
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "Requests by URL name, method and status code.",
+    ("view", "method", "status"),
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time spent on requests.",
+    REQUEST_LABELS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL queries run per request.",
+    REQUEST_LABELS,
+    buckets=QUERY_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in SQL queries per request.",
+    REQUEST_LABELS,
+    buckets=DB_TIME_BUCKETS,
+)
+REQUEST_SERIALIZER_DURATION = Histogram(
+    "http_request_serializer_duration_seconds",
+    "Time spent validating and serializing data with timed serializers.",
+    REQUEST_LABELS,
+    buckets=DB_TIME_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Size of response bodies; streamed bodies count if their length is known.",
+    REQUEST_LABELS,
+    buckets=SIZE_BUCKETS,
+)
+
+
+class SerializerTimer:
+    """Time spent in the outermost serializer calls of a request."""
+
+    def __init__(self):
+        self.duration = 0.0
+        self.depth = 0
+
+    @contextmanager
+    def measure(self):
+        self.depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if not self.depth:
+                self.duration += time.perf_counter() - started
+
+
+serializer_timer = contextvars.ContextVar("serializer_timer", default=None)
+
+
+def timed(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        timer = serializer_timer.get()
+        if timer is None:
+            return func(*args, **kwargs)
+        with timer.measure():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class TimedSerializerMixin:
+    # Counts validating and rendering data with a serializer as serializer
+    # time of the request: ``is_valid()`` and ``.data`` where it is used at
+    # the top, ``run_validation()`` and ``to_representation()`` where it is
+    # the child of a plain ListSerializer. No docstring, or the schema
+    # would describe serializers without one of their own with it.
+
+    @timed
+    def is_valid(self, *args, **kwargs):
+        return super().is_valid(*args, **kwargs)
+
+    @property
+    @timed
+    def data(self):
+        return super().data
+
+    @timed
+    def run_validation(self, *args, **kwargs):
+        return super().run_validation(*args, **kwargs)
+
+    @timed
+    def to_representation(self, *args, **kwargs):
+        return super().to_representation(*args, **kwargs)
+
+
+def response_size(response):
+    if not response.streaming:
+        return len(response.content)
+    if response.has_header("Content-Length"):
+        return int(response["Content-Length"])
+    return None
+
+
+class MetricsMiddleware:
+    """Record the request metrics above for each request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        timer = SerializerTimer()
+        token = serializer_timer.set(timer)
+        try:
+            with QueryRecorder().record() as recorder:
+                response = self.get_response(request)
+        finally:
+            serializer_timer.reset(token)
+        self.record(request, response, started, recorder, timer)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        timer = SerializerTimer()
+        token = serializer_timer.set(timer)
+        try:
+            async with QueryRecorder().arecord() as recorder:
+                response = await self.get_response(request)
+        finally:
+            serializer_timer.reset(token)
+        self.record(request, response, started, recorder, timer)
+        return response
+
+    @staticmethod
+    def record(request, response, started, recorder, timer):
+        match = getattr(request, "resolver_match", None)
+        labels = {
+            "view": match.view_name if match else "unmatched",
+            "method": request.method,
+        }
+        REQUESTS.inc(status=response.status_code, **labels)
+        REQUEST_DURATION.observe(time.perf_counter() - started, **labels)
+        REQUEST_QUERIES.observe(recorder.count, **labels)
+        REQUEST_DB_DURATION.observe(recorder.duration, **labels)
+        REQUEST_SERIALIZER_DURATION.observe(timer.duration, **labels)
+        size = response_size(response)
+        if size is not None:
+            RESPONSE_SIZE.observe(size, **labels)
+
+
+def metrics_allowed(request):
+    token = settings.METRICS_TOKEN
+    if token and hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics_view(request):
+    """The metrics of all workers, for Prometheus to scrape.
+
+    Denied unless the request carries ``METRICS_TOKEN`` as a bearer token
+    or comes from one of ``METRICS_ALLOWED_NETWORKS``.
+    """
+    if not metrics_allowed(request):
+        return HttpResponse(status=401 if settings.METRICS_TOKEN else 403)
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
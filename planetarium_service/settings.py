@@ -53,9 +53,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "planetarium_service.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "planetarium_service.instrumentation.QueryBudgetMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -84,6 +86,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "planetarium_service.wsgi.application"
 
+TEST_RUNNER = "planetarium_service.test_runner.TestRunner"
+
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
@@ -120,21 +124,115 @@ AUTH_USER_MODEL = "user.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "planetarium_service.throttling.AnonRateThrottle",
+        "planetarium_service.throttling.UserRateThrottle",
+        "planetarium_service.throttling.ActionRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "50/day", "user": "500/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "50/day",
+        "user": "500/day",
+        "reservation": "20/hour",
+    },
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Throttle counters are shared by the processes of a host through this
+# SQLite file, see planetarium_service/throttling.py; ":memory:" keeps
+# them in each process, as the test runner does.
+THROTTLE_DATABASE = BASE_DIR / "throttle.sqlite3"
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.TokenRefreshSerializer",
+    "TOKEN_VERIFY_SERIALIZER": "user.serializers.TokenVerifySerializer",
+    "AUTH_TOKEN_CLASSES": ("user.tokens.AccessToken",),
 }
 
+# Revoked tokens are checked against a Bloom filter of each process, see
+# user/revocation.py, sized for TOKEN_REVOCATION_CAPACITY tokens with
+# TOKEN_REVOCATION_ERROR_RATE false positives. Processes read new
+# revocations every TOKEN_REVOCATION_SYNC_INTERVAL seconds and rebuild the
+# filter every TOKEN_REVOCATION_REBUILD_INTERVAL seconds.
+TOKEN_REVOCATION_CAPACITY = 100000
+TOKEN_REVOCATION_ERROR_RATE = 0.001
+TOKEN_REVOCATION_SYNC_INTERVAL = 1
+TOKEN_REVOCATION_REBUILD_INTERVAL = 60 * 60
+
+# Users of access tokens are cached, see user/cache.py. Each process keeps
+# USER_CACHE_SIZE users for USER_CACHE_TTL seconds; set USER_CACHE_ALIAS
+# to also share them for USER_CACHE_TIMEOUT seconds through that cache.
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL = 60
+USER_CACHE_ALIAS = None
+USER_CACHE_TIMEOUT = 60 * 60
+
+# Passwords are hashed and checked by PASSWORD_HASHING_WORKERS threads of
+# each process (user/hashing.py). Outdated hashes are replaced at login
+# when PASSWORD_REHASH_ON_LOGIN.
+PASSWORD_HASHING_WORKERS = 4
+PASSWORD_REHASH_ON_LOGIN = True
+
+# Let IsAdminOrAuthenticatedOrReadOnly trust the is_staff claim of access
+# tokens (user/tokens.py) instead of the user row. That saves reading the
+# user for staff writes, but a demoted staff user keeps write access until
+# the access token expires (ACCESS_TOKEN_LIFETIME). Without it the user row
+# decides, which other processes still cache for up to USER_CACHE_TTL
+# seconds after a change.
+TRUST_STAFF_CLAIM = False
+
+SEAT_HOLD_TTL = timedelta(minutes=10)
+# Largest party the best-available endpoint seats at once.
+BEST_AVAILABLE_MAX_PARTY_SIZE = 20
+
+# A show session occupies its dome this long; imported sessions closer
+# than that to another session in the same dome are rejected.
+SHOW_SESSION_SLOT = timedelta(hours=1)
+SCHEDULE_IMPORT_BATCH_SIZE = 500
+
+# Resized variants of show images, see planetarium/images.py. They are
+# rendered by SHOW_IMAGE_WORKERS processes, or in the request when 0.
+SHOW_IMAGE_VARIANT_WIDTHS = (160, 320, 640, 1280)
+SHOW_IMAGE_VARIANT_FORMATS = ("webp", "jpeg")
+SHOW_IMAGE_VARIANT_QUALITY = 80
+SHOW_IMAGE_WORKERS = 2
+
+# Catalog responses are cached here; use a shared backend (Redis,
+# Memcached) when running several workers so invalidation reaches all.
+CATALOG_CACHE_ALIAS = "default"
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
+# Live seat events of show sessions, see planetarium/events.py.
+SEAT_EVENTS_BROKER = "planetarium.events.LocalBroker"
+SEAT_EVENTS_KEEPALIVE = 15
+SEAT_EVENTS_MAX_AGE = 5 * 60
+SEAT_EVENTS_QUEUE_SIZE = 100
+SEAT_EVENTS_RETRY_MS = 5000
+
+# Tickets fetched and rendered per chunk by the ticket export.
+TICKET_EXPORT_CHUNK_SIZE = 2000
+
+# Expose X-DB-Query-Count / X-DB-Time-Ms response headers.
+QUERY_COUNT_HEADERS = DEBUG
+# Raise QueryBudgetExceeded instead of logging a warning when a view
+# action runs more queries than its query_budget.
+QUERY_BUDGET_STRICT = False
+
+# Workers write their metrics to a directory here for /metrics to sum, see
+# planetarium_service/metrics.py; None reports each process alone.
+METRICS_DIRECTORY = BASE_DIR / "metrics"
+METRICS_FLUSH_INTERVAL = 5
+# /metrics is denied unless requests carry this bearer token or come from
+# one of these networks, e.g. ["10.0.0.0/8"]. Behind a reverse proxy the
+# client address is the proxy's, so list the proxy's network only if it
+# keeps /metrics from the public.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+METRICS_ALLOWED_NETWORKS = []
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -159,6 +257,21 @@ STATICFILES_DIRS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Serve MEDIA_ROOT from Django (planetarium/media.py); turn off when a web
+# server or CDN serves it. Names that are not content-hashed are cached
+# for MEDIA_CACHE_MAX_AGE seconds.
+SERVE_MEDIA = True
+MEDIA_CACHE_MAX_AGE = 60 * 60
+
+# Uploads are stored under the SHA-256 of their content, see
+# planetarium/storage.py.
+STORAGES = {
+    "default": {"BACKEND": "planetarium.storage.ContentHashStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
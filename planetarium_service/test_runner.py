@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+# Settings replaced while tests run.
+TEST_SETTINGS = {
+    # Keep tests from touching the counters of a development server, like
+    # the test e-mail backend does for mail.
+    "THROTTLE_DATABASE": ":memory:",
+    # Only revocations made by the test process: reading the table now
+    # and then would add queries to whichever test runs at the time.
+    "TOKEN_REVOCATION_SYNC_INTERVAL": None,
+    # Metrics of the test process only, without a flushing thread.
+    "METRICS_DIRECTORY": None,
+    # Any request of any test running over its view's query budget fails.
+    "QUERY_BUDGET_STRICT": True,
+}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.saved_settings = {
+            name: getattr(settings, name) for name in TEST_SETTINGS
+        }
+        for name, value in TEST_SETTINGS.items():
+            setattr(settings, name, value)
+
+    def teardown_test_environment(self, **kwargs):
+        for name, value in self.saved_settings.items():
+            setattr(settings, name, value)
+        super().teardown_test_environment(**kwargs)
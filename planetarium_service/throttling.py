@@ -0,0 +1,261 @@
+"""Rate limits shared by the worker processes of a host.
+
+DRF's throttles keep a list of request timestamps per client in the
+cache: the list grows with the rate, and with the default local-memory
+cache every worker counts on its own. These throttles keep a sliding
+window counter instead, three numbers per client:
+
+* the index of the current fixed window of ``duration`` seconds,
+* the requests allowed in it and in the previous window.
+
+The previous window is weighted by how much of it still overlaps the
+sliding window. The counters live in the SQLite file
+``THROTTLE_DATABASE``, which every process of the host opens, or in the
+process when it is ``":memory:"``.
+
+Views name stricter per-action scopes in ``throttle_scopes``, e.g.
+``{"create": "reservation"}``, with rates in ``DEFAULT_THROTTLE_RATES``.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import throttling
+
+logger = logging.getLogger(__name__)
+
+# Seconds between deletions of expired counters, per process.
+PRUNE_INTERVAL = 60
+
+
+def sliding_window(state, limit, duration, now):
+    """Count a request against the window ``state`` if ``limit`` allows it.
+
+    ``state`` is ``(window, current, previous)`` or ``None``. Returns
+    ``(allowed, wait, state)``: ``wait`` is how many seconds a refused
+    request should wait, ``state`` the new state of an allowed one.
+    """
+    if limit <= 0:
+        # A rate of 0 refuses everything; no wait makes a difference.
+        return False, None, None
+
+    window, position = divmod(now / duration, 1)
+    window = int(window)
+    current = previous = 0
+    if state is not None:
+        last_window, last_current, last_previous = state
+        if last_window == window:
+            current, previous = last_current, last_previous
+        elif last_window == window - 1:
+            previous = last_current
+
+    if previous * (1 - position) + current + 1 <= limit:
+        return True, None, (window, current + 1, previous)
+
+    if current + 1 <= limit:
+        # The previous window has to slide out a little further.
+        wait = (1 - (limit - 1 - current) / previous - position) * duration
+    else:
+        # The current window has to become the previous one first.
+        wait = (1 - position + 1 - (limit - 1) / current) * duration
+    return False, max(wait, 0), None
+
+
+class LocalWindowStore:
+    """Sliding window counters of this process."""
+
+    def __init__(self):
+        self.windows = {}
+        self.lock = threading.Lock()
+        self.pruned_at = 0
+
+    def hit(self, key, limit, duration, now):
+        """Count a request of ``key``; return ``(allowed, wait)``."""
+        with self.lock:
+            if now - self.pruned_at >= PRUNE_INTERVAL:
+                self.prune(now)
+            entry = self.windows.get(key)
+            allowed, wait, state = sliding_window(
+                entry and entry[0], limit, duration, now
+            )
+            if allowed:
+                self.windows[key] = (state, (state[0] + 2) * duration)
+        return allowed, wait
+
+    def prune(self, now):
+        self.windows = {
+            key: entry
+            for key, entry in self.windows.items()
+            if entry[1] > now
+        }
+        self.pruned_at = now
+
+    def clear(self):
+        with self.lock:
+            self.windows.clear()
+
+
+class SQLiteWindowStore:
+    """Sliding window counters in a SQLite file shared by processes.
+
+    Each thread of each process has its own connection. A counter is read
+    and written in one ``BEGIN IMMEDIATE`` transaction, so concurrent
+    requests of a client are counted one after the other. The file is
+    opened right away, so an unusable path raises ``ImproperlyConfigured``
+    instead of turning every later ``hit`` into an allowed request.
+    """
+
+    def __init__(self, path, timeout=5):
+        self.path = path
+        self.timeout = timeout
+        self.local = threading.local()
+        self.pruned_at = 0
+        try:
+            self.connect()
+        except sqlite3.Error as exc:
+            raise ImproperlyConfigured(
+                f"THROTTLE_DATABASE {path} cannot be used: {exc}"
+            ) from exc
+
+    def connect(self):
+        # Connections are not inherited: gunicorn forks its workers.
+        if getattr(self.local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS throttle_window ("
+                " key TEXT PRIMARY KEY,"
+                " window INTEGER NOT NULL,"
+                " current INTEGER NOT NULL,"
+                " previous INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return self.local.connection
+
+    def hit(self, key, limit, duration, now):
+        """Count a request of ``key``; return ``(allowed, wait)``.
+
+        Requests are allowed when the database fails at runtime, e.g.
+        stays locked, rather than failing them all.
+        """
+        try:
+            connection = self.connect()
+            if now - self.pruned_at >= PRUNE_INTERVAL:
+                self.prune(now)
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                state = connection.execute(
+                    "SELECT window, current, previous FROM throttle_window"
+                    " WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                allowed, wait, state = sliding_window(
+                    state, limit, duration, now
+                )
+                if allowed:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO throttle_window"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (key, *state, (state[0] + 2) * duration),
+                    )
+            finally:
+                connection.execute("COMMIT")
+        except sqlite3.Error:
+            logger.exception("Throttle database %s failed.", self.path)
+            return True, None
+        return allowed, wait
+
+    def prune(self, now):
+        self.pruned_at = now
+        self.connect().execute(
+            "DELETE FROM throttle_window WHERE expires_at <= ?", (now,)
+        )
+
+    def clear(self):
+        self.connect().execute("DELETE FROM throttle_window")
+
+
+@lru_cache
+def get_store(location):
+    """Counter store of ``THROTTLE_DATABASE``, shared by the whole process."""
+    if str(location) == ":memory:":
+        return LocalWindowStore()
+    return SQLiteWindowStore(location)
+
+
+def check_throttle_database(app_configs=None, **kwargs):
+    """System check that ``THROTTLE_DATABASE`` can be opened."""
+    try:
+        get_store(settings.THROTTLE_DATABASE)
+    except ImproperlyConfigured as exc:
+        return [checks.Error(str(exc), id="planetarium_service.E001")]
+    return []
+
+
+class SlidingWindowThrottle(throttling.SimpleRateThrottle):
+    """``SimpleRateThrottle`` counting requests in a shared sliding window."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self.wait_seconds = get_store(settings.THROTTLE_DATABASE).hit(
+            self.key, self.num_requests, self.duration, self.timer()
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonRateThrottle(throttling.AnonRateThrottle, SlidingWindowThrottle):
+    pass
+
+
+class UserRateThrottle(throttling.UserRateThrottle, SlidingWindowThrottle):
+    pass
+
+
+class ActionRateThrottle(SlidingWindowThrottle):
+    """Throttle the actions a view names in ``throttle_scopes``.
+
+    ``throttle_scopes`` maps actions (or methods of plain views) to
+    scopes of ``DEFAULT_THROTTLE_RATES``. Clients are counted per scope,
+    on top of the anon/user rates.
+    """
+
+    def __init__(self):
+        # The scope is only known once the view is.
+        pass
+
+    def allow_request(self, request, view):
+        action = getattr(view, "action", None) or request.method.lower()
+        self.scope = getattr(view, "throttle_scopes", {}).get(action)
+        if self.scope is None:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
@@ -1,5 +1,22 @@
 from django.contrib import admin
 
 from user.models import User
+from user.revocation import revoke_user_tokens
 
-admin.site.register(User)
+
+@admin.register(User)
+class UserAdmin(admin.ModelAdmin):
+    actions = ("log_out_everywhere", "ban")
+
+    @admin.action(description="Log out selected users everywhere")
+    def log_out_everywhere(self, request, queryset):
+        revoke_user_tokens(*queryset)
+        self.message_user(request, f"Revoked the tokens of {len(queryset)} users.")
+
+    @admin.action(description="Ban selected users")
+    def ban(self, request, queryset):
+        for user in queryset:
+            user.is_active = False
+            user.save(update_fields=["is_active"])
+        revoke_user_tokens(*queryset)
+        self.message_user(request, f"Banned {len(queryset)} users.")
@@ -0,0 +1,119 @@
+"""Users resolved from access tokens, cached per process and optionally shared.
+
+Each process keeps up to ``USER_CACHE_SIZE`` users for ``USER_CACHE_TTL``
+seconds, least recently used first out. When ``USER_CACHE_ALIAS`` names
+a Django cache, users missing locally are looked up there before the
+database. Saving or deleting a user drops it from this process and the
+shared cache (user/signals.py); other processes see the change once
+their local entry expires, so keep ``USER_CACHE_TTL`` short.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework_simplejwt.settings import api_settings
+
+
+class UserCache:
+    """Bounded LRU cache of users whose entries expire, safe across threads.
+
+    Lookups return copies, so a request changing its ``request.user``
+    does not change the cached user.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= self.clock():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        expires_at = self.clock() + settings.USER_CACHE_TTL
+        with self.lock:
+            self.entries[user_id] = (copy.copy(user), expires_at)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > settings.USER_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def delete(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+local_users = UserCache()
+
+
+def get_shared_cache():
+    if settings.USER_CACHE_ALIAS is None:
+        return None
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def shared_key(user_id):
+    return f"user:{user_id}"
+
+
+def get_user(user_id):
+    """The user whose ``USER_ID_FIELD`` is ``user_id``, or ``None``."""
+    user = local_users.get(user_id)
+    if user is not None:
+        return user
+
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        user = shared_cache.get(shared_key(user_id))
+    if user is None:
+        user_model = get_user_model()
+        try:
+            user = user_model.objects.get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except user_model.DoesNotExist:
+            return None
+        if shared_cache is not None:
+            shared_cache.set(
+                shared_key(user_id), user, settings.USER_CACHE_TIMEOUT
+            )
+
+    local_users.set(user_id, user)
+    return user
+
+
+def drop_user(user_id):
+    local_users.delete(user_id)
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete(shared_key(user_id))
+
+
+def invalidate_user(user_id):
+    """Drop a user now and again when the transaction ends.
+
+    The second drop removes copies cached from data read by concurrent
+    requests before this transaction was committed.
+    """
+    drop_user(user_id)
+    transaction.on_commit(lambda: drop_user(user_id))
@@ -0,0 +1,79 @@
+"""Password hashing off the request thread.
+
+PBKDF2 takes hundreds of milliseconds by design. The async registration
+and login views (user/views.py) hash and check passwords in a pool of
+``PASSWORD_HASHING_WORKERS`` threads instead: ``hashlib.pbkdf2_hmac``
+releases the GIL, so the event loop keeps serving other requests, and at
+most that many hashes run at once per process.
+
+With ``PASSWORD_REHASH_ON_LOGIN``, a login whose hash was made with
+another hasher or cost than the current one stores a new hash.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+
+
+@lru_cache
+def get_executor(workers):
+    """Thread pool of ``workers`` threads, shared by the whole process."""
+    return ThreadPoolExecutor(workers, thread_name_prefix="password-hashing")
+
+
+async def run_in_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(settings.PASSWORD_HASHING_WORKERS), partial(func, *args)
+    )
+
+
+async def amake_password(password):
+    return await run_in_pool(make_password, password)
+
+
+def verify_password(password, encoded):
+    """``(correct, new hash)``; the new hash is ``None`` unless outdated."""
+    rehashed = []
+
+    def setter(raw_password):
+        rehashed.append(make_password(raw_password))
+
+    correct = check_password(
+        password,
+        encoded,
+        setter if settings.PASSWORD_REHASH_ON_LOGIN else None,
+    )
+    return correct, rehashed[0] if rehashed else None
+
+
+async def acheck_password(user, password):
+    """``user.check_password()`` hashing in the pool."""
+    correct, rehashed = await run_in_pool(verify_password, password, user.password)
+    if rehashed is not None:
+        user.password = rehashed
+        await user.asave(update_fields=["password"])
+    return correct
+
+
+async def aauthenticate(email, password):
+    """The active user with ``email`` and ``password``, or ``None``.
+
+    Mirrors ``ModelBackend.authenticate``, including hashing once for
+    unknown emails so that they take as long as wrong passwords.
+    """
+    user_model = get_user_model()
+    try:
+        user = await user_model._default_manager.aget(
+            **{user_model.USERNAME_FIELD: email}
+        )
+    except user_model.DoesNotExist:
+        await amake_password(password)
+        return None
+
+    if await acheck_password(user, password) and user.is_active:
+        return user
+    return None
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from user.models import TokenRevocation
+
+
+class Command(BaseCommand):
+    help = "Delete token revocations whose tokens have expired."
+
+    def handle(self, *args, **options):
+        deleted = TokenRevocation.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired rows."))
@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext as _
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 
+from user.hashing import amake_password
+
 
 class UserManager(BaseUserManager):
     """Define a model manager for User model with no username field."""
@@ -24,6 +28,18 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault("is_superuser", False)
         return self._create_user(email, password, **extra_fields)
 
+    async def acreate_user(self, email, password=None, **extra_fields):
+        """``create_user`` hashing the password off the request thread."""
+        extra_fields.setdefault("is_staff", False)
+        extra_fields.setdefault("is_superuser", False)
+        if not email:
+            raise ValueError("The given email must be set")
+        email = self.normalize_email(email)
+        user = self.model(email=email, **extra_fields)
+        user.password = await amake_password(password)
+        await user.asave(using=self._db)
+        return user
+
     def create_superuser(self, email, password, **extra_fields):
         """Create and save a SuperUser with the given email and password."""
         extra_fields.setdefault("is_staff", True)
@@ -46,3 +62,44 @@ class User(AbstractUser):
     REQUIRED_FIELDS = []
 
     objects = UserManager()
+
+
+class TokenRevocation(models.Model):
+    """A revoked token, or all tokens of ``user`` issued before a time.
+
+    Rows are kept until the tokens they revoke expire, see
+    user/revocation.py.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="token_revocations",
+    )
+    jti = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    issued_before = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    models.Q(jti__isnull=False, issued_before__isnull=True)
+                    | models.Q(jti__isnull=True, issued_before__isnull=False)
+                ),
+                name="token_revocation_jti_or_issued_before",
+            ),
+        ]
+
+    @staticmethod
+    def purge_expired() -> int:
+        """Delete the rows of expired tokens in bulk."""
+        deleted, _ = TokenRevocation.objects.filter(
+            expires_at__lte=timezone.now()
+        ).delete()
+        return deleted
+
+    def __str__(self):
+        if self.jti:
+            return f"Token {self.jti}"
+        return f"Tokens of {self.user_id} issued before {self.issued_before}"
@@ -0,0 +1,217 @@
+"""Revoked JWTs, checked without a query per request.
+
+Revocations are ``TokenRevocation`` rows: a token by its ``jti`` (logout)
+or every token of a user issued before a time (log out everywhere, ban).
+Each process mirrors the rows that have not expired in ``revocations``:
+
+* revoked ``jti`` go into a Bloom filter; the rare hit is confirmed with
+  a query, so false positives never reject a valid token;
+* per-user cut-off times are few and kept exactly, compared with the
+  ``iat`` claim, which access tokens copy from their refresh token.
+
+Every ``TOKEN_REVOCATION_SYNC_INTERVAL`` seconds a process reads the rows
+created since its last read, so revocations reach all workers within
+that interval; revocations made by the process apply at once. The filter
+is rebuilt every ``TOKEN_REVOCATION_REBUILD_INTERVAL`` seconds to drop
+expired rows. With an interval of ``None`` the table is never read.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from user.models import TokenRevocation
+
+# Access tokens name the refresh token they were made from (user/tokens.py).
+REFRESH_JTI_CLAIM = "refresh_jti"
+
+# Rows created this long before the last read are read again, in case
+# their transaction was committed after it.
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+class BloomFilter:
+    """Set membership with false positives at ``error_rate`` and no false
+    negatives, in ``-capacity * ln(error_rate) / ln(2)²`` bits."""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return (
+            (first + index * second) % self.size
+            for index in range(self.hash_count)
+        )
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(key)
+        )
+
+
+class RevocationList:
+    """This process's mirror of the ``TokenRevocation`` rows."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.bloom = None
+        self.issued_before = {}
+        self.synced_at = None
+        self.next_sync = self.next_rebuild = 0
+
+    def new_bloom(self, count=0):
+        return BloomFilter(
+            max(settings.TOKEN_REVOCATION_CAPACITY, 2 * count),
+            settings.TOKEN_REVOCATION_ERROR_RATE,
+        )
+
+    @staticmethod
+    def record(revocation, bloom, issued_before):
+        if revocation.jti:
+            bloom.add(revocation.jti)
+            return
+        # ``iat`` is in whole seconds: tokens issued earlier in the second
+        # of the revocation stay valid.
+        cutoff = int(revocation.issued_before.timestamp())
+        user_id = revocation.user_id
+        issued_before[user_id] = max(cutoff, issued_before.get(user_id, cutoff))
+
+    def add(self, revocation):
+        self.record(revocation, self.bloom, self.issued_before)
+
+    def update(self):
+        """Read the table when the sync or rebuild interval is over."""
+        interval = settings.TOKEN_REVOCATION_SYNC_INTERVAL
+        if self.bloom is None:
+            with self.lock:
+                if self.bloom is None:
+                    if interval is None:
+                        self.bloom = self.new_bloom()
+                    else:
+                        self.rebuild()
+            return
+
+        if interval is None or self.clock() < self.next_sync:
+            return
+        # Another thread reading the table does it for everyone.
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            if self.clock() >= self.next_rebuild:
+                self.rebuild()
+            elif self.clock() >= self.next_sync:
+                self.sync()
+        finally:
+            self.lock.release()
+
+    def rebuild(self):
+        now = timezone.now()
+        rows = list(TokenRevocation.objects.filter(expires_at__gt=now))
+        bloom, issued_before = self.new_bloom(len(rows)), {}
+        for revocation in rows:
+            self.record(revocation, bloom, issued_before)
+        self.bloom, self.issued_before = bloom, issued_before
+        self.synced_at = now
+        self.next_sync = self.clock() + settings.TOKEN_REVOCATION_SYNC_INTERVAL
+        self.next_rebuild = (
+            self.clock() + settings.TOKEN_REVOCATION_REBUILD_INTERVAL
+        )
+
+    def sync(self):
+        now = timezone.now()
+        for revocation in TokenRevocation.objects.filter(
+            created_at__gte=self.synced_at - SYNC_OVERLAP
+        ):
+            self.add(revocation)
+        self.synced_at = now
+        self.next_sync = self.clock() + settings.TOKEN_REVOCATION_SYNC_INTERVAL
+
+    def is_revoked(self, token):
+        """Whether ``token`` (a validated simplejwt token) is revoked."""
+        self.update()
+
+        cutoff = self.issued_before.get(token.get(api_settings.USER_ID_CLAIM))
+        if cutoff is not None and token.get("iat", 0) < cutoff:
+            return True
+
+        jtis = [
+            jti
+            for jti in (
+                token.get(api_settings.JTI_CLAIM),
+                token.get(REFRESH_JTI_CLAIM),
+            )
+            if jti and jti in self.bloom
+        ]
+        return bool(jtis) and TokenRevocation.objects.filter(jti__in=jtis).exists()
+
+
+revocations = RevocationList()
+
+
+def apply_on_commit(rows):
+    def apply():
+        revocations.update()
+        for revocation in rows:
+            revocations.add(revocation)
+
+    transaction.on_commit(apply)
+
+
+def revoke_session(token):
+    """Revoke an access token and the refresh token it was made from."""
+    user_id = token[api_settings.USER_ID_CLAIM]
+    rows = [
+        TokenRevocation(
+            user_id=user_id,
+            jti=token[api_settings.JTI_CLAIM],
+            expires_at=datetime_from_epoch(token["exp"]),
+        )
+    ]
+    if REFRESH_JTI_CLAIM in token:
+        rows.append(
+            TokenRevocation(
+                user_id=user_id,
+                jti=token[REFRESH_JTI_CLAIM],
+                expires_at=datetime_from_epoch(token["iat"])
+                + api_settings.REFRESH_TOKEN_LIFETIME,
+            )
+        )
+    TokenRevocation.objects.bulk_create(rows, ignore_conflicts=True)
+    apply_on_commit(rows)
+
+
+def revoke_user_tokens(*users):
+    """Revoke every token issued to ``users`` so far."""
+    now = timezone.now()
+    rows = TokenRevocation.objects.bulk_create(
+        TokenRevocation(
+            user=user,
+            issued_before=now,
+            expires_at=now + api_settings.REFRESH_TOKEN_LIFETIME,
+        )
+        for user in users
+    )
+    apply_on_commit(rows)
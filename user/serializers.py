@@ -1,8 +1,17 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
-from rest_framework import serializers
+from django.contrib.auth.models import update_last_login
+from drf_spectacular.contrib import rest_framework_simplejwt as jwt_schema
+from rest_framework import exceptions, serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.settings import api_settings
 
+from planetarium_service.metrics import TimedSerializerMixin
+from user.hashing import aauthenticate
+from user.tokens import RefreshToken, UntypedToken
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
         fields = ("id", "email", "password", "is_staff")
@@ -13,6 +22,10 @@ class UserSerializer(serializers.ModelSerializer):
         """Create a new user with encrypted password and return it"""
         return get_user_model().objects.create_user(**validated_data)
 
+    async def acreate(self, validated_data):
+        """``create()`` hashing the password off the request thread."""
+        return await get_user_model().objects.acreate_user(**validated_data)
+
     def update(self, instance, validated_data):
         """Update a user, set the password correctly and return it"""
         password = validated_data.pop("password", None)
@@ -22,3 +35,52 @@ class UserSerializer(serializers.ModelSerializer):
             user.save()
 
         return user
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    token_class = RefreshToken
+
+    async def avalidate(self, attrs):
+        """``validate()`` checking the password off the request thread."""
+        self.user = await aauthenticate(
+            attrs[self.username_field], attrs["password"]
+        )
+        if not api_settings.USER_AUTHENTICATION_RULE(self.user):
+            raise exceptions.AuthenticationFailed(
+                self.error_messages["no_active_account"],
+                "no_active_account",
+            )
+
+        refresh = self.get_token(self.user)
+        data = {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+        if api_settings.UPDATE_LAST_LOGIN:
+            await sync_to_async(update_last_login)(None, self.user)
+        return data
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
+
+
+class TokenVerifySerializer(jwt_serializers.TokenVerifySerializer):
+    def validate(self, attrs):
+        super().validate(attrs)
+        UntypedToken(attrs["token"])
+        return {}
+
+
+class TokenObtainPairSerializerExtension(
+    jwt_schema.TokenObtainPairSerializerExtension
+):
+    target_class = TokenObtainPairSerializer
+
+
+class TokenRefreshSerializerExtension(
+    jwt_schema.TokenRefreshSerializerExtension
+):
+    target_class = TokenRefreshSerializer
+
+
+class TokenVerifySerializerExtension(jwt_schema.TokenVerifySerializerExtension):
+    target_class = TokenVerifySerializer
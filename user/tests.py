@@ -1,3 +1,401 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.urls import resolve, reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.cache import UserCache, local_users
+from user.models import TokenRevocation
+from user.revocation import (
+    BloomFilter,
+    RevocationList,
+    revocations,
+    revoke_session,
+    revoke_user_tokens,
+)
+from user.tokens import STAFF_CLAIM, RefreshToken
+
+CREATE_USER_URL = reverse("user:create")
+PROFILE_URL = reverse("user:profile")
+TOKEN_URL = reverse("user:token_obtain_pair")
+TOKEN_REFRESH_URL = reverse("user:token_refresh")
+TOKEN_VERIFY_URL = reverse("user:token_verify")
+LOGOUT_URL = reverse("user:logout")
+LOGOUT_EVERYWHERE_URL = reverse("user:logout_everywhere")
+SHOW_THEME_URL = reverse("planetarium:showtheme-list")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@override_settings(USER_CACHE_SIZE=2, USER_CACHE_TTL=60)
+class UserCacheTest(TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.cache = UserCache(clock=self.clock)
+        self.users = [
+            get_user_model()(id=index, email=f"user{index}@test.com")
+            for index in range(3)
+        ]
+
+    def test_entries_expire(self):
+        self.cache.set(0, self.users[0])
+        self.clock.now = 59
+        self.assertEqual(self.cache.get(0), self.users[0])
+
+        self.clock.now = 60
+        self.assertIsNone(self.cache.get(0))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set(0, self.users[0])
+        self.cache.set(1, self.users[1])
+        self.cache.get(0)
+        self.cache.set(2, self.users[2])
+
+        self.assertIsNotNone(self.cache.get(0))
+        self.assertIsNone(self.cache.get(1))
+        self.assertIsNotNone(self.cache.get(2))
+
+    def test_lookups_return_copies(self):
+        self.cache.set(0, self.users[0])
+        self.cache.get(0).email = "changed@test.com"
+
+        self.assertEqual(self.cache.get(0).email, "user0@test.com")
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self) -> None:
+        local_users.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_user_is_loaded_once(self):
+        self.client.get(PROFILE_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(PROFILE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], "test@test.com")
+
+    def test_profile_update_invalidates_user(self):
+        self.client.get(PROFILE_URL)
+        self.client.patch(PROFILE_URL, {"email": "new@test.com"})
+
+        response = self.client.get(PROFILE_URL)
+
+        self.assertEqual(response.data["email"], "new@test.com")
+
+    def test_saved_user_is_reloaded(self):
+        self.client.get(PROFILE_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(PROFILE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_not_found(self):
+        self.client.get(PROFILE_URL)
+        self.user.delete()
+
+        response = self.client.get(PROFILE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class StaffClaimTest(TestCase):
+    def setUp(self) -> None:
+        local_users.clear()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com", "testpass", is_staff=True
+        )
+        self.client = APIClient()
+
+    def test_tokens_carry_staff_claim(self):
+        response = self.client.post(
+            TOKEN_URL, {"email": "admin@test.com", "password": "testpass"}
+        )
+
+        access = AccessToken(response.data["access"])
+        self.assertIs(access[STAFF_CLAIM], True)
+
+    def test_refresh_reads_staff_claim_again(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.user.is_staff = False
+        self.user.save()
+
+        response = self.client.post(TOKEN_REFRESH_URL, {"refresh": str(refresh)})
+
+        access = AccessToken(response.data["access"])
+        self.assertIs(access[STAFF_CLAIM], False)
+
+    def test_permission_trusts_staff_claim_only_when_enabled(self):
+        access = RefreshToken.for_user(self.user).access_token
+        get_user_model().objects.filter(pk=self.user.pk).update(is_staff=False)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        response = self.client.post(SHOW_THEME_URL, {"name": "Planets"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        with self.settings(TRUST_STAFF_CLAIM=True):
+            response = self.client.post(SHOW_THEME_URL, {"name": "Stars"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+@override_settings(
+    PASSWORD_HASHERS=[
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+    ]
+)
+class OffThreadHashingTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def login(self, password="testpass"):
+        return self.client.post(
+            TOKEN_URL, {"email": "test@test.com", "password": password}
+        )
+
+    def test_views_are_async(self):
+        for url in (CREATE_USER_URL, TOKEN_URL):
+            with self.subTest(url):
+                self.assertTrue(asyncio.iscoroutinefunction(resolve(url).func))
+
+    def test_register(self):
+        response = self.client.post(
+            CREATE_USER_URL, {"email": "Test@TEST.com", "password": "testpass"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = get_user_model().objects.get(id=response.data["id"])
+        self.assertEqual(user.email, "Test@test.com")
+        self.assertTrue(user.check_password("testpass"))
+        self.assertNotIn("password", response.data)
+
+    def test_register_invalid_password(self):
+        response = self.client.post(
+            CREATE_USER_URL, {"email": "test@test.com", "password": "short"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_login(self):
+        get_user_model().objects.create_user("test@test.com", "testpass")
+
+        response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("access", response.data)
+        self.assertIn("refresh", response.data)
+
+    def test_login_fails(self):
+        get_user_model().objects.create_user(
+            "inactive@test.com", "testpass", is_active=False
+        )
+        get_user_model().objects.create_user("test@test.com", "testpass")
+
+        cases = {
+            "wrong password": {"email": "test@test.com", "password": "wrong"},
+            "unknown email": {"email": "nobody@test.com", "password": "testpass"},
+            "inactive user": {"email": "inactive@test.com", "password": "testpass"},
+        }
+        for name, credentials in cases.items():
+            with self.subTest(name):
+                response = self.client.post(TOKEN_URL, credentials)
+                self.assertEqual(
+                    response.status_code, status.HTTP_401_UNAUTHORIZED
+                )
+
+        response = self.client.post(TOKEN_URL, {"email": "test@test.com"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_outdated_hash_is_replaced_at_login(self):
+        user = get_user_model().objects.create(
+            email="test@test.com", password=make_password("testpass", hasher="md5")
+        )
+
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$"))
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    @override_settings(PASSWORD_REHASH_ON_LOGIN=False)
+    def test_outdated_hash_is_kept(self):
+        user = get_user_model().objects.create(
+            email="test@test.com", password=make_password("testpass", hasher="md5")
+        )
+
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("md5$"))
+
+
+class BloomFilterTest(SimpleTestCase):
+    def test_added_keys_are_found(self):
+        bloom = BloomFilter(1000, 0.01)
+        keys = [f"key{index}" for index in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f"other{index}" in bloom for index in range(10000))
+        self.assertLess(false_positives, 200)
+
+
+class TokenRevocationTest(TestCase):
+    def setUp(self) -> None:
+        revocations.clear()
+        local_users.clear()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+
+    def get_profile(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return self.client.get(PROFILE_URL)
+
+    def refresh_token(self, refresh):
+        return self.client.post(TOKEN_REFRESH_URL, {"refresh": str(refresh)})
+
+    def test_logout_revokes_session(self):
+        access = self.refresh.access_token
+        other_access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(LOGOUT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            self.get_profile(access).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        self.assertEqual(
+            self.refresh_token(self.refresh).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        self.assertEqual(self.get_profile(other_access).status_code, status.HTTP_200_OK)
+
+    def test_logout_everywhere_revokes_earlier_tokens(self):
+        earlier = RefreshToken.for_user(self.user)
+        earlier["iat"] -= 10
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}"
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(LOGOUT_EVERYWHERE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        for access in (earlier.access_token, self.refresh.access_token):
+            self.assertEqual(
+                self.get_profile(access).status_code,
+                status.HTTP_401_UNAUTHORIZED,
+            )
+        self.assertEqual(
+            self.refresh_token(earlier).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+        later = RefreshToken.for_user(self.user)
+        self.assertEqual(self.refresh_token(later).status_code, status.HTTP_200_OK)
+
+    def test_ban_revokes_tokens(self):
+        admin = get_user_model().objects.create_superuser(
+            "admin@test.com", "adminpass"
+        )
+        self.refresh["iat"] -= 10
+        access = self.refresh.access_token
+        self.client.force_login(admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("admin:user_user_changelist"),
+                {"action": "ban", "_selected_action": [self.user.pk]},
+            )
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        response = self.client.post(TOKEN_VERIFY_URL, {"token": str(access)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_valid_token_is_checked_without_queries(self):
+        access = self.refresh.access_token
+        revocations.update()
+
+        with self.assertNumQueries(0):
+            self.assertFalse(revocations.is_revoked(access))
+
+    def test_bloom_filter_hits_are_confirmed(self):
+        access = self.refresh.access_token
+        revocations.update()
+
+        with mock.patch.object(BloomFilter, "__contains__", return_value=True):
+            with self.assertNumQueries(1):
+                self.assertFalse(revocations.is_revoked(access))
+
+    @override_settings(TOKEN_REVOCATION_SYNC_INTERVAL=1)
+    def test_revocations_reach_other_processes(self):
+        clock = FakeClock()
+        other = RevocationList(clock=clock)
+        access = self.refresh.access_token
+        self.assertFalse(other.is_revoked(access))
+
+        revoke_session(access)
+        self.assertFalse(other.is_revoked(access))
+
+        clock.now = 1
+        self.assertTrue(other.is_revoked(access))
+
+        self.user.refresh_from_db()
+        earlier = RefreshToken.for_user(self.user)
+        earlier["iat"] -= 10
+        revoke_user_tokens(self.user)
+        clock.now = 3600
+        self.assertTrue(other.is_revoked(earlier))
+
+    def test_expired_revocations_are_purged(self):
+        now = timezone.now()
+        TokenRevocation.objects.bulk_create(
+            [
+                TokenRevocation(
+                    user=self.user, jti="old", expires_at=now - timedelta(1)
+                ),
+                TokenRevocation(
+                    user=self.user, jti="new", expires_at=now + timedelta(1)
+                ),
+            ]
+        )
+        out = StringIO()
+
+        call_command("purge_token_revocations", stdout=out)
+
+        self.assertIn("Deleted 1 expired rows.", out.getvalue())
+        self.assertQuerysetEqual(
+            TokenRevocation.objects.values_list("jti", flat=True), ["new"]
+        )
@@ -0,0 +1,64 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from user.cache import get_user
+from user.revocation import REFRESH_JTI_CLAIM, revocations
+
+STAFF_CLAIM = "is_staff"
+
+
+class RevocableTokenMixin:
+    """Reject tokens revoked in user/revocation.py."""
+
+    def verify(self):
+        super().verify()
+        if revocations.is_revoked(self):
+            raise TokenError(_("Token is revoked"))
+
+
+class AccessToken(RevocableTokenMixin, tokens.AccessToken):
+    pass
+
+
+class UntypedToken(RevocableTokenMixin, tokens.UntypedToken):
+    pass
+
+
+class RefreshToken(RevocableTokenMixin, tokens.RefreshToken):
+    """Refresh token whose access tokens carry the user's ``is_staff``.
+
+    The claim is read from the user each time an access token is made, so
+    a change of ``is_staff`` reaches tokens at the next refresh. Access
+    tokens also name their refresh token, so both are revoked together.
+    """
+
+    access_token_class = AccessToken
+
+    user = None
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.user = user
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user = self.user or get_user(self[api_settings.USER_ID_CLAIM])
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        access[STAFF_CLAIM] = user.is_staff
+        access[REFRESH_JTI_CLAIM] = self[api_settings.JTI_CLAIM]
+        return access
+
+
+def staff_claim(token):
+    """``is_staff`` claim of an access token, or ``None`` if it has none."""
+    if isinstance(token, tokens.Token) and STAFF_CLAIM in token:
+        return bool(token[STAFF_CLAIM])
+    return None
@@ -1,11 +1,16 @@
 from django.urls import path
 from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
     TokenRefreshView,
     TokenVerifyView,
 )
 
-from user.views import CreateUserView, ManageUserView
+from user.views import (
+    CreateUserView,
+    LogoutEverywhereView,
+    LogoutView,
+    ManageUserView,
+    TokenObtainPairView,
+)
 
 app_name = "user"
 
@@ -15,4 +20,10 @@ urlpatterns = [
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("token/verify/", TokenVerifyView.as_view(), name="token_verify"),
     path("me/", ManageUserView.as_view(), name="profile"),
+    path("logout/", LogoutView.as_view(), name="logout"),
+    path(
+        "logout_everywhere/",
+        LogoutEverywhereView.as_view(),
+        name="logout_everywhere",
+    ),
 ]
@@ -1,14 +1,64 @@
-from rest_framework import generics
+from asgiref.sync import sync_to_async
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt import views as jwt_views
 
+from planetarium.async_views import AsyncAPIViewMixin
+from user.revocation import revoke_session, revoke_user_tokens
 from user.serializers import UserSerializer
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(AsyncAPIViewMixin, generics.CreateAPIView):
     serializer_class = UserSerializer
 
+    async def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        serializer.instance = await serializer.acreate(serializer.validated_data)
+        headers = self.get_success_headers(serializer.data)
+        return Response(
+            serializer.data, status=status.HTTP_201_CREATED, headers=headers
+        )
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
 
     def get_object(self):
         return self.request.user
+
+
+class TokenObtainPairView(AsyncAPIViewMixin, jwt_views.TokenObtainPairView):
+    async def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        attrs = serializer.to_internal_value(request.data)
+        return Response(await serializer.avalidate(attrs))
+
+
+class LogoutView(APIView):
+    """Revoke the access token and the refresh token it was made from."""
+
+    permission_classes = (IsAuthenticated, )
+
+    @extend_schema(request=None, responses={status.HTTP_204_NO_CONTENT: None})
+    def post(self, request):
+        if request.auth is not None:
+            revoke_session(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class LogoutEverywhereView(APIView):
+    """Revoke every token issued to the user so far."""
+
+    permission_classes = (IsAuthenticated, )
+
+    @extend_schema(request=None, responses={status.HTTP_204_NO_CONTENT: None})
+    def post(self, request):
+        revoke_user_tokens(request.user)
+        if request.auth is not None:
+            # It may have been issued in the second of the revocation.
+            revoke_session(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)